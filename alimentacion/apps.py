@@ -5,3 +5,10 @@ class AlimentacionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'alimentacion'
     verbose_name = 'Alimentación'
+
+    def ready(self):
+        from core.common.cache_agregados import observar_modelos
+        from .models import ProveedorAlimento, FormulaAlimento, Racion, ConsumoDiario
+
+        # Invalidan las respuestas cacheadas de resumen_mensual y los ETag de los listados
+        observar_modelos(ProveedorAlimento, FormulaAlimento, Racion, ConsumoDiario)
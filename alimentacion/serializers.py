@@ -2,10 +2,12 @@
 Serializers para el módulo de alimentación.
 """
 from rest_framework import serializers
+
+from core.common.serializers import CamposDinamicosMixin, ValoresListSerializer, ValoresSerializerMixin
 from .models import ProveedorAlimento, FormulaAlimento, Racion, ConsumoDiario
 
 
-class ProveedorAlimentoSerializer(serializers.ModelSerializer):
+class ProveedorAlimentoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para proveedores de alimento."""
     class Meta:
         model = ProveedorAlimento
@@ -16,7 +18,7 @@ class ProveedorAlimentoSerializer(serializers.ModelSerializer):
         read_only_fields = ['creado_en', 'actualizado_en']
 
 
-class FormulaAlimentoSerializer(serializers.ModelSerializer):
+class FormulaAlimentoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para fórmulas de alimento."""
     cantidad_raciones = serializers.SerializerMethodField()
 
@@ -34,15 +36,21 @@ class FormulaAlimentoSerializer(serializers.ModelSerializer):
         return obj.raciones.filter(eliminado=False).count()
 
 
-class FormulaAlimentoListSerializer(serializers.ModelSerializer):
+class FormulaAlimentoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de fórmulas."""
     class Meta:
         model = FormulaAlimento
         fields = ['id', 'nombre', 'edad_minima_semanas', 'edad_maxima_semanas', 'activa']
 
 
-class RacionSerializer(serializers.ModelSerializer):
+class RacionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para raciones."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+        'formula_nombre': ('formula',),
+        'consumo_por_ave': ('lote',),
+        'registrado_por_nombre': ('registrado_por',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     formula_nombre = serializers.ReadOnlyField(source='formula.nombre')
     consumo_por_ave = serializers.ReadOnlyField()
@@ -64,18 +72,28 @@ class RacionSerializer(serializers.ModelSerializer):
         return None
 
 
-class RacionListSerializer(serializers.ModelSerializer):
+class RacionListSerializer(CamposDinamicosMixin, ValoresSerializerMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de raciones."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+        'formula_nombre': ('formula',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     formula_nombre = serializers.ReadOnlyField(source='formula.nombre')
 
     class Meta:
         model = Racion
         fields = ['id', 'lote', 'lote_nombre', 'formula', 'formula_nombre', 'fecha', 'cantidad_kg']
+        list_serializer_class = ValoresListSerializer
 
 
-class ConsumoDiarioSerializer(serializers.ModelSerializer):
+class ConsumoDiarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para consumos diarios."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+        'material_nombre': ('material_alimento',),
+        'registrado_por_nombre': ('registrado_por',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     material_nombre = serializers.ReadOnlyField(source='material_alimento.nombre')
     registrado_por_nombre = serializers.SerializerMethodField()
@@ -95,11 +113,16 @@ class ConsumoDiarioSerializer(serializers.ModelSerializer):
         return None
 
 
-class ConsumoDiarioListSerializer(serializers.ModelSerializer):
+class ConsumoDiarioListSerializer(CamposDinamicosMixin, ValoresSerializerMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de consumos."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+        'material_nombre': ('material_alimento',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     material_nombre = serializers.ReadOnlyField(source='material_alimento.nombre')
 
     class Meta:
         model = ConsumoDiario
         fields = ['id', 'lote', 'lote_nombre', 'material_alimento', 'material_nombre', 'fecha', 'cantidad_kg']
+        list_serializer_class = ValoresListSerializer
@@ -9,6 +9,7 @@ from django.db.models import Q, Sum, Avg, Count
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
 
+from produccion.models import Lote
 from .models import ProveedorAlimento, FormulaAlimento, Racion, ConsumoDiario
 from .serializers import (
     ProveedorAlimentoSerializer,
@@ -16,12 +17,14 @@ from .serializers import (
     RacionSerializer, RacionListSerializer,
     ConsumoDiarioSerializer, ConsumoDiarioListSerializer
 )
-from core.common.mixins import OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.pagination import KeysetPagination
+from core.common.cache_agregados import cachear_agregado
 
 logger = logging.getLogger(__name__)
 
 
-class ProveedorAlimentoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class ProveedorAlimentoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar proveedores de alimento."""
     queryset = ProveedorAlimento.objects.filter(eliminado=False)
     serializer_class = ProveedorAlimentoSerializer
@@ -38,10 +41,11 @@ class ProveedorAlimentoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
         return queryset.order_by('nombre')
 
 
-class FormulaAlimentoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class FormulaAlimentoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar fórmulas de alimento."""
     queryset = FormulaAlimento.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('raciones',)
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -59,10 +63,13 @@ class FormulaAlimentoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
         return queryset.order_by('edad_minima_semanas', 'nombre')
 
 
-class RacionViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class RacionViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar raciones."""
     queryset = Racion.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('lote', 'formula', 'registrado_por')
+    pagination_class = KeysetPagination
+    orden_keyset = ('-fecha', '-id')
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -89,6 +96,7 @@ class RacionViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelVie
         serializer.save(registrado_por=self.request.user)
 
     @action(detail=False, methods=['get'])
+    @cachear_agregado(Racion, Lote, FormulaAlimento)
     def resumen_mensual(self, request):
         """Retorna resumen de raciones por mes."""
         queryset = self.get_queryset()
@@ -108,10 +116,13 @@ class RacionViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelVie
         return Response(list(resumen))
 
 
-class ConsumoDiarioViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class ConsumoDiarioViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar consumos diarios."""
     queryset = ConsumoDiario.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('lote', 'material_alimento', 'registrado_por')
+    pagination_class = KeysetPagination
+    orden_keyset = ('-fecha', '-id')
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -5,3 +5,10 @@ class CalendarioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calendario'
     verbose_name = 'Calendario'
+
+    def ready(self):
+        from core.common.cache_agregados import observar_modelos
+        from .models import TipoEvento, Evento, Recordatorio
+
+        # Invalidan los ETag de los listados
+        observar_modelos(TipoEvento, Evento, Recordatorio)
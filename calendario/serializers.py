@@ -2,10 +2,12 @@
 Serializers para el módulo de calendario.
 """
 from rest_framework import serializers
+
+from core.common.serializers import CamposDinamicosMixin
 from .models import TipoEvento, Evento, Recordatorio
 
 
-class TipoEventoSerializer(serializers.ModelSerializer):
+class TipoEventoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para tipos de evento."""
     cantidad_eventos = serializers.SerializerMethodField()
 
@@ -22,15 +24,23 @@ class TipoEventoSerializer(serializers.ModelSerializer):
         return obj.eventos.filter(eliminado=False).count()
 
 
-class TipoEventoListSerializer(serializers.ModelSerializer):
+class TipoEventoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de tipos de evento."""
     class Meta:
         model = TipoEvento
         fields = ['id', 'nombre', 'color', 'icono']
 
 
-class EventoSerializer(serializers.ModelSerializer):
+class EventoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para eventos con información relacionada."""
+    relaciones_campos = {
+        'tipo_nombre': ('tipo',),
+        'tipo_color': ('tipo',),
+        'tipo_icono': ('tipo',),
+        'usuario_nombre': ('usuario',),
+        'asignado_a_nombre': ('asignado_a',),
+        'cantidad_recordatorios': ('recordatorios',),
+    }
     tipo_nombre = serializers.ReadOnlyField(source='tipo.nombre')
     tipo_color = serializers.ReadOnlyField(source='tipo.color')
     tipo_icono = serializers.ReadOnlyField(source='tipo.icono')
@@ -70,8 +80,12 @@ class EventoSerializer(serializers.ModelSerializer):
         return obj.recordatorios.count()
 
 
-class EventoListSerializer(serializers.ModelSerializer):
+class EventoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de eventos."""
+    relaciones_campos = {
+        'tipo_nombre': ('tipo',),
+        'tipo_color': ('tipo',),
+    }
     tipo_nombre = serializers.ReadOnlyField(source='tipo.nombre')
     tipo_color = serializers.ReadOnlyField(source='tipo.color')
     estado_display = serializers.CharField(source='get_estado_display', read_only=True)
@@ -85,8 +99,12 @@ class EventoListSerializer(serializers.ModelSerializer):
         ]
 
 
-class RecordatorioSerializer(serializers.ModelSerializer):
+class RecordatorioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para recordatorios."""
+    relaciones_campos = {
+        'evento_titulo': ('evento',),
+        'evento_fecha': ('evento',),
+    }
     evento_titulo = serializers.ReadOnlyField(source='evento.titulo')
     evento_fecha = serializers.ReadOnlyField(source='evento.fecha_inicio')
 
@@ -15,17 +15,18 @@ from .serializers import (
     EventoSerializer, EventoListSerializer,
     RecordatorioSerializer
 )
-from core.common.mixins import OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin
 
 logger = logging.getLogger(__name__)
 
 
-class TipoEventoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class TipoEventoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar tipos de evento.
     """
     queryset = TipoEvento.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('eventos',)
 
     def get_serializer_class(self):
         """Usa serializer ligero para listado."""
@@ -38,12 +39,14 @@ class TipoEventoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
         return super().get_queryset().order_by('nombre')
 
 
-class EventoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class EventoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar eventos del calendario.
     """
     queryset = Evento.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('recordatorios',)
+    dependencias_validador = ('tipo', 'usuario', 'asignado_a')
 
     def get_serializer_class(self):
         """Usa serializer ligero para listado."""
@@ -152,13 +155,14 @@ class EventoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelVie
         return Response(serializer.data)
 
 
-class RecordatorioViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class RecordatorioViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar recordatorios.
     """
     queryset = Recordatorio.objects.filter(eliminado=False)
     serializer_class = RecordatorioSerializer
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('evento',)
 
     def get_queryset(self):
         """Optimiza queries y permite filtros."""
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    name = 'core'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete
+        from .bootstrap import incrementar_version, modelos_observados
+
+        for modelo in modelos_observados():
+            post_save.connect(incrementar_version, sender=modelo, dispatch_uid=f'bootstrap_save_{modelo._meta.label}')
+            post_delete.connect(incrementar_version, sender=modelo, dispatch_uid=f'bootstrap_delete_{modelo._meta.label}')
@@ -0,0 +1,137 @@
+"""
+Datos de referencia que la PWA necesita al iniciar, en una sola respuesta.
+La parte compartida se cachea bajo la versión global VERSION_BOOTSTRAP (VersionDatos),
+que se incrementa al escribir en cualquiera de los modelos de FUENTES.
+"""
+import hashlib
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import F
+
+from core.common.models import VersionDatos
+from alimentacion.models import FormulaAlimento
+from calendario.models import TipoEvento
+from finanzas.models import Categoria, Proveedor, Proyecto
+from inventario.models import Material
+from produccion.models import Galpon, Lote
+
+VERSION_BOOTSTRAP = 'bootstrap'
+TTL_CACHE_BOOTSTRAP = 60 * 60 * 24
+
+# (clave en la respuesta, queryset, campos de values())
+FUENTES = [
+    ('categorias', Categoria.objects.filter(eliminado=False).order_by('nombre'),
+     ['id', 'nombre', 'descripcion']),
+    ('proveedores', Proveedor.objects.filter(eliminado=False).order_by('nombre'),
+     ['id', 'nombre', 'telefono', 'direccion', 'especialidad']),
+    ('proyectos', Proyecto.objects.filter(eliminado=False).order_by('-fecha_inicio'),
+     ['id', 'nombre', 'presupuesto_objetivo', 'fecha_inicio', 'descripcion']),
+    ('galpones', Galpon.objects.filter(eliminado=False).order_by('nombre'),
+     ['id', 'nombre', 'capacidad_maxima', 'activo']),
+    ('lotes', Lote.objects.filter(eliminado=False, activo=True).order_by('-fecha_ingreso'),
+     ['id', 'nombre', 'galpon', 'galpon_nombre', 'fecha_ingreso', 'cantidad_aves', 'raza', 'estado']),
+    ('formulas', FormulaAlimento.objects.filter(eliminado=False).order_by('edad_minima_semanas', 'nombre'),
+     ['id', 'nombre', 'edad_minima_semanas', 'edad_maxima_semanas', 'activa']),
+    ('tipos_evento', TipoEvento.objects.filter(eliminado=False).order_by('nombre'),
+     ['id', 'nombre', 'color', 'icono']),
+    ('materiales', Material.objects.filter(eliminado=False).order_by('tipo_inventario', 'nombre'),
+     ['id', 'nombre', 'codigo', 'tipo_inventario', 'unidad_medida', 'stock_minimo_alerta']),
+]
+
+# Campos calculados con anotaciones
+ANOTACIONES = {
+    'galpon_nombre': F('galpon__nombre'),
+}
+
+
+def _valor_json(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def construir_datos() -> dict:
+    """Una consulta por fuente, con values() (sin instanciar modelos)."""
+    datos = {}
+    for clave, queryset, campos in FUENTES:
+        anotaciones = {campo: ANOTACIONES[campo] for campo in campos if campo in ANOTACIONES}
+        filas = queryset.annotate(**anotaciones).values(*campos)
+        datos[clave] = [{campo: _valor_json(valor) for campo, valor in fila.items()} for fila in filas]
+    return datos
+
+
+def obtener_datos(version: int) -> dict:
+    clave = f'bootstrap:{version}'
+    datos = cache.get(clave)
+    if datos is None:
+        datos = construir_datos()
+        cache.set(clave, datos, TTL_CACHE_BOOTSTRAP)
+    return datos
+
+
+def perfil_usuario(user) -> dict:
+    """
+    Datos del usuario autenticado, con sus roles y perfil de socio.
+    Con TokenCacheadoAuthentication el perfil y los grupos ya vienen cargados.
+    """
+    perfil_socio = None
+    try:
+        socio = user.perfil_socio
+        perfil_socio = {
+            'rol': socio.rol,
+            'parentesco': socio.parentesco,
+            'activo': socio.activo
+        }
+    except ObjectDoesNotExist:
+        pass
+
+    return {
+        'user_id': user.pk,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_superuser': user.is_superuser,
+        'is_staff': user.is_staff,
+        'roles': [group.name for group in user.groups.all()],
+        'perfil_socio': perfil_socio
+    }
+
+
+def etag_bootstrap(version: int, perfil: dict) -> str:
+    """ETag de la respuesta: versión de los datos compartidos + huella del perfil."""
+    huella = hashlib.sha1(json.dumps(perfil, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return f'"{version}-{huella}"'
+
+
+# ============================================================================
+# INVALIDACIÓN (conectada en CoreConfig.ready)
+# ============================================================================
+
+def _campos_observados(modelo):
+    """Campos cuyo cambio altera el bootstrap: los servidos y los usados para filtrar."""
+    for _, queryset, campos in FUENTES:
+        if queryset.model is modelo:
+            return {campo for campo in campos if campo not in ANOTACIONES} | {'eliminado', 'activo'}
+    return set()
+
+
+def incrementar_version(sender, instance=None, update_fields=None, **kwargs):
+    """
+    Incrementa la versión al confirmar la transacción.
+    Se omite si el save() solo tocó campos que el bootstrap no muestra
+    (p. ej. el stock de un material en cada movimiento).
+    """
+    if update_fields is not None and not set(update_fields) & _campos_observados(sender):
+        return
+    transaction.on_commit(lambda: VersionDatos.incrementar(VERSION_BOOTSTRAP))
+
+
+def modelos_observados():
+    return [queryset.model for _, queryset, _ in FUENTES]
@@ -0,0 +1,41 @@
+from django.apps import AppConfig, apps
+
+
+class CommonConfig(AppConfig):
+    name = 'core.common'
+    label = 'common'
+
+    def ready(self):
+        from .signals import campos_deduplicados, conectar
+
+        for modelo in apps.get_models():
+            if campos_deduplicados(modelo):
+                conectar(modelo)
+
+        self._conectar_cache_autenticacion()
+
+        from django.core import checks
+        from .mixins import verificar_modelos_observados
+        from .throttling import verificar_cache_limites
+        checks.register(verificar_cache_limites, checks.Tags.caches)
+        checks.register(verificar_modelos_observados, checks.Tags.caches)
+
+        from django.db.backends.signals import connection_created
+        from .consultas_lentas import instalar_envoltura
+        connection_created.connect(instalar_envoltura, dispatch_uid='consultas_lentas')
+
+    def _conectar_cache_autenticacion(self):
+        from django.contrib.auth.models import Group, User
+        from django.db.models.signals import m2m_changed, post_delete, post_save
+        from rest_framework.authtoken.models import Token
+        from . import autenticacion
+
+        perfil = User._meta.get_field(autenticacion.RELACION_PERFIL).related_model
+        for senal in (post_save, post_delete):
+            senal.connect(autenticacion.invalidar_por_token, sender=Token, dispatch_uid='auth_cache_token')
+            senal.connect(autenticacion.invalidar_por_usuario, sender=User, dispatch_uid='auth_cache_usuario')
+            senal.connect(autenticacion.invalidar_por_perfil, sender=perfil, dispatch_uid='auth_cache_perfil')
+            senal.connect(autenticacion.invalidar_todo, sender=Group, dispatch_uid='auth_cache_grupo')
+        m2m_changed.connect(
+            autenticacion.invalidar_por_grupos, sender=User.groups.through, dispatch_uid='auth_cache_grupos'
+        )
@@ -0,0 +1,179 @@
+"""
+Autenticación por token con caché en memoria del proceso.
+Guarda por token el usuario, su perfil de socio y sus grupos (LRU con TTL), de modo
+que las peticiones siguientes no consultan authtoken_token, auth_user, el perfil ni los grupos.
+Las señales de CommonConfig.ready() invalidan las entradas del proceso que hace el cambio;
+los demás workers las descartan al vencer AUTENTICACION_CACHE_TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+# Relación inversa de User hacia el perfil de socio
+RELACION_PERFIL = 'perfil_socio'
+
+
+def _modelo_perfil():
+    return User._meta.get_field(RELACION_PERFIL).related_model
+
+
+def _campos(modelo):
+    return [campo.attname for campo in modelo._meta.concrete_fields]
+
+
+class CacheAutenticacion:
+    """LRU acotado con vencimiento: token -> datos planos del usuario, perfil y grupos."""
+
+    def __init__(self, maximo, ttl):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada['vence'] <= time.monotonic():
+                del self._entradas[clave]
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave, entrada):
+        entrada['vence'] = time.monotonic() + self.ttl
+        with self._lock:
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def invalidar_token(self, clave):
+        with self._lock:
+            self._entradas.pop(clave, None)
+
+    def invalidar_usuario(self, usuario_id):
+        with self._lock:
+            for clave in [c for c, e in self._entradas.items() if e['usuario_id'] == usuario_id]:
+                del self._entradas[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+cache_autenticacion = CacheAutenticacion(
+    maximo=getattr(settings, 'AUTENTICACION_CACHE_MAXIMO', 1000),
+    ttl=getattr(settings, 'AUTENTICACION_CACHE_TTL', 60),
+)
+
+
+def _cargar_entrada(clave):
+    """Una consulta para token, usuario y perfil; otra para los grupos."""
+    token = Token.objects.select_related('user', f'user__{RELACION_PERFIL}').get(key=clave)
+    usuario = token.user
+    perfil = getattr(usuario, RELACION_PERFIL, None)
+    campos_usuario = _campos(User)
+    return {
+        'usuario_id': usuario.pk,
+        'token': [getattr(token, campo) for campo in _campos(Token)],
+        'usuario': [getattr(usuario, campo) for campo in campos_usuario],
+        'perfil': [getattr(perfil, campo) for campo in _campos(_modelo_perfil())] if perfil else None,
+        'grupos': list(usuario.groups.values_list('id', 'name')),
+    }
+
+
+def _reconstruir(entrada):
+    """
+    Instancias nuevas en cada petición (nunca compartidas entre peticiones), con el perfil
+    y los grupos ya cargados como si vinieran de select_related/prefetch_related.
+    """
+    db = router.db_for_read(User)
+    usuario = User.from_db(db, _campos(User), entrada['usuario'])
+    token = Token.from_db(db, _campos(Token), entrada['token'])
+    token.user = usuario
+
+    modelo_perfil = _modelo_perfil()
+    perfil = None
+    if entrada['perfil'] is not None:
+        perfil = modelo_perfil.from_db(db, _campos(modelo_perfil), entrada['perfil'])
+        perfil.usuario = usuario
+    User._meta.get_field(RELACION_PERFIL).set_cached_value(usuario, perfil)
+
+    grupos = usuario.groups.get_queryset()
+    grupos._result_cache = [Group.from_db(db, ['id', 'name'], fila) for fila in entrada['grupos']]
+    grupos._prefetch_done = True
+    usuario._prefetched_objects_cache = {'groups': grupos}
+    return usuario, token
+
+
+def autenticar_token(clave):
+    """
+    Usuario y token para la clave, desde la caché del proceso o desde la base de datos.
+
+    Raises:
+        AuthenticationFailed: Si el token no existe o el usuario está inactivo
+    """
+    entrada = cache_autenticacion.obtener(clave)
+    if entrada is None:
+        try:
+            entrada = _cargar_entrada(clave)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed(_('Invalid token.'))
+        cache_autenticacion.guardar(clave, entrada)
+
+    usuario, token = _reconstruir(entrada)
+    if not usuario.is_active:
+        raise AuthenticationFailed(_('User inactive or deleted.'))
+    return usuario, token
+
+
+class TokenCacheadoAuthentication(TokenAuthentication):
+    """TokenAuthentication que resuelve el token desde la caché del proceso."""
+
+    def authenticate_credentials(self, key):
+        return autenticar_token(key)
+
+
+# ============================================================================
+# INVALIDACIÓN (conectada en CommonConfig.ready)
+# ============================================================================
+
+def invalidar_por_token(sender, instance, **kwargs):
+    cache_autenticacion.invalidar_token(instance.key)
+
+
+def invalidar_por_usuario(sender, instance, **kwargs):
+    cache_autenticacion.invalidar_usuario(instance.pk)
+
+
+def invalidar_por_perfil(sender, instance, **kwargs):
+    cache_autenticacion.invalidar_usuario(instance.usuario_id)
+
+
+def invalidar_por_grupos(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        # user.groups.add/remove/clear
+        cache_autenticacion.invalidar_usuario(instance.pk)
+    elif pk_set:
+        # group.user_set.add/remove
+        for usuario_id in pk_set:
+            cache_autenticacion.invalidar_usuario(usuario_id)
+    else:
+        # group.user_set.clear(): no informa los usuarios afectados
+        cache_autenticacion.limpiar()
+
+
+def invalidar_todo(sender, **kwargs):
+    cache_autenticacion.limpiar()
@@ -0,0 +1,95 @@
+"""
+Caché de respuestas de agregados (resumen_mensual, estadisticas) invalidada por escrituras.
+
+Cada modelo observado tiene un contador en VersionDatos ('modelo:<app>.<modelo>') que se
+incrementa al confirmar cualquier save() o delete() (incluido el soft delete, que pasa por
+save()) o cambio en sus ManyToMany. La respuesta se guarda en la caché de Django bajo una
+clave con la acción, los parámetros normalizados, la fecha del día y las versiones de los
+modelos de los que depende: mientras ninguno cambie se sirve lo guardado, sin volver a agrupar
+la tabla. Las versiones están en la base de datos, así que un cambio en un worker invalida la
+caché de todos. Los mismos contadores entran en la clave de las representaciones cacheadas
+(core.common.serializers.RepresentacionCacheadaMixin).
+
+Las escrituras con queryset.update() o bulk_create() no emiten señales: deben llamar a
+invalidar_modelos().
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import VersionDatos
+
+# Modelos conectados con observar_modelos() (lo verifica el check common.E002)
+MODELOS_OBSERVADOS = set()
+
+
+def nombre_version(modelo):
+    return f'modelo:{modelo._meta.label_lower}'
+
+
+def incrementar_version_modelo(sender, **kwargs):
+    nombre = nombre_version(sender)
+    transaction.on_commit(lambda: VersionDatos.incrementar(nombre))
+
+
+def incrementar_version_m2m(sender, instance, action, reverse, model, **kwargs):
+    """Cambios en un ManyToMany del modelo observado (p. ej. los grupos de un usuario)."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        incrementar_version_modelo(model if reverse else type(instance))
+
+
+def observar_modelos(*modelos):
+    """Conecta la invalidación de los modelos y de sus ManyToMany (desde AppConfig.ready)."""
+    for modelo in modelos:
+        MODELOS_OBSERVADOS.add(modelo)
+        uid = f'cache_agregados_{modelo._meta.label_lower}'
+        post_save.connect(incrementar_version_modelo, sender=modelo, dispatch_uid=f'{uid}_save')
+        post_delete.connect(incrementar_version_modelo, sender=modelo, dispatch_uid=f'{uid}_delete')
+        for campo in modelo._meta.many_to_many:
+            m2m_changed.connect(
+                incrementar_version_m2m, sender=campo.remote_field.through, dispatch_uid=f'{uid}_{campo.name}'
+            )
+
+
+def invalidar_modelos(*modelos):
+    """Incrementa las versiones tras escrituras que no emiten señales (queryset.update())."""
+    for modelo in modelos:
+        incrementar_version_modelo(modelo)
+
+
+def clave_agregado(vista, request, kwargs, versiones):
+    """Clave de caché: acción, argumentos de la URL, query params ordenados, día y versiones."""
+    parametros = sorted((nombre, sorted(valores)) for nombre, valores in request.query_params.lists())
+    partes = [sorted(kwargs.items()), parametros, timezone.localdate(), sorted(versiones.items())]
+    huella = hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()
+    return f'agregado:{type(vista).__name__}.{vista.action}:{huella}'
+
+
+def cachear_agregado(*modelos):
+    """
+    Decorador para acciones GET de un ViewSet que calculan agregados sobre `modelos`.
+    Va debajo de @action. Solo se cachean las respuestas 200; los modelos deben estar
+    observados con observar_modelos() en el AppConfig.ready() de su app.
+    """
+    nombres = [nombre_version(modelo) for modelo in modelos]
+
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            clave = clave_agregado(self, request, kwargs, VersionDatos.actuales(nombres))
+            datos = cache.get(clave)
+            if datos is not None:
+                return Response(datos)
+
+            response = metodo(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(clave, response.data, settings.CACHE_AGREGADOS_TTL)
+            return response
+        return envoltura
+    return decorador
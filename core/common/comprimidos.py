@@ -0,0 +1,112 @@
+"""
+Archivos ZIP generados en streaming a partir de archivos del storage.
+El ZIP se escribe sobre un destino no posicionable y cada fragmento se entrega
+al cliente apenas se produce: la memoria no depende del tamaño total.
+Las entradas se guardan sin recomprimir (ZIP_STORED): imágenes y PDF ya vienen comprimidos.
+"""
+import io
+import logging
+import os
+import zipfile
+
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.utils.text import get_valid_filename
+
+logger = logging.getLogger(__name__)
+
+TAMANO_FRAGMENTO_ZIP = 64 * 1024
+
+# Rango de fechas que admite el formato ZIP (fecha MS-DOS)
+FECHA_ZIP_MINIMA = (1980, 1, 1, 0, 0, 0)
+FECHA_ZIP_MAXIMA = (2107, 12, 31, 23, 59, 58)
+
+
+class _DestinoStreaming(io.RawIOBase):
+    """Destino de escritura que acumula los bytes hasta que el generador los entrega."""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def nombre_unico(nombre, usados):
+    """
+    Nombre seguro para una entrada del ZIP, sin repetir los ya usados.
+    Ej: 'Fundación.jpg' dos veces -> 'Fundacion.jpg', 'Fundacion (2).jpg'
+    """
+    base, extension = os.path.splitext(get_valid_filename(nombre) or 'archivo')
+    candidato, numero = f'{base}{extension}', 2
+    while candidato.lower() in usados:
+        candidato = f'{base} ({numero}){extension}'
+        numero += 1
+    usados.add(candidato.lower())
+    return candidato
+
+
+def fecha_zip(fecha):
+    """date_time de la entrada: la fecha dada, acotada al rango del formato ZIP."""
+    if not fecha:
+        return FECHA_ZIP_MINIMA
+    return min(max(tuple(fecha.timetuple()[:6]), FECHA_ZIP_MINIMA), FECHA_ZIP_MAXIMA)
+
+
+def generar_zip(entradas):
+    """
+    Genera el ZIP por fragmentos.
+
+    Args:
+        entradas: Iterable de (ruta en el storage, nombre dentro del ZIP, datetime o None)
+
+    Yields:
+        bytes: Fragmentos consecutivos del archivo ZIP
+    """
+    destino = _DestinoStreaming()
+    usados = set()
+    with zipfile.ZipFile(destino, mode='w', compression=zipfile.ZIP_STORED) as archivo_zip:
+        for ruta, nombre, fecha in entradas:
+            try:
+                tamano = default_storage.size(ruta)
+                origen = default_storage.open(ruta, 'rb')
+            except (FileNotFoundError, OSError):
+                logger.warning("Archivo %s no encontrado, se omite del ZIP", ruta)
+                continue
+
+            info = zipfile.ZipInfo(nombre_unico(nombre, usados), date_time=fecha_zip(fecha))
+            info.compress_type = zipfile.ZIP_STORED
+            # Con el tamaño conocido zipfile decide si la entrada necesita ZIP64
+            info.file_size = tamano
+            with origen, archivo_zip.open(info, mode='w') as entrada:
+                for fragmento in iter(lambda: origen.read(TAMANO_FRAGMENTO_ZIP), b''):
+                    entrada.write(fragmento)
+                    yield destino.vaciar()
+            yield destino.vaciar()
+    # Directorio central
+    yield destino.vaciar()
+
+
+def respuesta_zip(entradas, nombre_descarga):
+    """
+    Respuesta que empieza a enviar el ZIP de inmediato, sin armarlo antes en memoria ni en disco.
+    nginx la vuelca a su archivo temporal a velocidad de disco y libera al worker de gunicorn
+    sin esperar a que el cliente termine la descarga.
+    """
+    response = StreamingHttpResponse(
+        (fragmento for fragmento in generar_zip(entradas) if fragmento),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = content_disposition_header(True, nombre_descarga)
+    response['Cache-Control'] = 'private, no-store'
+    return response
@@ -0,0 +1,143 @@
+"""
+Registro de consultas lentas con su origen y, muestreado, el plan de EXPLAIN (ANALYZE, BUFFERS).
+
+Con CONSULTAS_LENTAS_UMBRAL_MS mayor a 0, CommonConfig.ready() instala envoltura_consulta en
+cada conexión que se abre (señal connection_created). Las consultas que superan el umbral se
+escriben como una línea JSON en el logger de este módulo (logs/consultas_lentas.log), con la
+vista y acción de DRF que las originó (o el comando de manage.py). Una fracción
+(CONSULTAS_LENTAS_EXPLAIN_MUESTREO) de los SELECT lentos en PostgreSQL se vuelve a ejecutar con
+EXPLAIN (ANALYZE, BUFFERS) para adjuntar el plan real.
+
+El comando `consultas_lentas` resume el archivo por firma de SQL.
+"""
+import json
+import logging
+import os
+import random
+import sys
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_peticion_actual = ContextVar('peticion_consultas_lentas', default=None)
+
+# Sus planes incluirían claves de sesión o tokens con sus valores
+TABLAS_SIN_PLAN = ('authtoken_token', 'django_session')
+SAVEPOINT = 'consultas_lentas_explain'
+
+
+def umbral_ms():
+    return getattr(settings, 'CONSULTAS_LENTAS_UMBRAL_MS', 0)
+
+
+def origen_actual():
+    """Vista y acción de la petición en curso, o el comando de manage.py que se está ejecutando."""
+    request = _peticion_actual.get()
+    if request is None:
+        return {'proceso': ' '.join(os.path.basename(argumento) for argumento in sys.argv[:2])}
+
+    origen = {'metodo': request.method, 'ruta': request.path}
+    match = getattr(request, 'resolver_match', None)
+    if match is not None:
+        clase = getattr(match.func, 'cls', None)
+        if clase is not None:
+            origen['vista'] = clase.__name__
+            acciones = getattr(match.func, 'actions', None) or {}
+            if request.method.lower() in acciones:
+                origen['accion'] = acciones[request.method.lower()]
+        else:
+            origen['vista'] = match.view_name or match._func_path
+    return origen
+
+
+def _admite_plan(conexion, sql, many):
+    """Solo SELECT de lectura en PostgreSQL: EXPLAIN ANALYZE ejecuta la consulta."""
+    if many or conexion.vendor != 'postgresql':
+        return False
+    texto = sql.lstrip().upper()
+    if not texto.startswith(('SELECT', 'WITH')):
+        return False
+    if any(bloqueo in texto for bloqueo in (' FOR UPDATE', ' FOR SHARE', ' FOR NO KEY UPDATE')):
+        return False
+    return not any(tabla in sql for tabla in TABLAS_SIN_PLAN)
+
+
+def explicar(conexion, sql, params):
+    """
+    Plan de EXPLAIN (ANALYZE, BUFFERS) en texto, con un cursor del driver para no pasar
+    de nuevo por las envolturas. Dentro de una transacción usa un savepoint para que un
+    error en el EXPLAIN no la deje abortada.
+    """
+    en_transaccion = conexion.in_atomic_block
+    with conexion.connection.cursor() as cursor:
+        if en_transaccion:
+            cursor.execute(f'SAVEPOINT {SAVEPOINT}')
+        try:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            plan = '\n'.join(fila[0] for fila in cursor.fetchall())
+        except Exception as e:
+            if en_transaccion:
+                cursor.execute(f'ROLLBACK TO SAVEPOINT {SAVEPOINT}')
+            return f'No se pudo obtener el plan: {e}'
+        if en_transaccion:
+            cursor.execute(f'RELEASE SAVEPOINT {SAVEPOINT}')
+    return plan
+
+
+def registrar(conexion, sql, params, many, milisegundos):
+    registro = {
+        'fecha': timezone.now().isoformat(),
+        'ms': round(milisegundos, 1),
+        'base': conexion.alias,
+        'sql': sql,
+        **origen_actual(),
+    }
+    if many:
+        registro['many'] = True
+    muestreo = getattr(settings, 'CONSULTAS_LENTAS_EXPLAIN_MUESTREO', 0)
+    if muestreo > 0 and random.random() < muestreo and _admite_plan(conexion, sql, many):
+        registro['plan'] = explicar(conexion, sql, params)
+    logger.warning(json.dumps(registro, ensure_ascii=False, default=str))
+
+
+def envoltura_consulta(execute, sql, params, many, context):
+    """Envoltura persistente de connection.execute_wrappers: registra las consultas sobre el umbral."""
+    inicio = time.perf_counter()
+    resultado = execute(sql, params, many, context)
+    milisegundos = (time.perf_counter() - inicio) * 1000
+    if milisegundos >= umbral_ms():
+        try:
+            registrar(context['connection'], sql, params, many, milisegundos)
+        except Exception:
+            logger.exception('No se pudo registrar la consulta lenta')
+    return resultado
+
+
+def instalar_envoltura(sender, connection, **kwargs):
+    """
+    Receptor de connection_created. execute_wrappers sobrevive a las reconexiones, así que
+    se instala una sola vez por conexión; va primero para no interferir con las envolturas
+    temporales (connection.execute_wrapper() quita la última de la lista al salir).
+    """
+    if umbral_ms() > 0 and envoltura_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, envoltura_consulta)
+
+
+class ConsultasLentasMiddleware:
+    """Deja la petición en curso disponible para origen_actual()."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if umbral_ms() <= 0:
+            return self.get_response(request)
+        token = _peticion_actual.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _peticion_actual.reset(token)
@@ -0,0 +1,78 @@
+"""
+Generación de derivados de imágenes (miniatura, mediana y original en WebP).
+Los derivados se guardan sin EXIF y con la orientación ya corregida.
+"""
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Lado mayor en píxeles de cada derivado (None = tamaño original)
+TAMANOS_DERIVADOS = {
+    'original': None,
+    'mediana': 1280,
+    'miniatura': 320,
+}
+
+CALIDAD_WEBP = 80
+DIRECTORIO_DERIVADOS = 'derivados'
+
+
+def ruta_derivado(nombre_fuente, tamano):
+    """
+    Nombre del derivado dentro del storage, a partir del nombre del archivo fuente.
+    Ej: galeria/2026/01/foto.jpg -> derivados/galeria/2026/01/foto/miniatura.webp
+    """
+    base, _ = os.path.splitext(nombre_fuente)
+    return f'{DIRECTORIO_DERIVADOS}/{base}/{tamano}.webp'
+
+
+def generar_derivados(archivo, forzar=False):
+    """
+    Genera los derivados WebP de una imagen y los guarda en default_storage.
+    Los tamaños se calculan del mayor al menor para reutilizar el reescalado anterior.
+    Si los derivados de esa fuente ya existen (p. ej. un blob compartido) se reutilizan.
+
+    Args:
+        archivo: FieldFile (ImageField) con la imagen fuente
+        forzar: Regenerar aunque los derivados ya existan
+
+    Returns:
+        dict: {'fuente': nombre, 'original': nombre, 'mediana': nombre, 'miniatura': nombre},
+            o dict vacío si el archivo no es una imagen válida o excede Image.MAX_IMAGE_PIXELS
+    """
+    storage = default_storage
+    existentes = {tamano: ruta_derivado(archivo.name, tamano) for tamano in TAMANOS_DERIVADOS}
+    if not forzar and all(storage.exists(nombre) for nombre in existentes.values()):
+        return {'fuente': archivo.name, **existentes}
+
+    try:
+        with archivo.storage.open(archivo.name, 'rb') as f:
+            imagen = Image.open(f)
+            icc_profile = imagen.info.get('icc_profile')
+            imagen = ImageOps.exif_transpose(imagen)
+            imagen = imagen.convert('RGBA' if imagen.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        logger.warning(f'No se pudieron generar derivados de {archivo.name}: {e}')
+        return {}
+
+    derivados = {'fuente': archivo.name}
+    for tamano, lado in TAMANOS_DERIVADOS.items():
+        if lado is not None:
+            imagen.thumbnail((lado, lado), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        # Sin parámetro exif: el WebP resultante no lleva metadatos EXIF (GPS, cámara, etc.)
+        imagen.save(buffer, 'WEBP', quality=CALIDAD_WEBP, method=4, icc_profile=icc_profile)
+
+        nombre = existentes[tamano]
+        if storage.exists(nombre):
+            storage.delete(nombre)
+        derivados[tamano] = storage.save(nombre, ContentFile(buffer.getvalue()))
+
+    return derivados
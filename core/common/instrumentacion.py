@@ -0,0 +1,158 @@
+"""
+Instrumentación por petición: consultas SQL, tiempo de base de datos, consultas repetidas
+(firmas de N+1), serialización y renderizado.
+
+InstrumentacionMiddleware mide una fracción de las peticiones (INSTRUMENTACION_MUESTREO,
+de 0 a 1), responde con un header Server-Timing y escribe una línea JSON por petición en el
+log. Las peticiones no muestreadas no pasan por ninguna envoltura.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_medicion_actual = ContextVar('medicion_actual', default=None)
+
+# (%s, %s, %s) -> (%s...) para que un IN de distinto largo tenga la misma firma
+_LISTA_PARAMETROS = re.compile(r'\((?:%s, )+%s\)')
+_NUMEROS = re.compile(r'\b\d+\b')
+
+CONSULTAS_REPETIDAS_MAXIMO = 5
+
+
+def firma_consulta(sql):
+    """SQL normalizado: misma firma para la misma consulta con distintos parámetros."""
+    return _NUMEROS.sub('N', _LISTA_PARAMETROS.sub('(%s...)', sql))
+
+
+class Medicion:
+    """Acumula las métricas de una petición."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.segundos_db = 0.0
+        self.firmas = Counter()
+        self.fases = {}
+        self.contadores = Counter()
+
+    def envoltura_sql(self, execute, sql, params, many, context):
+        """Envoltura para connection.execute_wrapper()."""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos_db += time.perf_counter() - inicio
+            self.consultas += 1
+            self.firmas[firma_consulta(sql)] += 1
+
+    def sumar_fase(self, nombre, segundos):
+        self.fases[nombre] = self.fases.get(nombre, 0.0) + segundos
+
+    def contar(self, nombre, cantidad=1):
+        self.contadores[nombre] += cantidad
+
+    def repetidas(self):
+        """Consultas ejecutadas más de una vez, de la más repetida a la menos."""
+        return [
+            {'veces': veces, 'sql': firma[:200]}
+            for firma, veces in self.firmas.most_common(CONSULTAS_REPETIDAS_MAXIMO)
+            if veces > 1
+        ]
+
+    def resumen(self):
+        """Tiempos en milisegundos y contadores."""
+        datos = {
+            'total_ms': round((time.perf_counter() - self.inicio) * 1000, 1),
+            'db_ms': round(self.segundos_db * 1000, 1),
+            'consultas': self.consultas,
+        }
+        for nombre, segundos in self.fases.items():
+            datos[f'{nombre}_ms'] = round(segundos * 1000, 1)
+        datos.update(self.contadores)
+        return datos
+
+
+def medicion_actual():
+    """Medición de la petición en curso, o None si no se está midiendo."""
+    return _medicion_actual.get()
+
+
+@contextmanager
+def medir_fase(nombre):
+    """Suma el tiempo del bloque a la fase `nombre` de la medición en curso (si la hay)."""
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion.sumar_fase(nombre, time.perf_counter() - inicio)
+
+
+def server_timing(resumen):
+    """Valor del header Server-Timing a partir de Medicion.resumen()."""
+    partes = [f'db;dur={resumen["db_ms"]};desc="{resumen["consultas"]} consultas"']
+    for nombre, valor in resumen.items():
+        if nombre.endswith('_ms') and nombre not in ('db_ms', 'total_ms'):
+            partes.append(f'{nombre[:-3]};dur={valor}')
+    partes.append(f'total;dur={resumen["total_ms"]}')
+    return ', '.join(partes)
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide las peticiones muestreadas. Debe ir primero en MIDDLEWARE para que el
+    total incluya al resto de los middlewares.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        muestreo = getattr(settings, 'INSTRUMENTACION_MUESTREO', 0)
+        if muestreo <= 0 or random.random() >= muestreo:
+            return self.get_response(request)
+
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        try:
+            with ExitStack() as envolturas:
+                for conexion in connections.all(initialized_only=False):
+                    envolturas.enter_context(conexion.execute_wrapper(medicion.envoltura_sql))
+                response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+
+        resumen = medicion.resumen()
+        response['Server-Timing'] = server_timing(resumen)
+        logger.info(json.dumps({
+            'metodo': request.method,
+            'ruta': request.path,
+            'estado': response.status_code,
+            **resumen,
+            'repetidas': medicion.repetidas(),
+        }, ensure_ascii=False))
+        return response
+
+    def process_template_response(self, request, response):
+        """Las respuestas de DRF se renderizan después de la vista: se mide el renderizado."""
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return response
+
+        inicio = time.perf_counter()
+        response.add_post_render_callback(
+            lambda rendered: medicion.sumar_fase('render', time.perf_counter() - inicio)
+        )
+        return response
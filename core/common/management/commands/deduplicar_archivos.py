@@ -0,0 +1,123 @@
+"""
+Migra los archivos subidos antes del almacenamiento deduplicado a blobs
+y recalcula las referencias de cada blob.
+Ejecutar: python manage.py deduplicar_archivos [--simular] [--conservar-originales]
+"""
+from collections import Counter
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.common.cache_agregados import invalidar_modelos
+from core.common.models import Blob
+from core.common.signals import campos_deduplicados
+from core.common.storage import DIRECTORIO_BLOBS
+
+
+class Command(BaseCommand):
+    help = 'Mueve los archivos existentes al almacenamiento deduplicado y recuenta referencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Solo informar qué se migraría, sin modificar archivos ni registros'
+        )
+        parser.add_argument(
+            '--conservar-originales',
+            action='store_true',
+            help='No borrar los archivos originales después de migrarlos'
+        )
+
+    def handle(self, *args, **options):
+        modelos = [(modelo, campos_deduplicados(modelo)) for modelo in apps.get_models()]
+        modelos = [(modelo, campos) for modelo, campos in modelos if campos]
+
+        self.blobs_vistos = set(Blob.objects.values_list('nombre', flat=True))
+        migrados = ahorro = 0
+        for modelo, campos in modelos:
+            for campo in campos:
+                m, a = self._migrar_campo(modelo, campo, options)
+                migrados += m
+                ahorro += a
+
+        self.stdout.write(
+            f"Archivos migrados: {migrados} "
+            f"(duplicados evitados: {ahorro / 1024 / 1024:.1f} MB)"
+        )
+        if options['simular']:
+            return
+
+        self._recontar_referencias(modelos)
+        self.stdout.write(self.style.SUCCESS("Referencias recalculadas"))
+        if migrados:
+            self.stdout.write(
+                "Ejecute generar_derivados para crear los derivados de las imágenes migradas"
+            )
+
+    def _migrar_campo(self, modelo, campo, options):
+        """Guarda cada archivo legado en el storage deduplicado y actualiza la fila."""
+        storage = campo.storage
+        pendientes = modelo._base_manager.exclude(**{campo.name: ''}).exclude(
+            **{f'{campo.name}__isnull': True}
+        ).exclude(**{f'{campo.name}__startswith': f'{DIRECTORIO_BLOBS}/'})
+
+        migrados = ahorro = 0
+        nombres = {}
+        for pk, nombre in pendientes.values_list('pk', campo.attname).iterator():
+            if not storage.exists(nombre):
+                self.stdout.write(self.style.WARNING(
+                    f"  {modelo._meta.label}#{pk}: no existe {nombre}"
+                ))
+                continue
+            if options['simular']:
+                self.stdout.write(f"  {modelo._meta.label}#{pk}: {nombre}")
+                migrados += 1
+                continue
+
+            if nombre not in nombres:
+                with storage.open(nombre, 'rb') as f:
+                    nombres[nombre] = storage.save(nombre, f)
+                if nombres[nombre] in self.blobs_vistos:
+                    ahorro += storage.size(nombre)
+                self.blobs_vistos.add(nombres[nombre])
+                if not options['conservar_originales']:
+                    storage.delete(nombre)
+
+            # update() evita las señales: las referencias se recuentan al final
+            modelo._base_manager.filter(pk=pk).update(**{campo.attname: nombres[nombre]})
+            migrados += 1
+        if migrados and not options['simular']:
+            invalidar_modelos(modelo)
+        return migrados, ahorro
+
+    @transaction.atomic
+    def _recontar_referencias(self, modelos):
+        """Recalcula Blob.referencias contando las filas (incluidas las eliminadas) por blob."""
+        conteo = Counter()
+        for modelo, campos in modelos:
+            for campo in campos:
+                conteo.update(
+                    modelo._base_manager.filter(
+                        **{f'{campo.attname}__startswith': f'{DIRECTORIO_BLOBS}/'}
+                    ).values_list(campo.attname, flat=True)
+                )
+
+        blobs = Blob.objects.select_for_update()
+        for blob in blobs:
+            referencias = conteo.pop(blob.nombre, 0)
+            if blob.referencias != referencias:
+                self.stdout.write(f"  {blob.nombre}: {blob.referencias} -> {referencias}")
+                Blob.objects.filter(pk=blob.pk).update(referencias=referencias)
+
+        # Archivos referenciados sin fila en Blob (p. ej. transacción revertida)
+        for nombre, referencias in conteo.items():
+            storage = modelos[0][1][0].storage
+            if not storage.exists(nombre):
+                self.stdout.write(self.style.WARNING(f"  Blob inexistente: {nombre}"))
+                continue
+            Blob.objects.create(
+                digest=Blob.digest_de(nombre), nombre=nombre,
+                tamano=storage.size(nombre), referencias=referencias
+            )
+            self.stdout.write(f"  {nombre}: registrado con {referencias} referencias")
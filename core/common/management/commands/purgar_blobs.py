@@ -0,0 +1,84 @@
+"""
+Borra del disco los blobs sin referencias y los archivos huérfanos del
+almacenamiento deduplicado. Pensado para ejecutarse periódicamente (cron).
+Ejecutar: python manage.py purgar_blobs [--gracia 24] [--simular]
+"""
+import os
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from core.common.imagenes import TAMANOS_DERIVADOS, ruta_derivado
+from core.common.models import Blob
+from core.common.storage import almacenamiento_deduplicado, DIRECTORIO_BLOBS
+
+
+class Command(BaseCommand):
+    help = 'Purga los blobs sin referencias y archivos huérfanos pasado un periodo de gracia'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--gracia',
+            type=int,
+            default=24,
+            help='Horas sin referencias antes de borrar un blob (default: 24)'
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Solo informar qué se borraría'
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(hours=options['gracia'])
+        storage = almacenamiento_deduplicado
+
+        liberados = 0
+        with transaction.atomic():
+            # skip_locked: no esperar a blobs que otra transacción está referenciando
+            blobs = list(Blob.objects.select_for_update(skip_locked=True).filter(
+                referencias=0, actualizado_en__lt=limite
+            ))
+            for blob in blobs:
+                self.stdout.write(f"  {blob.nombre} ({blob.tamano} bytes)")
+                liberados += blob.tamano
+            if not options['simular']:
+                # Se borra con los locks tomados: una subida concurrente del mismo
+                # contenido espera al commit y vuelve a escribir el blob (ver _save)
+                Blob.objects.filter(pk__in=[blob.pk for blob in blobs]).delete()
+                self._borrar_archivos(storage, [blob.nombre for blob in blobs])
+
+        huerfanos = self._archivos_huerfanos(storage, limite.timestamp())
+        for nombre in huerfanos:
+            self.stdout.write(f"  huérfano: {nombre}")
+            liberados += storage.size(nombre)
+        if not options['simular']:
+            self._borrar_archivos(storage, huerfanos)
+
+        accion = 'Se liberarían' if options['simular'] else 'Liberados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {len(blobs)} blobs y {len(huerfanos)} archivos huérfanos "
+            f"({liberados / 1024 / 1024:.1f} MB)"
+        ))
+
+    def _archivos_huerfanos(self, storage, limite):
+        """Archivos bajo blobs/ sin fila en Blob y más antiguos que el límite (incluye temporales)."""
+        raiz = storage.path(DIRECTORIO_BLOBS)
+        registrados = set(Blob.objects.values_list('nombre', flat=True))
+        huerfanos = []
+        for directorio, _, archivos in os.walk(raiz):
+            for archivo in archivos:
+                ruta = os.path.join(directorio, archivo)
+                nombre = os.path.relpath(ruta, storage.location).replace(os.sep, '/')
+                if nombre not in registrados and os.path.getmtime(ruta) < limite:
+                    huerfanos.append(nombre)
+        return huerfanos
+
+    def _borrar_archivos(self, storage, nombres):
+        """Borra los blobs y sus derivados de imagen."""
+        for nombre in nombres:
+            storage.delete(nombre)
+            for tamano in TAMANOS_DERIVADOS:
+                default_storage.delete(ruta_derivado(nombre, tamano))
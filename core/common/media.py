@@ -0,0 +1,112 @@
+"""
+Entrega de archivos de MEDIA_ROOT autorizada por Django y enviada por nginx.
+Con MEDIA_X_ACCEL_REDIRECT activo Django solo responde el header X-Accel-Redirect
+y nginx transfiere el archivo (incluidas peticiones Range) desde una location interna.
+
+Para <img src> y enlaces de descarga, donde no se puede enviar el header Authorization,
+se usan URLs firmadas (?firma=) ligadas al usuario y a la ruta, que vencen a los
+MEDIA_FIRMA_TTL segundos. Así el token de la API no queda en los logs de acceso.
+"""
+import mimetypes
+import posixpath
+from urllib.parse import quote, urlencode
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import content_disposition_header
+from rest_framework.authentication import get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .autenticacion import autenticar_token
+
+# Archivos cuyo nombre depende solo del contenido: nunca cambian
+PREFIJOS_INMUTABLES = ('blobs/', 'derivados/blobs/')
+
+
+def normalizar_ruta(ruta):
+    """
+    Normaliza la ruta pedida relativa a MEDIA_ROOT.
+
+    Raises:
+        Http404: Si la ruta intenta salir de MEDIA_ROOT o apunta a temporales
+    """
+    ruta = posixpath.normpath(ruta or '')
+    if (
+        ruta in ('', '.', '..') or ruta.startswith(('/', '../')) or '\x00' in ruta
+        or ruta.startswith('blobs/tmp/')
+    ):
+        raise Http404
+    return ruta
+
+
+def _firmador(ruta):
+    return signing.TimestampSigner(salt=f'core.common.media:{ruta}')
+
+
+def url_firmada(usuario, ruta):
+    """URL relativa de `ruta` que autoriza a `usuario` durante MEDIA_FIRMA_TTL segundos."""
+    firma = _firmador(ruta).sign(str(usuario.pk))
+    return f"{settings.MEDIA_URL}{quote(ruta)}?{urlencode({'firma': firma})}"
+
+
+def usuario_de_firma(ruta, firma):
+    """Usuario activo de una firma válida y vigente para `ruta`, o None."""
+    try:
+        usuario_id = _firmador(ruta).unsign(firma, max_age=settings.MEDIA_FIRMA_TTL)
+    except signing.BadSignature:
+        return None
+    return User.objects.filter(pk=usuario_id, is_active=True).first()
+
+
+def usuario_de_peticion(request, ruta):
+    """
+    Usuario autenticado por sesión, header 'Authorization: Token <key>', URL firmada
+    (?firma=) o parámetro ?token= (obsoleto, para clientes que aún no piden URLs firmadas).
+    Retorna None si no hay credenciales válidas.
+    """
+    if request.user.is_authenticated:
+        return request.user
+
+    partes = get_authorization_header(request).split()
+    if len(partes) == 2 and partes[0].lower() == b'token':
+        clave = partes[1].decode(errors='ignore')
+    elif request.GET.get('firma'):
+        return usuario_de_firma(ruta, request.GET['firma'])
+    else:
+        clave = request.GET.get('token')
+    if not clave:
+        return None
+
+    try:
+        usuario, _ = autenticar_token(clave)
+    except AuthenticationFailed:
+        return None
+    return usuario
+
+
+def respuesta_archivo(ruta, nombre_descarga=None):
+    """
+    Respuesta que entrega el archivo `ruta` (relativo a MEDIA_ROOT).
+    En producción delega la transferencia a nginx; en desarrollo lo envía Django.
+    """
+    content_type, _ = mimetypes.guess_type(ruta)
+    content_type = content_type or 'application/octet-stream'
+
+    if settings.MEDIA_X_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_X_ACCEL_PREFIX + quote(ruta)
+    else:
+        if not default_storage.exists(ruta):
+            raise Http404
+        response = FileResponse(default_storage.open(ruta, 'rb'), content_type=content_type)
+
+    if nombre_descarga:
+        response['Content-Disposition'] = content_disposition_header(True, nombre_descarga)
+    if ruta.startswith(PREFIJOS_INMUTABLES):
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'private, max-age=3600'
+    return response
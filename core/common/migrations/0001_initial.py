@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-16 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado_en', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('nombre', models.CharField(max_length=255, unique=True)),
+                ('tamano', models.PositiveBigIntegerField(help_text='Tamaño en bytes')),
+                ('referencias', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+            options={
+                'verbose_name': 'Blob',
+                'verbose_name_plural': 'Blobs',
+                'ordering': ['-creado_en'],
+                'indexes': [models.Index(fields=['referencias', 'actualizado_en'], name='common_blob_referen_b5a252_idx')],
+            },
+        ),
+    ]
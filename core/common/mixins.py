@@ -1,8 +1,19 @@
 """
 Mixins para ViewSets que optimizan queries y proporcionan funcionalidad común.
 """
+import hashlib
+
 from rest_framework.response import Response
-from django.db.models import Q
+from django.core import checks
+from django.db.models import Q, Max, Count
+from django.urls import get_resolver
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache_agregados import MODELOS_OBSERVADOS, nombre_version
+from .instrumentacion import medir_fase
+from .models import VersionDatos
 
 
 class OptimizedQuerySetMixin:
@@ -17,6 +28,31 @@ class OptimizedQuerySetMixin:
         """
         return super().get_queryset()
 
+    def filter_queryset(self, queryset):
+        """
+        Aplica los filtros y ajusta las relaciones y anotaciones a los campos
+        pedidos con ?fields= / ?expand= (ver CamposDinamicosMixin).
+        """
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'preparar_queryset'):
+            queryset = serializer_class.preparar_queryset(queryset, self.request)
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        """
+        Con serializers de listado sobre .values() (ver ValoresSerializerMixin) la página
+        se lee como filas, incluyendo las claves de la paginación por keyset.
+        """
+        if self.paginator is not None:
+            serializer = self.get_serializer()
+            if hasattr(serializer, 'queryset_valores'):
+                extras = [campo.lstrip('-') for campo in getattr(self, 'orden_keyset', ())]
+                valores = serializer.queryset_valores(queryset, extras)
+                if valores is not None:
+                    queryset = valores
+        return super().paginate_queryset(queryset)
+
 
 class FilterByDateMixin:
     """
@@ -55,3 +91,162 @@ class SoftDeleteMixin:
             queryset = queryset.filter(eliminado=False)
         
         return queryset
+
+
+class ConditionalGetMixin:
+    """
+    Mixin que responde GET condicionales (If-None-Match / If-Modified-Since) en list y retrieve.
+    Los validadores se calculan antes de serializar. En el listado, el ETag sale de la URL
+    completa (filtros y página), el usuario y los contadores de VersionDatos de los modelos
+    mostrados: una consulta, sin recorrer el queryset filtrado. En el detalle, del actualizado_en
+    del objeto y de sus relaciones_validador, más los contadores de dependencias_validador.
+    El ETag incluye además el serializer y la fecha del día, porque algunos campos calculados
+    dependen de hoy (p. ej. edad_dias).
+
+    `relaciones_validador` nombra relaciones inversas cuyos registros también cambian la
+    representación (conteos, totales o listas anidadas).
+
+    `dependencias_validador` nombra rutas de lookup hacia los datos mostrados a través de
+    claves foráneas ('categoria', 'lote__galpon', 'proveedor_rel__gastos').
+
+    Todos los modelos alcanzados deben estar observados con cache_agregados.observar_modelos()
+    (lo verifica el check common.E002); las escrituras con queryset.update() deben llamar a
+    cache_agregados.invalidar_modelos().
+    """
+    relaciones_validador = ()
+    dependencias_validador = ()
+
+    @staticmethod
+    def _tiene_actualizado_en(modelo):
+        return any(campo.name == 'actualizado_en' for campo in modelo._meta.concrete_fields)
+
+    def _usa_validadores(self):
+        return self._tiene_actualizado_en(self.get_queryset().model)
+
+    @classmethod
+    def modelos_dependencias(cls, modelo):
+        """Modelos recorridos por las rutas de dependencias_validador."""
+        modelos = set()
+        for ruta in cls.dependencias_validador:
+            actual = modelo
+            for nombre in ruta.split('__'):
+                actual = actual._meta.get_field(nombre).related_model
+                modelos.add(actual)
+        return modelos
+
+    @classmethod
+    def modelos_validador(cls, modelo):
+        """El modelo, los de relaciones_validador y los de dependencias_validador."""
+        modelos = {modelo} | cls.modelos_dependencias(modelo)
+        for nombre in cls.relaciones_validador:
+            modelos.add(modelo._meta.get_field(nombre).related_model)
+        return modelos
+
+    @staticmethod
+    def _versiones(modelos):
+        """Contadores de VersionDatos de los modelos, en una consulta."""
+        if not modelos:
+            return []
+        return sorted(VersionDatos.actuales([nombre_version(modelo) for modelo in modelos]).items())
+
+    def _resumen_relaciones(self, pk):
+        """MAX(actualizado_en) y COUNT(*) de cada relación inversa del objeto, una consulta por relación."""
+        modelo = self.get_queryset().model
+        resumen = []
+        for nombre in self.relaciones_validador:
+            relacion = modelo._meta.get_field(nombre)
+            resumen.append(relacion.related_model._base_manager.filter(
+                **{relacion.field.name: pk}
+            ).aggregate(ultimo=Max('actualizado_en'), total=Count('pk')))
+        return resumen
+
+    def _respuesta_condicional(self, request, partes, ultimo):
+        """
+        ETag fuerte a partir de `partes` y Last-Modified desde `ultimo` (si lo hay).
+        Retorna (respuesta 304 o None, headers a agregar a la respuesta completa).
+        """
+        partes = [
+            self.get_serializer_class().__name__, request.get_full_path(), request.user.pk, timezone.localdate()
+        ] + partes
+        etag = '"%s"' % hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()[:32]
+        ultima_modificacion = int(ultimo.timestamp()) if ultimo else None
+
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if ultima_modificacion is not None:
+            headers['Last-Modified'] = http_date(ultima_modificacion)
+
+        no_modificado = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+        if no_modificado is not None:
+            for header, valor in headers.items():
+                no_modificado[header] = valor
+        return no_modificado, headers
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self._usa_validadores():
+            return super().retrieve(request, *args, **kwargs)
+
+        instance = self.get_object()
+        relaciones = self._resumen_relaciones(instance.pk)
+        versiones = self._versiones(self.modelos_dependencias(type(instance)))
+        ultimo = max([instance.actualizado_en] + [r['ultimo'] for r in relaciones if r['ultimo']])
+        no_modificado, headers = self._respuesta_condicional(
+            request, [instance.pk, instance.actualizado_en, relaciones, versiones], ultimo
+        )
+        if no_modificado is not None:
+            return no_modificado
+
+        with medir_fase('serializacion'):
+            datos = self.get_serializer(instance).data
+        return Response(datos, headers=headers)
+
+    def list(self, request, *args, **kwargs):
+        if not self._usa_validadores():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        versiones = self._versiones(self.modelos_validador(queryset.model))
+        no_modificado, headers = self._respuesta_condicional(request, [versiones], None)
+        if no_modificado is not None:
+            return no_modificado
+
+        page = self.paginate_queryset(queryset)
+        with medir_fase('serializacion'):
+            datos = self.get_serializer(page if page is not None else queryset, many=True).data
+        if page is not None:
+            response = self.get_paginated_response(datos)
+        else:
+            response = Response(datos)
+        for header, valor in headers.items():
+            response[header] = valor
+        return response
+
+
+def _subclases(clase):
+    for subclase in clase.__subclasses__():
+        yield subclase
+        yield from _subclases(subclase)
+
+
+def verificar_modelos_observados(app_configs, **kwargs):
+    """
+    Check de Django (registrado en CommonConfig.ready): los ETag de ConditionalGetMixin
+    solo cambian con las versiones de modelos observados con observar_modelos().
+    """
+    get_resolver().url_patterns  # importa las vistas
+    errores = []
+    for vista in _subclases(ConditionalGetMixin):
+        queryset = getattr(vista, 'queryset', None)
+        if queryset is None or not vista._tiene_actualizado_en(queryset.model):
+            continue
+        faltantes = sorted(
+            modelo._meta.label for modelo in vista.modelos_validador(queryset.model)
+            if modelo not in MODELOS_OBSERVADOS
+        )
+        if faltantes:
+            errores.append(checks.Error(
+                f"{vista.__name__} depende de modelos no observados: {', '.join(faltantes)}",
+                hint="Agregarlos a observar_modelos() en el AppConfig.ready() de su app.",
+                obj=vista,
+                id='common.E002',
+            ))
+    return errores
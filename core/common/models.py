@@ -1,7 +1,10 @@
 """
 Modelos base compartidos para todos los módulos.
 """
+import os
+
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 
 
@@ -57,3 +60,141 @@ class BaseModel(TimestampedModel, SoftDeleteModel):
     """
     class Meta:
         abstract = True
+
+
+class Blob(TimestampedModel):
+    """
+    Archivo almacenado una sola vez por contenido (sha256) y compartido entre registros.
+    referencias cuenta las filas que apuntan al blob, incluidas las eliminadas
+    lógicamente (pueden restaurarse). Un blob sin referencias se borra del disco
+    recién cuando lo recoge purgar_blobs, pasado un periodo de gracia.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    nombre = models.CharField(max_length=255, unique=True)
+    tamano = models.PositiveBigIntegerField(help_text="Tamaño en bytes")
+    referencias = models.PositiveIntegerField(default=0, db_index=True)
+
+    class Meta:
+        verbose_name = "Blob"
+        verbose_name_plural = "Blobs"
+        ordering = ['-creado_en']
+        indexes = [
+            models.Index(fields=['referencias', 'actualizado_en']),
+        ]
+
+    @staticmethod
+    def digest_de(nombre):
+        """Digest contenido en el nombre de un blob (blobs/ab/cd/<digest>.ext)."""
+        return os.path.splitext(os.path.basename(nombre))[0]
+
+    @classmethod
+    def referenciar(cls, nombre, storage):
+        """Suma una referencia al blob (lo registra si el archivo existe pero no la fila)."""
+        actualizados = cls.objects.filter(nombre=nombre).update(
+            referencias=F('referencias') + 1, actualizado_en=timezone.now()
+        )
+        if not actualizados and storage.exists(nombre):
+            cls.objects.get_or_create(
+                digest=cls.digest_de(nombre),
+                defaults={'nombre': nombre, 'tamano': storage.size(nombre), 'referencias': 1}
+            )
+
+    @classmethod
+    def liberar(cls, nombre):
+        """Resta una referencia al blob. El archivo queda en disco hasta la purga."""
+        cls.objects.filter(nombre=nombre, referencias__gt=0).update(
+            referencias=F('referencias') - 1, actualizado_en=timezone.now()
+        )
+
+    def __str__(self):
+        return f"{self.nombre} ({self.referencias} referencias)"
+
+
+class VersionDatos(models.Model):
+    """
+    Contador de versión de un conjunto de datos, compartido por todos los procesos.
+    Las escrituras lo incrementan y las respuestas cacheadas se guardan bajo su valor.
+    """
+    nombre = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Versión de datos"
+        verbose_name_plural = "Versiones de datos"
+
+    @classmethod
+    def actual(cls, nombre):
+        """Versión vigente (0 si el conjunto nunca se modificó)."""
+        return cls.objects.filter(nombre=nombre).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def actuales(cls, nombres):
+        """Versiones vigentes de varios conjuntos en una consulta: {nombre: versión}."""
+        versiones = dict.fromkeys(nombres, 0)
+        versiones.update(cls.objects.filter(nombre__in=nombres).values_list('nombre', 'version'))
+        return versiones
+
+    @classmethod
+    def incrementar(cls, nombre):
+        if not cls.objects.filter(nombre=nombre).update(version=F('version') + 1):
+            _, creada = cls.objects.get_or_create(nombre=nombre, defaults={'version': 1})
+            if not creada:
+                cls.objects.filter(nombre=nombre).update(version=F('version') + 1)
+
+    def __str__(self):
+        return f"{self.nombre} v{self.version}"
+
+
+class ImagenConDerivadosModel(models.Model):
+    """
+    Modelo abstracto para modelos con una imagen que se sirve en tamaños reducidos.
+    Al cambiar la imagen el registro queda con derivados vacíos y el worker
+    generar_derivados --continuo crea los WebP (miniatura, mediana, original) fuera
+    de la petición. Mientras tanto los serializers apuntan a la imagen subida.
+    """
+    # Nombre del ImageField del que se generan los derivados
+    CAMPO_IMAGEN = 'imagen'
+
+    derivados = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Rutas de los derivados WebP de la imagen"
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        archivo = getattr(self, self.CAMPO_IMAGEN)
+        if self.derivados and self.derivados.get('fuente') != (archivo.name if archivo else None):
+            # Pendiente para el worker (o sin imagen): derivados vacíos
+            self.derivados = {}
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'derivados'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def pendientes_derivados(cls):
+        """Registros con imagen cuyos derivados todavía no se generaron."""
+        return cls.objects.exclude(**{cls.CAMPO_IMAGEN: ''}).exclude(
+            **{f'{cls.CAMPO_IMAGEN}__isnull': True}
+        ).filter(derivados={})
+
+    def actualizar_derivados(self, forzar=False):
+        """
+        Genera los derivados de la imagen actual y los persiste sin pasar por save(),
+        solo si el registro sigue apuntando a esa imagen. Si la imagen no puede
+        procesarse queda marcada con error para no reintentarla en cada pasada.
+        """
+        from .cache_agregados import invalidar_modelos
+        from .imagenes import generar_derivados
+
+        archivo = getattr(self, self.CAMPO_IMAGEN)
+        if not archivo:
+            return
+        self.derivados = generar_derivados(archivo, forzar=forzar) or {'fuente': archivo.name, 'error': True}
+        if type(self).objects.filter(pk=self.pk, **{self.CAMPO_IMAGEN: archivo.name}).update(
+            derivados=self.derivados
+        ):
+            invalidar_modelos(type(self))
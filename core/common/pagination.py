@@ -0,0 +1,171 @@
+"""
+Paginación por keyset (cursor) para las tablas de series de tiempo.
+Cada página busca a partir de las claves de la última fila de la anterior
+(WHERE (fecha, id) < (f, i) ... LIMIT n), así que la página N cuesta lo mismo que la primera.
+El total no se calcula salvo que se pida (?contar=true) y entonces es una estimación.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagina sobre el orden declarado en la vista (`orden_keyset`, p. ej. ('-fecha', '-id')).
+    Las claves deben ser campos no nulos del modelo y la última debe ser única (el id).
+
+    Parámetros: ?cursor=<opaco>, ?page_size=<n>, ?contar=true
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    contar_query_param = 'contar'
+    orden_default = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.orden = tuple(getattr(view, 'orden_keyset', self.orden_default))
+        self.campos = [campo.lstrip('-') for campo in self.orden]
+        self.modelo = queryset.model
+
+        self.estimado = None
+        if request.query_params.get(self.contar_query_param, '').lower() in ('1', 'true'):
+            self.estimado = self.estimar_total(queryset)
+
+        direccion, claves = self.decodificar_cursor(request)
+        atras = direccion == 'prev'
+        orden = [self._invertir(campo) for campo in self.orden] if atras else list(self.orden)
+        queryset = queryset.order_by(*orden)
+        if claves is not None:
+            queryset = queryset.filter(self.condicion_despues(orden, claves))
+
+        filas = list(queryset[:self.page_size + 1])
+        hay_mas = len(filas) > self.page_size
+        filas = filas[:self.page_size]
+        if atras:
+            filas.reverse()
+
+        self.cursor_siguiente = self._claves(filas[-1]) if filas and (hay_mas or atras) else None
+        self.cursor_anterior = self._claves(filas[0]) if filas and claves is not None and (hay_mas or not atras) else None
+        return filas
+
+    def get_paginated_response(self, data):
+        respuesta = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.estimado is not None:
+            respuesta['count_estimado'] = self.estimado
+        respuesta['results'] = data
+        return Response(respuesta)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count_estimado': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    # ------------------------------------------------------------------------
+
+    def get_page_size(self, request):
+        try:
+            tamano = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(tamano, self.max_page_size))
+
+    def get_next_link(self):
+        if self.cursor_siguiente is None:
+            return None
+        return self._enlace('next', self.cursor_siguiente)
+
+    def get_previous_link(self):
+        if self.cursor_anterior is None:
+            return None
+        return self._enlace('prev', self.cursor_anterior)
+
+    def _enlace(self, direccion, claves):
+        url = remove_query_param(self.base_url, self.contar_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.codificar_cursor(direccion, claves))
+
+    @staticmethod
+    def _invertir(campo):
+        return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+    def _claves(self, instancia):
+        """Claves de una instancia o de una fila de .values() (ver ValoresSerializerMixin)."""
+        if isinstance(instancia, dict):
+            return [instancia[campo] for campo in self.campos]
+        return [getattr(instancia, self.modelo._meta.get_field(campo).attname) for campo in self.campos]
+
+    def condicion_despues(self, orden, claves):
+        """
+        Filas posteriores a `claves` en `orden`:
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., con < en los campos descendentes.
+        Se agrega k1 >= v1 para que el planificador acote el rango con el índice de k1.
+        """
+        condicion = Q()
+        iguales = Q()
+        for campo, valor in zip(orden, claves):
+            nombre = campo.lstrip('-')
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            condicion |= iguales & Q(**{f'{nombre}__{operador}': valor})
+            iguales &= Q(**{nombre: valor})
+        primero = orden[0]
+        return condicion & Q(**{f"{primero.lstrip('-')}__{'lte' if primero.startswith('-') else 'gte'}": claves[0]})
+
+    def codificar_cursor(self, direccion, claves):
+        datos = json.dumps([direccion, claves], cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(datos.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decodificar_cursor(self, request):
+        """
+        Returns:
+            tuple: ('next' | 'prev', valores de las claves) o ('next', None) sin cursor
+
+        Raises:
+            NotFound: Si el cursor no es válido para este orden
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return 'next', None
+        try:
+            relleno = '=' * (-len(cursor) % 4)
+            direccion, valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode('utf-8'))
+            if direccion not in ('next', 'prev') or len(valores) != len(self.campos):
+                raise ValueError
+            claves = [
+                self.modelo._meta.get_field(campo).to_python(valor)
+                for campo, valor in zip(self.campos, valores)
+            ]
+        except Exception:
+            raise NotFound("Cursor inválido")
+        return direccion, claves
+
+    def estimar_total(self, queryset):
+        """
+        Filas estimadas por el planificador de PostgreSQL (sin recorrer la tabla).
+        En otros motores se cuenta de forma exacta.
+        """
+        queryset = queryset.order_by()
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.count()
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,174 @@
+"""
+Perfilamiento a pedido para usuarios staff.
+
+Con ?_profile=1 (o el header X-Profile: 1) la respuesta se reemplaza por un perfil de la
+petición: resumen de cProfile (funciones por tiempo acumulado y quién las llamó) y las
+consultas SQL con su duración. Con el valor 'guardar' además se guarda el perfil en
+PERFILAMIENTO_DIRECTORIO (.json y .prof, este último se abre con pstats o snakeviz).
+
+Las peticiones sin el parámetro solo pagan la búsqueda del parámetro.
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .instrumentacion import firma_consulta
+
+PARAMETRO = '_profile'
+HEADER = 'HTTP_X_PROFILE'
+FUNCIONES_MAXIMO = 40
+LLAMADORES_MAXIMO = 3
+SQL_MAXIMO = 500
+
+# cProfile usa un único perfilador por proceso (sys.monitoring desde Python 3.12)
+_perfilando = threading.Lock()
+
+
+def modo_pedido(request):
+    """None si no se pidió perfil, 'guardar' o 'ver'."""
+    valor = request.GET.get(PARAMETRO) or request.META.get(HEADER)
+    if not valor or valor in ('0', 'false'):
+        return None
+    return 'guardar' if valor == 'guardar' else 'ver'
+
+
+def es_staff(request):
+    """
+    Usuario staff por sesión o por los autenticadores de DRF (los tokens se validan
+    en la vista, después de los middlewares).
+    """
+    usuario = getattr(request, 'user', None)
+    if usuario is not None and usuario.is_authenticated:
+        return usuario.is_staff
+    envoltura = Request(request)
+    for clase in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            resultado = clase().authenticate(envoltura)
+        except APIException:
+            return False
+        if resultado is not None:
+            return resultado[0].is_staff
+    return False
+
+
+def _nombre_funcion(clave):
+    """'produccion/views.py:120(get_queryset)'; las rutas del proyecto, relativas a BASE_DIR."""
+    archivo, linea, funcion = clave
+    if archivo == '~':
+        return funcion
+    base = str(settings.BASE_DIR)
+    if archivo.startswith(base):
+        archivo = os.path.relpath(archivo, base)
+    return f'{archivo}:{linea}({funcion})'
+
+
+def resumen_perfil(perfil):
+    """Funciones con mayor tiempo acumulado, con sus llamadores principales."""
+    estadisticas = pstats.Stats(perfil).stats
+    ordenadas = sorted(estadisticas.items(), key=lambda item: item[1][3], reverse=True)
+    funciones = []
+    for clave, (_, llamadas, propio, acumulado, llamadores) in ordenadas[:FUNCIONES_MAXIMO]:
+        principales = sorted(llamadores.items(), key=lambda item: item[1][3], reverse=True)
+        funciones.append({
+            'funcion': _nombre_funcion(clave),
+            'llamadas': llamadas,
+            'propio_ms': round(propio * 1000, 2),
+            'acumulado_ms': round(acumulado * 1000, 2),
+            'llamada_desde': [_nombre_funcion(llamador) for llamador, _ in principales[:LLAMADORES_MAXIMO]],
+        })
+    return funciones
+
+
+class PerfilamientoMiddleware:
+    """
+    Perfila las peticiones de staff que lo piden. Va al final de MIDDLEWARE, después
+    de AuthenticationMiddleware: el perfil cubre la vista, la serialización y el renderizado.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        modo = modo_pedido(request)
+        if modo is None or not es_staff(request):
+            return self.get_response(request)
+
+        if not _perfilando.acquire(blocking=False):
+            return JsonResponse({'error': 'Ya hay un perfilamiento en curso en este proceso'}, status=409)
+        try:
+            return self._perfilar(request, modo)
+        finally:
+            _perfilando.release()
+
+    def _perfilar(self, request, modo):
+        consultas = []
+
+        def envoltura(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                consultas.append((sql, (time.perf_counter() - inicio) * 1000, many))
+
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        with ExitStack() as envolturas:
+            for conexion in connections.all(initialized_only=False):
+                envolturas.enter_context(conexion.execute_wrapper(envoltura))
+            perfil.enable()
+            try:
+                response = self.get_response(request)
+                if response.streaming:
+                    tamano = sum(len(parte) for parte in response.streaming_content)
+                else:
+                    tamano = len(response.content)
+            finally:
+                perfil.disable()
+        total_ms = (time.perf_counter() - inicio) * 1000
+
+        firmas = Counter(firma_consulta(sql) for sql, _, _ in consultas)
+        datos = {
+            'metodo': request.method,
+            'ruta': request.get_full_path(),
+            'estado': response.status_code,
+            'bytes': tamano,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(sum(ms for _, ms, _ in consultas), 1),
+            'consultas': len(consultas),
+            'funciones': resumen_perfil(perfil),
+            'sql': [
+                {'ms': round(ms, 2), 'sql': sql, **({'many': True} if many else {})}
+                for sql, ms, many in consultas[:SQL_MAXIMO]
+            ],
+            'repetidas': [
+                {'veces': veces, 'sql': firma[:200]} for firma, veces in firmas.most_common() if veces > 1
+            ],
+        }
+        if modo == 'guardar':
+            datos['archivo'] = self._guardar(request, perfil, datos)
+        return JsonResponse(datos, json_dumps_params={'ensure_ascii': False})
+
+    @staticmethod
+    def _guardar(request, perfil, datos):
+        """Guarda el perfil como <fecha>_<método>_<ruta>.json y .prof. Retorna el nombre base."""
+        directorio = settings.PERFILAMIENTO_DIRECTORIO
+        os.makedirs(directorio, exist_ok=True)
+        ruta = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-')[:80]
+        nombre = f"{timezone.now().strftime('%Y%m%d-%H%M%S-%f')}_{request.method}_{ruta}"
+        perfil.dump_stats(os.path.join(directorio, f'{nombre}.prof'))
+        with open(os.path.join(directorio, f'{nombre}.json'), 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, indent=2, ensure_ascii=False)
+        return nombre
@@ -0,0 +1,458 @@
+"""
+Campos de serializer compartidos para todos los módulos.
+"""
+import hashlib
+import threading
+from collections import Counter
+from operator import itemgetter
+from types import SimpleNamespace
+
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import default_storage
+from django.db import models
+from django.db.models import Prefetch, QuerySet
+from django.db.models.query import ModelIterable
+from django.utils import timezone
+from django.utils.encoding import force_str
+from rest_framework import serializers
+
+from .cache_agregados import nombre_version
+from .imagenes import TAMANOS_DERIVADOS
+from .instrumentacion import medicion_actual
+from .models import VersionDatos
+
+
+def urls_derivados(obj, request=None, campo_imagen=None):
+    """
+    URLs de los derivados de la imagen de obj (un ImagenConDerivadosModel).
+    Mientras los derivados no existan (o sean de una imagen anterior)
+    cada tamaño apunta a la imagen subida.
+
+    Returns:
+        dict: {'original': url, 'mediana': url, 'miniatura': url}, o None sin imagen
+    """
+    archivo = getattr(obj, campo_imagen or obj.CAMPO_IMAGEN)
+    if not archivo:
+        return None
+
+    derivados = obj.derivados or {}
+    if derivados.get('fuente') != archivo.name:
+        derivados = {}
+
+    urls = {}
+    for tamano in TAMANOS_DERIVADOS:
+        if derivados.get(tamano):
+            url = default_storage.url(derivados[tamano])
+        else:
+            url = archivo.url
+        urls[tamano] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+class DerivadosImagenField(serializers.Field):
+    """
+    Campo de solo lectura con las URLs de los derivados de una imagen.
+    Ver urls_derivados().
+    """
+    def __init__(self, campo_imagen=None, **kwargs):
+        self.campo_imagen = campo_imagen
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        return urls_derivados(obj, self.context.get('request'), self.campo_imagen)
+
+
+# ============================================================================
+# CAMPOS DINÁMICOS (?fields= / ?expand=)
+# ============================================================================
+
+def _parametro_lista(request, nombre):
+    """Valores de ?nombre=a,b en lecturas. Las escrituras validan siempre todos los campos."""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    valor = request.query_params.get(nombre)
+    if valor is None:
+        return None
+    return {campo.strip() for campo in valor.split(',') if campo.strip()}
+
+
+def _ruta_lookup(lookup):
+    return lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+
+
+def _es_relacion_simple(modelo, ruta):
+    """True si la ruta recorre solo FK/OneToOne (se puede cargar con select_related)."""
+    for nombre in ruta.split('__'):
+        try:
+            campo = modelo._meta.get_field(nombre)
+        except FieldDoesNotExist:
+            return False
+        if not (campo.is_relation and (campo.many_to_one or campo.one_to_one)):
+            return False
+        modelo = campo.related_model
+    return True
+
+
+def _rutas_select_related(select_related, prefijo=''):
+    """Aplana query.select_related ({'lote': {'galpon': {}}}) a ['lote', 'lote__galpon']."""
+    rutas = []
+    for nombre, hijos in select_related.items():
+        ruta = f'{prefijo}{nombre}'
+        rutas.append(ruta)
+        rutas += _rutas_select_related(hijos, f'{ruta}__')
+    return rutas
+
+
+class CamposDinamicosMixin:
+    """
+    Mixin para ModelSerializer que atiende ?fields= y ?expand= en el serializer raíz.
+
+    - ?fields=id,monto,fecha: solo se serializan esos campos.
+    - ?expand=proyecto: agrega representaciones anidadas declaradas en `campos_expandibles`
+      (nombre -> función que crea el campo), que no se incluyen por defecto.
+
+    `relaciones_campos` (campo -> lookups) y `anotaciones_campos` (campo -> {alias: expresión})
+    indican qué necesita cada campo del queryset; preparar_queryset() quita los
+    select_related/prefetch_related de campos no pedidos y agrega solo las anotaciones necesarias.
+    Los lookups que ningún campo declara se dejan como están.
+    """
+    campos_expandibles = {}
+    relaciones_campos = {}
+    anotaciones_campos = {}
+
+    def _es_raiz(self):
+        return self.parent is None or (isinstance(self.parent, serializers.ListSerializer) and self.parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._es_raiz():
+            return fields
+
+        request = self.context.get('request')
+        for nombre in self.campos_pedidos(request, fields.keys()) - fields.keys():
+            fields[nombre] = self.campos_expandibles[nombre]()
+        pedidos = self.campos_pedidos(request, fields.keys())
+        return {nombre: campo for nombre, campo in fields.items() if nombre in pedidos}
+
+    @classmethod
+    def campos_pedidos(cls, request, declarados):
+        """Campos a serializar: los pedidos en ?fields= (o todos) más los expandidos."""
+        solicitados = _parametro_lista(request, 'fields')
+        expandidos = (_parametro_lista(request, 'expand') or set()) & cls.campos_expandibles.keys()
+        base = set(declarados) - cls.campos_expandibles.keys()
+        if solicitados is not None:
+            base &= solicitados
+        return base | expandidos
+
+    @classmethod
+    def todas_las_anotaciones(cls):
+        """Todas las anotaciones declaradas, para querysets de Prefetch que anidan este serializer."""
+        anotaciones = {}
+        for anotaciones_campo in cls.anotaciones_campos.values():
+            anotaciones.update(anotaciones_campo)
+        return anotaciones
+
+    @classmethod
+    def preparar_queryset(cls, queryset, request):
+        """Ajusta select_related, prefetch_related y anotaciones a los campos pedidos."""
+        pedidos = cls.campos_pedidos(request, set(cls.relaciones_campos) | set(cls.anotaciones_campos))
+
+        mapeados = {_ruta_lookup(lookup) for lookups in cls.relaciones_campos.values() for lookup in lookups}
+        necesarios = [lookup for campo in pedidos for lookup in cls.relaciones_campos.get(campo, ())]
+
+        query = queryset.query
+        select_actual = _rutas_select_related(query.select_related) if isinstance(query.select_related, dict) else []
+        prefetch_actual = list(queryset._prefetch_related_lookups)
+
+        select = [ruta for ruta in select_actual if ruta not in mapeados]
+        prefetch = [lookup for lookup in prefetch_actual if _ruta_lookup(lookup) not in mapeados]
+        for lookup in necesarios:
+            if isinstance(lookup, str) and _es_relacion_simple(queryset.model, lookup):
+                if lookup not in select:
+                    select.append(lookup)
+            elif all(_ruta_lookup(otro) != _ruta_lookup(lookup) for otro in prefetch):
+                prefetch.append(lookup)
+
+        if isinstance(query.select_related, dict):
+            queryset = queryset.select_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        queryset = queryset.prefetch_related(None)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+
+        anotaciones = {}
+        for campo in pedidos:
+            anotaciones.update(cls.anotaciones_campos.get(campo, {}))
+        if anotaciones:
+            queryset = queryset.annotate(**anotaciones)
+        return queryset
+
+
+# ============================================================================
+# LISTADOS CON .values()
+# ============================================================================
+
+_FILAS_COMPILADAS = {}
+
+
+def _ruta_valores(modelo, source):
+    """
+    Ruta de .values() para un source con puntos ('lote.nombre' -> 'lote__nombre').
+    Retorna None si el source no es una cadena de campos del modelo.
+    """
+    partes = source.split('.')
+    for indice, nombre in enumerate(partes):
+        try:
+            campo = modelo._meta.get_field(nombre)
+        except FieldDoesNotExist:
+            return None
+        if not campo.concrete or campo.many_to_many:
+            return None
+        if indice < len(partes) - 1:
+            if not campo.is_relation:
+                return None
+            modelo = campo.related_model
+    return '__'.join(partes)
+
+
+def _compilar_campo(serializer, nombre, campo):
+    """
+    Compila un campo del serializer a (columnas de .values(), función fila -> valor).
+    Retorna None si el campo solo puede resolverse sobre una instancia del modelo.
+    """
+    modelo = serializer.Meta.model
+    source = campo.source
+
+    if nombre in serializer.campos_calculados:
+        columnas = tuple(serializer.campos_calculados[nombre])
+        propiedad = getattr(modelo, source).fget
+
+        def valor(fila):
+            return propiedad(SimpleNamespace(**{columna: fila[columna] for columna in columnas}))
+        return columnas, valor
+
+    if source.startswith('get_') and source.endswith('_display'):
+        ruta = _ruta_valores(modelo, source[4:-8])
+        if ruta is None:
+            return None
+        opciones = dict(modelo._meta.get_field(ruta).flatchoices)
+        representar = campo.to_representation
+
+        def valor(fila):
+            actual = fila[ruta]
+            if actual is None:
+                return None
+            return representar(force_str(opciones.get(actual, actual), strings_only=True))
+        return (ruta,), valor
+
+    if isinstance(campo, serializers.RelatedField):
+        if not isinstance(campo, serializers.PrimaryKeyRelatedField):
+            return None
+        representar = None
+    elif isinstance(campo, (serializers.SerializerMethodField, serializers.BaseSerializer)):
+        return None
+    else:
+        representar = campo.to_representation
+
+    ruta = _ruta_valores(modelo, source)
+    if ruta is None:
+        return None
+    if representar is None:
+        return (ruta,), itemgetter(ruta)
+
+    def valor(fila):
+        actual = fila[ruta]
+        return None if actual is None else representar(actual)
+    return (ruta,), valor
+
+
+class ValoresListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer que lee las filas con .values() en lugar de instanciar modelos.
+    Se activa con Meta.list_serializer_class en serializers con ValoresSerializerMixin.
+    Si algún campo pedido no se puede compilar, serializa de la forma normal.
+    """
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        if isinstance(data, QuerySet) and issubclass(data._iterable_class, ModelIterable):
+            valores = self.child.queryset_valores(data)
+            if valores is not None:
+                data = valores
+
+        filas = list(data)
+        if filas and isinstance(filas[0], dict):
+            representar = self.child.representar_fila
+            return [representar(fila) for fila in filas]
+        return super().to_representation(filas)
+
+
+class ValoresSerializerMixin:
+    """
+    Mixin para serializers de listado que son proyecciones de columnas.
+    Cada campo se compila una vez a una columna de .values():
+    - campos del modelo y sources con puntos ('lote.nombre' -> lote__nombre)
+    - get_<campo>_display, resuelto con las choices del campo
+    - propiedades del modelo declaradas en `campos_calculados` (campo -> columnas que usa),
+      evaluadas sobre la fila sin instanciar el modelo
+
+    Solo aplica a lecturas; las escrituras usan la serialización normal.
+    """
+    campos_calculados = {}
+
+    def _fila_compilada(self):
+        """Columnas y funciones de los campos actuales, o None si alguno no se puede compilar."""
+        compilados = []
+        for nombre, campo in self.fields.items():
+            if campo.write_only:
+                continue
+            clave = (type(self), nombre)
+            if clave not in _FILAS_COMPILADAS:
+                _FILAS_COMPILADAS[clave] = _compilar_campo(self, nombre, campo)
+            compilado = _FILAS_COMPILADAS[clave]
+            if compilado is None:
+                return None
+            compilados.append((nombre,) + compilado)
+        return compilados
+
+    def queryset_valores(self, queryset, extras=()):
+        """
+        Queryset de .values() con las columnas de los campos actuales más `extras`
+        (p. ej. las claves de la paginación). None si no aplica.
+        """
+        request = self.context.get('request')
+        if request is not None and request.method not in ('GET', 'HEAD'):
+            return None
+        compilados = self._fila_compilada()
+        if compilados is None:
+            return None
+        columnas = dict.fromkeys(
+            [columna for _, columnas_campo, _ in compilados for columna in columnas_campo] + list(extras)
+        )
+        return queryset.prefetch_related(None).values(*columnas)
+
+    def representar_fila(self, fila):
+        if not hasattr(self, '_funciones_fila'):
+            self._funciones_fila = [(nombre, valor) for nombre, _, valor in self._fila_compilada()]
+        return {nombre: valor(fila) for nombre, valor in self._funciones_fila}
+
+
+# ============================================================================
+# CACHÉ DE REPRESENTACIONES
+# ============================================================================
+
+CACHE_REPRESENTACIONES = 'representaciones'
+
+_contadores_representaciones = Counter()
+_lock_contadores = threading.Lock()
+
+
+def _contar_representaciones(aciertos, fallos):
+    with _lock_contadores:
+        _contadores_representaciones['aciertos'] += aciertos
+        _contadores_representaciones['fallos'] += fallos
+    medicion = medicion_actual()
+    if medicion is not None:
+        medicion.contar('representaciones_cacheadas', aciertos)
+        medicion.contar('representaciones_serializadas', fallos)
+
+
+def estadisticas_representaciones():
+    """Aciertos y fallos de la caché de representaciones en este proceso."""
+    with _lock_contadores:
+        aciertos = _contadores_representaciones['aciertos']
+        fallos = _contadores_representaciones['fallos']
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'proporcion_aciertos': round(aciertos / total, 3) if total else None,
+    }
+
+
+class RepresentacionCacheadaListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer que lee las representaciones de la página con un solo get_many
+    y serializa solo las que faltan. Se activa con Meta.list_serializer_class en
+    serializers con RepresentacionCacheadaMixin.
+    """
+    def to_representation(self, data):
+        objetos = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        claves = [self.child.clave_representacion(objeto) for objeto in objetos]
+        cache = caches[CACHE_REPRESENTACIONES]
+        encontradas = cache.get_many([clave for clave in claves if clave is not None])
+
+        nuevas = {}
+        representaciones = []
+        for objeto, clave in zip(objetos, claves):
+            datos = encontradas.get(clave) if clave is not None else None
+            if datos is None:
+                datos = self.child.serializar_objeto(objeto)
+                if clave is not None:
+                    nuevas[clave] = datos
+            representaciones.append(datos)
+
+        if nuevas:
+            cache.set_many(nuevas)
+        _contar_representaciones(len(encontradas), len(nuevas))
+        return representaciones
+
+
+class RepresentacionCacheadaMixin:
+    """
+    Mixin para ModelSerializer de objetos que cambian poco y cuestan serializar
+    (propiedades con consultas, totales, relaciones anidadas).
+
+    Cada representación se guarda en la caché 'representaciones' (acotada por MAX_ENTRIES)
+    bajo una clave con el serializer, los campos
+    pedidos, el día, el host, las versiones de `versiones_representacion` y (pk, actualizado_en)
+    del objeto. `versiones_representacion` nombra los modelos que alteran la representación sin
+    tocar actualizado_en (p. ej. los gastos en los totales de un proveedor); deben estar
+    observados con cache_agregados.observar_modelos().
+    """
+    versiones_representacion = ()
+
+    def _prefijo_representacion(self):
+        """Parte de la clave común a todos los objetos: una consulta de versiones por serializer."""
+        if not hasattr(self, '_prefijo_cache'):
+            versiones = {}
+            if self.versiones_representacion:
+                versiones = VersionDatos.actuales([nombre_version(modelo) for modelo in self.versiones_representacion])
+            request = self.context.get('request')
+            partes = [
+                sorted(self.fields), sorted(versiones.items()), timezone.localdate(),
+                request.get_host() if request is not None else None,
+            ]
+            huella = hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()[:20]
+            self._prefijo_cache = f'repr:{type(self).__name__}:{huella}'
+        return self._prefijo_cache
+
+    def clave_representacion(self, instance):
+        """Clave del objeto, o None si no se puede cachear (sin guardar o sin actualizado_en cargado)."""
+        actualizado_en = instance.__dict__.get('actualizado_en')
+        if instance.pk is None or actualizado_en is None:
+            return None
+        return f'{self._prefijo_representacion()}:{instance.pk}:{actualizado_en.timestamp()}'
+
+    def serializar_objeto(self, instance):
+        """Representación sin pasar por la caché."""
+        return super().to_representation(instance)
+
+    def to_representation(self, instance):
+        clave = self.clave_representacion(instance)
+        if clave is None:
+            return self.serializar_objeto(instance)
+
+        cache = caches[CACHE_REPRESENTACIONES]
+        datos = cache.get(clave)
+        if datos is not None:
+            _contar_representaciones(1, 0)
+            return datos
+        datos = self.serializar_objeto(instance)
+        cache.set(clave, datos)
+        _contar_representaciones(0, 1)
+        return datos
@@ -0,0 +1,69 @@
+"""
+Conteo de referencias de los blobs del almacenamiento deduplicado.
+Se conecta en CommonConfig.ready() para cada modelo con campos de archivo
+que usan AlmacenamientoDeduplicado.
+"""
+from django.db.models import FileField
+from django.db.models.signals import post_init, post_save, post_delete
+
+from .models import Blob
+from .storage import AlmacenamientoDeduplicado
+
+
+def campos_deduplicados(modelo):
+    """FileFields/ImageFields del modelo que guardan en el almacenamiento deduplicado."""
+    return [
+        campo for campo in modelo._meta.concrete_fields
+        if isinstance(campo, FileField) and isinstance(campo.storage, AlmacenamientoDeduplicado)
+    ]
+
+
+def _nombre_cargado(instance, campo):
+    """
+    Nombre del archivo sin disparar la carga de campos diferidos.
+    Retorna None si el campo no fue cargado (.only() / .defer()).
+    """
+    if campo.attname not in instance.__dict__:
+        return None
+    valor = instance.__dict__[campo.attname]
+    return getattr(valor, 'name', valor) or ''
+
+
+def registrar_nombres(sender, instance, **kwargs):
+    """Recuerda los nombres con los que se cargó la instancia."""
+    instance._blobs_cargados = {
+        campo.attname: _nombre_cargado(instance, campo)
+        for campo in campos_deduplicados(sender)
+    }
+
+
+def actualizar_referencias(sender, instance, created, raw=False, **kwargs):
+    """Mueve la referencia del blob anterior al nuevo cuando cambia el archivo."""
+    if raw:
+        return
+    cargados = getattr(instance, '_blobs_cargados', {})
+    for campo in campos_deduplicados(sender):
+        anterior = '' if created else cargados.get(campo.attname)
+        actual = getattr(instance, campo.attname).name or ''
+        if anterior is None or anterior == actual:
+            continue
+        if actual:
+            Blob.referenciar(actual, campo.storage)
+        if anterior:
+            Blob.liberar(anterior)
+        cargados[campo.attname] = actual
+    instance._blobs_cargados = cargados
+
+
+def liberar_referencias(sender, instance, **kwargs):
+    """Al borrar físicamente el registro (purga) se libera su referencia."""
+    for campo in campos_deduplicados(sender):
+        nombre = _nombre_cargado(instance, campo)
+        if nombre:
+            Blob.liberar(nombre)
+
+
+def conectar(modelo):
+    post_init.connect(registrar_nombres, sender=modelo, dispatch_uid=f'blobs_init_{modelo._meta.label}')
+    post_save.connect(actualizar_referencias, sender=modelo, dispatch_uid=f'blobs_save_{modelo._meta.label}')
+    post_delete.connect(liberar_referencias, sender=modelo, dispatch_uid=f'blobs_delete_{modelo._meta.label}')
@@ -0,0 +1,82 @@
+"""
+Almacenamiento direccionado por contenido: cada archivo se guarda una sola vez
+bajo su digest sha256, sin importar cuántos registros lo referencien.
+"""
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from .models import Blob
+
+DIRECTORIO_BLOBS = 'blobs'
+DIRECTORIO_TEMPORAL = os.path.join(DIRECTORIO_BLOBS, 'tmp')
+
+
+def ruta_blob(digest, extension=''):
+    """Nombre del blob dentro del storage. Ej: blobs/3f/a2/3fa2...e9.jpg"""
+    return f'{DIRECTORIO_BLOBS}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}'
+
+
+@deconstructible
+class AlmacenamientoDeduplicado(FileSystemStorage):
+    """
+    FileSystemStorage que guarda cada contenido una sola vez.
+    El archivo se hashea mientras se escribe en un temporal; si el digest ya
+    existe se descarta el temporal y se devuelve el blob existente.
+    El nombre pedido (upload_to) solo aporta la extensión.
+
+    Las referencias se llevan en Blob (ver core.common.signals): delete() borra
+    el archivo físico y solo debe llamarlo la purga de blobs.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre final lo decide el digest en _save()
+        return name
+
+    def _save(self, name, content):
+        _, extension = os.path.splitext(name)
+        temporal = os.path.join(DIRECTORIO_TEMPORAL, uuid.uuid4().hex)
+        ruta_temporal = self.path(temporal)
+        os.makedirs(os.path.dirname(ruta_temporal), exist_ok=True)
+
+        sha256 = hashlib.sha256()
+        tamano = 0
+        if hasattr(content, 'seek') and content.seekable():
+            content.seek(0)
+        try:
+            with open(ruta_temporal, 'wb') as destino:
+                for chunk in content.chunks():
+                    sha256.update(chunk)
+                    destino.write(chunk)
+                    tamano += len(chunk)
+
+            digest = sha256.hexdigest()
+            blob, creado = Blob.objects.get_or_create(
+                digest=digest,
+                defaults={'nombre': ruta_blob(digest, extension), 'tamano': tamano}
+            )
+            # Contenido ya almacenado: se aleja el blob de la purga. Si la purga lo
+            # borró mientras tanto (0 filas) se registra y escribe de nuevo.
+            if not creado and not Blob.objects.filter(pk=blob.pk).update(actualizado_en=timezone.now()):
+                blob, creado = Blob.objects.get_or_create(
+                    digest=digest, defaults={'nombre': blob.nombre, 'tamano': tamano}
+                )
+
+            ruta_final = self.path(blob.nombre)
+            if creado or not os.path.exists(ruta_final):
+                os.makedirs(os.path.dirname(ruta_final), exist_ok=True)
+                os.replace(ruta_temporal, ruta_final)
+                if self.file_permissions_mode is not None:
+                    os.chmod(ruta_final, self.file_permissions_mode)
+        finally:
+            if os.path.exists(ruta_temporal):
+                os.remove(ruta_temporal)
+
+        return blob.nombre
+
+
+almacenamiento_deduplicado = AlmacenamientoDeduplicado()
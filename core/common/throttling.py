@@ -0,0 +1,106 @@
+"""
+Límites de intentos de login.
+DRF evalúa los throttles en APIView.initial(), antes de ejecutar post(): una petición
+rechazada nunca llega a calcular el hash PBKDF2 de la contraseña.
+El historial de cada clave es una ventana deslizante de marcas de tiempo en la caché
+'limites' (en la base de datos): todos los workers comparten la misma cuenta.
+"""
+import hashlib
+import logging
+
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+CACHE_LIMITES = 'limites'
+PREFIJO_CONTADORES = 'throttle_login_contador'
+# Los contadores se reinician si nadie los consulta ni incrementa en este tiempo
+TTL_CONTADORES = 60 * 60 * 24 * 7
+
+
+def cache_limites():
+    return caches[CACHE_LIMITES]
+
+
+def verificar_cache_limites(app_configs, **kwargs):
+    """
+    Check de Django (registrado en CommonConfig.ready): una caché por proceso
+    multiplicaría el límite de login por la cantidad de workers.
+    """
+    if isinstance(cache_limites(), (LocMemCache, DummyCache)):
+        return [checks.Error(
+            f"CACHES['{CACHE_LIMITES}'] debe ser compartida por todos los workers (p. ej. DatabaseCache)",
+            hint="Los límites de login se contarían por proceso.",
+            id='common.E001',
+        )]
+    return []
+
+
+def _incrementar(nombre):
+    cache = cache_limites()
+    clave = f'{PREFIJO_CONTADORES}:{nombre}'
+    if not cache.add(clave, 1, TTL_CONTADORES):
+        try:
+            cache.incr(clave)
+        except ValueError:
+            # Expiró entre add() e incr()
+            cache.set(clave, 1, TTL_CONTADORES)
+
+
+def contadores_login() -> dict:
+    """Intentos permitidos y rechazados por cada límite de login, para monitoreo."""
+    nombres = [
+        f'{clase.scope}:{resultado}'
+        for clase in (LoginUsuarioThrottle, LoginIPThrottle)
+        for resultado in ('permitidos', 'rechazados')
+    ]
+    valores = cache_limites().get_many([f'{PREFIJO_CONTADORES}:{nombre}' for nombre in nombres])
+    resultado = {}
+    for nombre in nombres:
+        scope, tipo = nombre.split(':')
+        resultado.setdefault(scope, {})[tipo] = valores.get(f'{PREFIJO_CONTADORES}:{nombre}', 0)
+    return resultado
+
+
+class LoginThrottle(SimpleRateThrottle):
+    """Ventana deslizante de intentos de login, con contadores de monitoreo."""
+
+    @property
+    def cache(self):
+        return cache_limites()
+
+    def allow_request(self, request, view):
+        if request.method != 'POST':
+            return True
+        permitido = super().allow_request(request, view)
+        if self.key is not None:
+            _incrementar(f"{self.scope}:{'permitidos' if permitido else 'rechazados'}")
+            if not permitido:
+                logger.warning("Login limitado (%s) para %s", self.scope, self.key)
+        return permitido
+
+
+class LoginUsuarioThrottle(LoginThrottle):
+    """Intentos por nombre de usuario, sin importar desde qué IP llegan."""
+    scope = 'login_usuario'
+
+    def get_cache_key(self, request, view):
+        # El cuerpo puede ser una lista JSON u otro valor que no es un objeto
+        datos = request.data if isinstance(request.data, dict) else {}
+        usuario = str(datos.get('username', '')).strip().lower()
+        if not usuario:
+            return None
+        ident = hashlib.sha1(usuario.encode('utf-8')).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class LoginIPThrottle(LoginThrottle):
+    """Intentos por IP, aunque cambie el usuario probado."""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
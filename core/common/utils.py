@@ -105,3 +105,23 @@ def validar_rango_fechas(fecha_inicio, fecha_fin):
             raise ValueError("La fecha de inicio debe ser anterior a la fecha de fin")
     
     return True
+
+
+def percentil(valores, p):
+    """
+    Percentil p (0-100) por interpolación lineal.
+    
+    Args:
+        valores: Secuencia no vacía de números
+        p: Percentil entre 0 y 100
+        
+    Returns:
+        float: Valor del percentil
+    """
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
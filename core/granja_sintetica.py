@@ -0,0 +1,326 @@
+"""
+Granja sintética para benchmarks: años de registros diarios creados con bulk_create.
+
+La misma (escala, semilla, hasta) genera siempre los mismos datos. Todo lo creado se
+identifica por el prefijo PREFIJO en nombres y títulos, así se puede detectar y eliminar.
+"""
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from alimentacion.models import FormulaAlimento, Racion, ConsumoDiario
+from calendario.models import TipoEvento, Evento
+from finanzas.models import Proyecto, Categoria, Proveedor, Gasto
+from inventario.models import Material, MovimientoInventario
+from produccion.models import Galpon, Lote, Recoleccion, CalidadHuevo
+from salud.models import Vacunacion, Tratamiento, Mortalidad, HistorialVeterinario
+
+PREFIJO = 'Benchmark'
+USUARIO_BENCHMARK = 'benchmark_api'
+TAMANO_LOTE_BULK = 5000
+
+# Cantidades con escala 1
+GALPONES = 4
+LOTES_POR_GALPON = 3
+GASTOS = 100_000
+MOVIMIENTOS = 100_000
+PROYECTOS = 4
+CATEGORIAS = 10
+PROVEEDORES = 30
+MATERIALES = 50
+
+
+def _escalar(cantidad, escala):
+    return max(1, round(cantidad * escala))
+
+
+def existe_granja():
+    return Galpon.objects.filter(nombre__startswith=f'{PREFIJO} ').exists()
+
+
+def usuario_benchmark():
+    """Usuario staff con el que el benchmark hace las peticiones."""
+    usuario, creado = User.objects.get_or_create(
+        username=USUARIO_BENCHMARK,
+        defaults={'first_name': PREFIJO, 'is_staff': True}
+    )
+    if creado:
+        usuario.set_unusable_password()
+        usuario.save(update_fields=['password'])
+    return usuario
+
+
+def contar_granja():
+    """Filas de la granja sintética por modelo."""
+    return {
+        'galpones': Galpon.objects.filter(nombre__startswith=f'{PREFIJO} ').count(),
+        'lotes': Lote.objects.filter(nombre__startswith=f'{PREFIJO} ').count(),
+        'recolecciones': Recoleccion.objects.filter(lote__nombre__startswith=f'{PREFIJO} ').count(),
+        'calidad_huevos': CalidadHuevo.objects.filter(recoleccion__lote__nombre__startswith=f'{PREFIJO} ').count(),
+        'mortalidades': Mortalidad.objects.filter(lote__nombre__startswith=f'{PREFIJO} ').count(),
+        'raciones': Racion.objects.filter(lote__nombre__startswith=f'{PREFIJO} ').count(),
+        'consumos': ConsumoDiario.objects.filter(lote__nombre__startswith=f'{PREFIJO} ').count(),
+        'gastos': Gasto.objects.filter(proyecto__nombre__startswith=f'{PREFIJO} ').count(),
+        'movimientos': MovimientoInventario.objects.filter(material__nombre__startswith=f'{PREFIJO} ').count(),
+        'eventos': Evento.objects.filter(titulo__startswith=f'{PREFIJO} ').count(),
+    }
+
+
+def generar_granja(escala=1.0, semilla=42, anios=5, hasta=None, salida=None):
+    """
+    Crea la granja sintética.
+
+    Args:
+        escala: Multiplica galpones, gastos, movimientos y catálogos (1 = 12 lotes, 100k gastos)
+        semilla: Semilla del generador aleatorio
+        anios: Años de registros diarios hasta `hasta`
+        hasta: Último día con registros (default: hoy)
+        salida: Función opcional para informar el avance (recibe un texto)
+
+    Returns:
+        dict: Filas creadas por modelo (ver contar_granja)
+    """
+    azar = random.Random(semilla)
+    hasta = hasta or timezone.localdate()
+    desde = hasta - timedelta(days=365 * anios)
+    dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    informar = salida or (lambda texto: None)
+    usuario = usuario_benchmark()
+
+    with transaction.atomic():
+        informar("Producción, salud y alimentación...")
+        lotes = _crear_produccion(azar, escala, dias, usuario)
+        _crear_salud(azar, lotes, dias, usuario)
+        materiales = _crear_materiales(azar, escala)
+        _crear_alimentacion(azar, lotes, dias, materiales, usuario)
+
+        informar("Gastos...")
+        _crear_gastos(azar, escala, dias, usuario)
+
+        informar("Movimientos de inventario...")
+        _crear_movimientos(azar, escala, dias, materiales, usuario)
+
+        informar("Eventos...")
+        _crear_eventos(azar, dias, usuario)
+
+    return contar_granja()
+
+
+def eliminar_granja():
+    """Elimina todo lo creado por generar_granja (respetando las FK protegidas)."""
+    filtro = f'{PREFIJO} '
+    with transaction.atomic():
+        Evento.objects.filter(titulo__startswith=filtro).delete()
+        TipoEvento.objects.filter(nombre__startswith=filtro).delete()
+        Proyecto.objects.filter(nombre__startswith=filtro).delete()
+        Categoria.objects.filter(nombre__startswith=filtro).delete()
+        Proveedor.objects.filter(nombre__startswith=filtro).delete()
+        ConsumoDiario.objects.filter(lote__nombre__startswith=filtro).delete()
+        Racion.objects.filter(lote__nombre__startswith=filtro).delete()
+        Lote.objects.filter(nombre__startswith=filtro).delete()
+        Galpon.objects.filter(nombre__startswith=filtro).delete()
+        FormulaAlimento.objects.filter(nombre__startswith=filtro).delete()
+        Material.objects.filter(nombre__startswith=filtro).delete()
+
+
+# ----------------------------------------------------------------------------
+
+def _crear_produccion(azar, escala, dias, usuario):
+    galpones = Galpon.objects.bulk_create(
+        Galpon(nombre=f'{PREFIJO} G{numero:02d}', capacidad_maxima=5000)
+        for numero in range(1, _escalar(GALPONES, escala) + 1)
+    )
+    lotes = Lote.objects.bulk_create(
+        Lote(
+            nombre=f'{PREFIJO} {galpon.nombre[-3:]}-L{numero}', galpon=galpon,
+            fecha_ingreso=dias[0], cantidad_aves=azar.randint(800, 1500),
+            estado='PRODUCCION'
+        )
+        for galpon in galpones
+        for numero in range(1, LOTES_POR_GALPON + 1)
+    )
+
+    recolecciones = Recoleccion.objects.bulk_create(
+        (
+            Recoleccion(
+                lote=lote, fecha=dia, cantidad_huevos=azar.randint(600, 1200),
+                hora_recoleccion=time(8, 0), recolectado_por=usuario
+            )
+            for lote in lotes
+            for dia in dias
+        ),
+        batch_size=TAMANO_LOTE_BULK
+    )
+    CalidadHuevo.objects.bulk_create(
+        (
+            CalidadHuevo(
+                recoleccion=recoleccion,
+                cantidad_primera=int(recoleccion.cantidad_huevos * 0.85),
+                cantidad_segunda=int(recoleccion.cantidad_huevos * 0.1),
+                cantidad_descarte=azar.randint(0, 20),
+                evaluado_por=usuario
+            )
+            for indice, recoleccion in enumerate(recolecciones)
+            if indice % 2 == 0
+        ),
+        batch_size=TAMANO_LOTE_BULK
+    )
+    return lotes
+
+
+def _crear_salud(azar, lotes, dias, usuario):
+    Mortalidad.objects.bulk_create(
+        (
+            Mortalidad(
+                lote=lote, fecha=dia, cantidad_aves=azar.randint(1, 4),
+                causa=azar.choice(['Calor', 'Enfermedad', 'Desconocida']), registrado_por=usuario
+            )
+            for lote in lotes
+            for dia in dias[::3]
+        ),
+        batch_size=TAMANO_LOTE_BULK
+    )
+    Vacunacion.objects.bulk_create(
+        Vacunacion(
+            lote=lote, fecha=dia, tipo_vacuna=azar.choice(['Newcastle', 'Gumboro', 'Bronquitis']),
+            cantidad_aves=lote.cantidad_aves, metodo_aplicacion='Agua', aplicado_por=usuario
+        )
+        for lote in lotes
+        for dia in dias[::30]
+    )
+    Tratamiento.objects.bulk_create(
+        Tratamiento(
+            lote=lote, fecha_inicio=dia, fecha_fin=dia + timedelta(days=5),
+            medicamento='Enrofloxacina', cantidad_aves=lote.cantidad_aves,
+            motivo='Tratamiento preventivo', aplicado_por=usuario
+        )
+        for lote in lotes
+        for dia in dias[::90]
+    )
+    HistorialVeterinario.objects.bulk_create(
+        HistorialVeterinario(lote=lote, notas_generales='Historial sintético', veterinario_responsable=usuario)
+        for lote in lotes
+    )
+
+
+def _crear_materiales(azar, escala):
+    return Material.objects.bulk_create(
+        Material(
+            nombre=f'{PREFIJO} Material {numero:03d}',
+            tipo_inventario='GRANJA' if numero % 2 else 'CONSTRUCCION',
+            unidad_medida=azar.choice(['BOLSA', 'KILO', 'PIEZA']),
+            stock_actual=Decimal(azar.randint(0, 300)),
+            stock_minimo_alerta=Decimal(20)
+        )
+        for numero in range(1, _escalar(MATERIALES, escala) + 1)
+    )
+
+
+def _crear_alimentacion(azar, lotes, dias, materiales, usuario):
+    formulas = FormulaAlimento.objects.bulk_create(
+        FormulaAlimento(nombre=f'{PREFIJO} Fórmula {nombre}', edad_minima_semanas=semanas)
+        for nombre, semanas in [('Inicio', 0), ('Crecimiento', 6), ('Postura', 18)]
+    )
+    alimentos = [material for material in materiales if material.tipo_inventario == 'GRANJA']
+    Racion.objects.bulk_create(
+        (
+            Racion(
+                lote=lote, formula=formulas[2], fecha=dia,
+                cantidad_kg=Decimal(azar.randint(9000, 14000)) / 100, registrado_por=usuario
+            )
+            for lote in lotes
+            for dia in dias
+        ),
+        batch_size=TAMANO_LOTE_BULK
+    )
+    ConsumoDiario.objects.bulk_create(
+        (
+            ConsumoDiario(
+                lote=lote, material_alimento=alimentos[indice % len(alimentos)], fecha=dia,
+                cantidad_kg=Decimal(azar.randint(9000, 14000)) / 100, registrado_por=usuario
+            )
+            for indice, lote in enumerate(lotes)
+            for dia in dias
+        ),
+        batch_size=TAMANO_LOTE_BULK
+    )
+
+
+def _crear_gastos(azar, escala, dias, usuario):
+    proyectos = Proyecto.objects.bulk_create(
+        Proyecto(
+            nombre=f'{PREFIJO} Proyecto {numero}', fecha_inicio=dias[0],
+            presupuesto_objetivo=Decimal('100000000.00')
+        )
+        for numero in range(1, _escalar(PROYECTOS, escala) + 1)
+    )
+    categorias = Categoria.objects.bulk_create(
+        Categoria(nombre=f'{PREFIJO} Categoría {numero:02d}')
+        for numero in range(1, _escalar(CATEGORIAS, escala) + 1)
+    )
+    proveedores = Proveedor.objects.bulk_create(
+        Proveedor(nombre=f'{PREFIJO} Proveedor {numero:03d}')
+        for numero in range(1, _escalar(PROVEEDORES, escala) + 1)
+    )
+    Gasto.objects.bulk_create(
+        (
+            Gasto(
+                proyecto=azar.choice(proyectos), categoria=azar.choice(categorias),
+                proveedor_rel=azar.choice(proveedores) if azar.random() < 0.7 else None,
+                usuario=usuario, monto=Decimal(azar.randint(1000, 500000)) / 100,
+                descripcion=f'Gasto sintético {numero}', fecha=azar.choice(dias),
+                metodo_pago=azar.choice(['EFECTIVO', 'TRANSFERENCIA', 'QR'])
+            )
+            for numero in range(_escalar(GASTOS, escala))
+        ),
+        batch_size=TAMANO_LOTE_BULK
+    )
+    # bulk_create no pasa por Gasto.save(): los totales desnormalizados se calculan aquí
+    totales = Gasto.objects.filter(proyecto__in=proyectos).values('proyecto_id').annotate(
+        total=Sum('monto'), cantidad=Count('id')
+    ).order_by()
+    for fila in totales:
+        Proyecto.objects.filter(pk=fila['proyecto_id']).update(
+            total_gastado=fila['total'], cantidad_gastos=fila['cantidad']
+        )
+
+
+def _crear_movimientos(azar, escala, dias, materiales, usuario):
+    movimientos = MovimientoInventario.objects.bulk_create(
+        (
+            MovimientoInventario(
+                material=azar.choice(materiales), tipo=azar.choice(['ENTRADA', 'SALIDA', 'SALIDA', 'AJUSTE']),
+                cantidad=Decimal(azar.randint(1, 50)), usuario=usuario
+            )
+            for _ in range(_escalar(MOVIMIENTOS, escala))
+        ),
+        batch_size=TAMANO_LOTE_BULK
+    )
+    # fecha es auto_now_add: se reparte en el período con bulk_update
+    zona = timezone.get_current_timezone()
+    for movimiento in movimientos:
+        movimiento.fecha = datetime.combine(azar.choice(dias), time(azar.randint(7, 18)), tzinfo=zona)
+    MovimientoInventario.objects.bulk_update(movimientos, ['fecha'], batch_size=1000)
+
+
+def _crear_eventos(azar, dias, usuario):
+    tipos = TipoEvento.objects.bulk_create(
+        TipoEvento(nombre=f'{PREFIJO} {nombre}')
+        for nombre in ['Vacunación', 'Compra', 'Mantenimiento', 'Reunión']
+    )
+    zona = timezone.get_current_timezone()
+    futuros = [dias[-1] + timedelta(days=i) for i in range(1, 31)]
+    Evento.objects.bulk_create(
+        Evento(
+            tipo=azar.choice(tipos), usuario=usuario, asignado_a=usuario,
+            titulo=f'{PREFIJO} evento {numero}',
+            fecha_inicio=datetime.combine(dia, time(9, 0), tzinfo=zona),
+            estado='COMPLETADO' if dia <= dias[-1] else 'PENDIENTE'
+        )
+        for numero, dia in enumerate(dias[::7] + futuros)
+    )
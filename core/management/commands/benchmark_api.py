@@ -0,0 +1,185 @@
+"""
+Benchmark de la API sobre una granja sintética de varios años.
+Ejecutar: python manage.py benchmark_api [--escala 1] [--repeticiones 10] [--salida resultado.json]
+          [--comparar anterior.json] [--solo gastos] [--regenerar] [--eliminar]
+
+La granja se genera la primera vez (ver core.granja_sintetica) y se reutiliza en las
+corridas siguientes para que los resultados sean comparables. Cada endpoint se llama
+con el cliente de pruebas de DRF: latencia p50/p95 y consultas SQL por petición.
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from alimentacion.models import Racion, ConsumoDiario
+from calendario.models import Evento
+from core import granja_sintetica
+from core.common.serializers import estadisticas_representaciones
+from core.common.utils import percentil
+from finanzas.models import Proyecto, Gasto, Proveedor, Categoria
+from inventario.models import Material, MovimientoInventario
+from produccion.models import Galpon, Lote, Recoleccion
+from salud.models import Mortalidad, Vacunacion, HistorialVeterinario
+
+
+def endpoints_benchmark():
+    """
+    (nombre, url) de los listados, detalles y acciones medidos, con objetos de la granja sintética.
+    Los nombres son estables entre corridas para poder compararlas.
+    """
+    prefijo = f'{granja_sintetica.PREFIJO} '
+    proyecto = Proyecto.objects.filter(nombre__startswith=prefijo).order_by('id').first()
+    lote = Lote.objects.filter(nombre__startswith=prefijo).order_by('id').first()
+    material = Material.objects.filter(nombre__startswith=prefijo).order_by('id').first()
+    objetos = {
+        'finanzas/proyectos': proyecto,
+        'finanzas/categorias': Categoria.objects.filter(nombre__startswith=prefijo).order_by('id').first(),
+        'finanzas/proveedores': Proveedor.objects.filter(nombre__startswith=prefijo).order_by('id').first(),
+        'finanzas/gastos': Gasto.objects.filter(proyecto=proyecto).order_by('id').first(),
+        'produccion/galpones': Galpon.objects.filter(nombre__startswith=prefijo).order_by('id').first(),
+        'produccion/lotes': lote,
+        'produccion/recolecciones': Recoleccion.objects.filter(lote=lote).order_by('id').first(),
+        'salud/vacunaciones': Vacunacion.objects.filter(lote=lote).order_by('id').first(),
+        'salud/mortalidades': Mortalidad.objects.filter(lote=lote).order_by('id').first(),
+        'salud/historiales': HistorialVeterinario.objects.filter(lote=lote).first(),
+        'alimentacion/raciones': Racion.objects.filter(lote=lote).order_by('id').first(),
+        'alimentacion/consumos': ConsumoDiario.objects.filter(lote=lote).order_by('id').first(),
+        'inventario/materiales': material,
+        'inventario/movimientos': MovimientoInventario.objects.filter(material=material).order_by('id').first(),
+        'calendario/eventos': Evento.objects.filter(titulo__startswith=prefijo).order_by('id').first(),
+    }
+    solo_listado = [
+        'finanzas/socios', 'finanzas/albumes', 'finanzas/carpetas', 'finanzas/documentos',
+        'finanzas/reportes', 'produccion/calidad-huevos', 'salud/tratamientos',
+        'alimentacion/proveedores', 'alimentacion/formulas', 'calendario/tipos', 'calendario/recordatorios',
+    ]
+
+    endpoints = [('bootstrap', '/api/bootstrap/')]
+    for ruta, objeto in objetos.items():
+        endpoints.append((f'{ruta}:list', f'/api/{ruta}/'))
+        if objeto is not None:
+            endpoints.append((f'{ruta}:detail', f'/api/{ruta}/{objeto.pk}/'))
+    endpoints += [(f'{ruta}:list', f'/api/{ruta}/') for ruta in solo_listado]
+
+    endpoints += [
+        ('produccion/lotes:estadisticas', f'/api/produccion/lotes/{lote.pk}/estadisticas/'),
+        ('produccion/recolecciones:resumen_mensual', '/api/produccion/recolecciones/resumen_mensual/'),
+        ('salud/mortalidades:resumen_mensual', '/api/salud/mortalidades/resumen_mensual/'),
+        ('alimentacion/raciones:resumen_mensual', '/api/alimentacion/raciones/resumen_mensual/'),
+        ('inventario/movimientos:resumen_mensual', '/api/inventario/movimientos/resumen_mensual/'),
+        ('finanzas/gastos:resumen_mensual', f'/api/finanzas/gastos/resumen_mensual/?proyecto={proyecto.pk}'),
+        ('finanzas/proyectos:proyecciones', '/api/finanzas/proyectos/proyecciones/'),
+        ('finanzas/proyectos:exportar_pdf', f'/api/finanzas/proyectos/{proyecto.pk}/exportar_pdf/'),
+        ('inventario/materiales:historial', f'/api/inventario/materiales/{material.pk}/historial/'),
+        ('inventario/materiales:stock_bajo', '/api/inventario/materiales/stock_bajo/'),
+        ('calendario/eventos:proximos', '/api/calendario/eventos/proximos/?dias=30'),
+        ('calendario/eventos:hoy', '/api/calendario/eventos/hoy/'),
+    ]
+    return endpoints
+
+
+def medir_endpoint(cliente, url, repeticiones):
+    """Una llamada de calentamiento y `repeticiones` medidas."""
+    cliente.get(url)
+    tiempos = []
+    consultas = []
+    for _ in range(repeticiones):
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            respuesta = cliente.get(url)
+            if respuesta.streaming:
+                contenido = b''.join(respuesta.streaming_content)
+            else:
+                contenido = respuesta.content
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(len(capturadas))
+    return {
+        'url': url,
+        'estado': respuesta.status_code,
+        'p50_ms': round(percentil(tiempos, 50), 1),
+        'p95_ms': round(percentil(tiempos, 95), 1),
+        'consultas': max(consultas),
+        'bytes': len(contenido),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Genera una granja sintética y mide latencia p50/p95 y consultas de los endpoints de la API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', type=float, default=1.0,
+                            help='Escala de la granja sintética (1 = 12 lotes, 100k gastos y movimientos)')
+        parser.add_argument('--anios', type=int, default=5, help='Años de registros diarios (default: 5)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla de la granja sintética')
+        parser.add_argument('--repeticiones', type=int, default=10, help='Peticiones medidas por endpoint')
+        parser.add_argument('--solo', help='Solo endpoints cuyo nombre contiene este texto')
+        parser.add_argument('--salida', help='Archivo donde guardar el resultado JSON')
+        parser.add_argument('--comparar', help='Resultado JSON anterior para calcular diferencias')
+        parser.add_argument('--regenerar', action='store_true', help='Elimina y vuelve a generar la granja')
+        parser.add_argument('--eliminar', action='store_true', help='Elimina la granja al terminar')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError("--repeticiones debe ser al menos 1")
+
+        if options['regenerar'] and granja_sintetica.existe_granja():
+            self.stdout.write("Eliminando granja sintética anterior...")
+            granja_sintetica.eliminar_granja()
+        if granja_sintetica.existe_granja():
+            self.stdout.write("Usando la granja sintética existente (--regenerar para crearla de nuevo)")
+        else:
+            self.stdout.write(f"Generando granja sintética (escala {options['escala']})...")
+            inicio = time.perf_counter()
+            granja_sintetica.generar_granja(
+                escala=options['escala'], semilla=options['semilla'], anios=options['anios'],
+                salida=lambda texto: self.stdout.write(f"  {texto}")
+            )
+            self.stdout.write(f"  Generada en {time.perf_counter() - inicio:.0f} s")
+
+        anterior = {}
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                anterior = json.load(archivo).get('endpoints', {})
+
+        resultado = {
+            'escala': options['escala'],
+            'semilla': options['semilla'],
+            'repeticiones': options['repeticiones'],
+            'datos': granja_sintetica.contar_granja(),
+            'endpoints': {},
+        }
+
+        setup_test_environment()
+        try:
+            cliente = APIClient(raise_request_exception=False)
+            cliente.force_authenticate(granja_sintetica.usuario_benchmark())
+            for nombre, url in endpoints_benchmark():
+                if options['solo'] and options['solo'] not in nombre:
+                    continue
+                medicion = medir_endpoint(cliente, url, options['repeticiones'])
+                if nombre in anterior:
+                    medicion['p50_anterior_ms'] = anterior[nombre]['p50_ms']
+                    medicion['consultas_anteriores'] = anterior[nombre]['consultas']
+                resultado['endpoints'][nombre] = medicion
+                self.stdout.write(
+                    f"  {nombre:45} {medicion['estado']}  p50 {medicion['p50_ms']:>8} ms  "
+                    f"p95 {medicion['p95_ms']:>8} ms  {medicion['consultas']:>4} consultas"
+                )
+            resultado['cache_representaciones'] = estadisticas_representaciones()
+        finally:
+            teardown_test_environment()
+            if options['eliminar']:
+                self.stdout.write("Eliminando granja sintética...")
+                granja_sintetica.eliminar_granja()
+
+        texto = json.dumps(resultado, indent=2)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(texto)
+            self.stdout.write(self.style.SUCCESS(f"Resultado guardado en {options['salida']}"))
+        else:
+            self.stdout.write(texto)
@@ -0,0 +1,151 @@
+"""
+Benchmark de los serializers de listado: serialización normal vs. ruta con .values().
+Ejecutar: python manage.py benchmark_listados [--filas 10000] [--repeticiones 3]
+
+Los datos sintéticos se crean dentro de una transacción que se revierte al terminar.
+"""
+import json
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from alimentacion.models import FormulaAlimento, Racion, ConsumoDiario
+from alimentacion.serializers import RacionListSerializer, ConsumoDiarioListSerializer
+from inventario.models import Material
+from inventario.serializers import MaterialListSerializer
+from produccion.models import Galpon, Lote, Recoleccion
+from produccion.serializers import LoteListSerializer, RecoleccionListSerializer
+from salud.models import Mortalidad
+from salud.serializers import MortalidadListSerializer
+
+
+class _Revertir(Exception):
+    """Corta la transacción del benchmark para descartar los datos sintéticos."""
+
+
+def _medir(serializar, repeticiones):
+    """Mejor tiempo de `repeticiones` corridas y los datos de la última."""
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        datos = serializar()
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+    return mejor, datos
+
+
+class Command(BaseCommand):
+    help = 'Compara filas por segundo de los serializers de listado con y sin .values()'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas',
+            type=int,
+            default=10000,
+            help='Filas sintéticas por tabla (default: 10000)'
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=3,
+            help='Corridas por medición; se reporta la mejor (default: 3)'
+        )
+
+    def handle(self, *args, **options):
+        filas = options['filas']
+        repeticiones = options['repeticiones']
+        resultados = []
+
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Creando {filas} filas por tabla...")
+                self._crear_datos(filas)
+                for serializer_class, queryset in self._casos():
+                    resultados.append(self._comparar(serializer_class, queryset, repeticiones))
+                raise _Revertir
+        except _Revertir:
+            pass
+
+        self.stdout.write(json.dumps(resultados, indent=2))
+
+    def _casos(self):
+        return [
+            (RecoleccionListSerializer, Recoleccion.objects.filter(eliminado=False).order_by('-fecha', '-id')),
+            (LoteListSerializer, Lote.objects.filter(eliminado=False).order_by('-fecha_ingreso')),
+            (MortalidadListSerializer, Mortalidad.objects.filter(eliminado=False).order_by('-fecha', '-id')),
+            (RacionListSerializer, Racion.objects.filter(eliminado=False).order_by('-fecha', '-id')),
+            (ConsumoDiarioListSerializer, ConsumoDiario.objects.filter(eliminado=False).order_by('-fecha', '-id')),
+            (MaterialListSerializer, Material.objects.filter(eliminado=False).order_by('tipo_inventario', 'nombre')),
+        ]
+
+    def _comparar(self, serializer_class, queryset, repeticiones):
+        """Serializa el mismo queryset por ambas rutas y verifica que el resultado sea idéntico."""
+        queryset = serializer_class.preparar_queryset(queryset, None)
+
+        segundos_normal, normal = _medir(
+            lambda: serializers.ListSerializer(queryset.all(), child=serializer_class()).data,
+            repeticiones
+        )
+        segundos_valores, valores = _medir(
+            lambda: serializer_class(queryset.all(), many=True).data,
+            repeticiones
+        )
+        if json.dumps(normal, cls=JSONEncoder) != json.dumps(valores, cls=JSONEncoder):
+            self.stderr.write(f"{serializer_class.__name__}: las dos rutas producen datos distintos")
+
+        cantidad = len(valores)
+        return {
+            'serializer': serializer_class.__name__,
+            'filas': cantidad,
+            'normal_filas_por_segundo': round(cantidad / segundos_normal) if segundos_normal else None,
+            'valores_filas_por_segundo': round(cantidad / segundos_valores) if segundos_valores else None,
+            'aceleracion': round(segundos_normal / segundos_valores, 1) if segundos_valores else None,
+        }
+
+    def _crear_datos(self, filas):
+        """Un solo lote: Recoleccion y Racion son únicos por (lote, fecha), así que van de a una fila por día."""
+        hoy = date.today()
+        galpon = Galpon.objects.create(nombre='Benchmark listados', capacidad_maxima=filas * 100)
+        Lote.objects.bulk_create(
+            Lote(
+                nombre=f'Lote benchmark {i}', galpon=galpon,
+                fecha_ingreso=hoy - timedelta(days=i % 700), cantidad_aves=100 + i % 50,
+                fecha_salida=hoy if i % 4 == 0 else None
+            )
+            for i in range(filas)
+        )
+        lote = Lote.objects.filter(galpon=galpon).first()
+        formula = FormulaAlimento.objects.create(nombre='Fórmula benchmark')
+        material = Material.objects.create(nombre='Alimento benchmark', tipo_inventario='GRANJA')
+
+        Recoleccion.objects.bulk_create(
+            Recoleccion(lote=lote, fecha=hoy - timedelta(days=i), cantidad_huevos=80 + i % 40)
+            for i in range(filas)
+        )
+        Mortalidad.objects.bulk_create(
+            Mortalidad(lote=lote, fecha=hoy - timedelta(days=i // 2), cantidad_aves=1 + i % 3, causa='Calor')
+            for i in range(filas)
+        )
+        Racion.objects.bulk_create(
+            Racion(lote=lote, formula=formula, fecha=hoy - timedelta(days=i), cantidad_kg=Decimal('12.50'))
+            for i in range(filas)
+        )
+        ConsumoDiario.objects.bulk_create(
+            ConsumoDiario(
+                lote=lote, material_alimento=material,
+                fecha=hoy - timedelta(days=i), cantidad_kg=Decimal('11.75')
+            )
+            for i in range(filas)
+        )
+        Material.objects.bulk_create(
+            Material(
+                nombre=f'Material benchmark {i}', tipo_inventario='GRANJA',
+                stock_actual=Decimal(i % 20), stock_minimo_alerta=Decimal('5.00')
+            )
+            for i in range(filas)
+        )
@@ -0,0 +1,484 @@
+"""
+Carga concurrente sobre las rutas de escritura con contención.
+Ejecutar: python manage.py carga_concurrente [--trabajadores 8] [--modo hilos|procesos] [--duracion 20]
+          [--mezcla movimiento=4,gasto=3,recoleccion=2,racion=2,lectura=1] [--salida resultado.json]
+
+Cada trabajador hace peticiones contra la aplicación WSGI (cliente de pruebas de DRF, en el
+mismo proceso) con su propia conexión a PostgreSQL:
+- movimiento: ENTRADA/SALIDA sobre pocos materiales (select_for_update sobre Material)
+- gasto: gastos contra un proyecto con presupuesto ajustado (select_for_update sobre Proyecto)
+- recoleccion / racion: todos los trabajadores registran la misma secuencia de fechas del
+  mismo lote, así chocan en el unique (lote, fecha)
+- lectura: listados de los mismos datos
+
+Reporta throughput, latencias, resultados por operación (con el SQLSTATE de los errores),
+tiempo en consultas FOR UPDATE (espera de bloqueos), deadlocks e invariantes: stock negativo
+o distinto a la suma de movimientos, presupuesto excedido, totales del proyecto descuadrados
+y duplicados por (lote, fecha). Con invariantes violadas el comando termina con error.
+"""
+import json
+import multiprocessing
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import connection, connections, transaction
+from django.db.models import Count, Q, Sum
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from alimentacion.models import FormulaAlimento, Racion
+from core import granja_sintetica
+from core.common.utils import percentil
+from finanzas.models import Proyecto, Categoria, Gasto
+from inventario.models import Material
+from produccion.models import Galpon, Lote, Recoleccion
+
+PREFIJO = 'Carga concurrente'
+MEZCLA_DEFAULT = 'movimiento=4,gasto=3,recoleccion=2,racion=2,lectura=1'
+OPERACIONES = ('movimiento', 'gasto', 'recoleccion', 'racion', 'lectura')
+
+# SQLSTATE de PostgreSQL que interesan en la carga
+CODIGOS_SQL = {
+    '40P01': 'deadlock',
+    '40001': 'serializacion',
+    '55P03': 'bloqueo_no_disponible',
+    '57014': 'cancelada',
+    '23505': 'unique',
+}
+
+_excepcion_local = threading.local()
+
+
+def _guardar_excepcion(sender, **kwargs):
+    """
+    Receptor de got_request_exception: la petición se atiende en el hilo del trabajador,
+    así que la excepción queda en un threading.local del mismo hilo.
+    """
+    _excepcion_local.valor = sys.exc_info()[1]
+
+
+def codigo_sql(excepcion):
+    """SQLSTATE de la excepción (o de su causa), con psycopg 3 o psycopg2."""
+    vistas = set()
+    while excepcion is not None and id(excepcion) not in vistas:
+        vistas.add(id(excepcion))
+        codigo = getattr(excepcion, 'sqlstate', None) or getattr(excepcion, 'pgcode', None)
+        if codigo:
+            return codigo
+        excepcion = excepcion.__cause__ or excepcion.__context__
+    return None
+
+
+def clasificar(respuesta, excepcion):
+    """Etiqueta del resultado: '201', '400' o '500 IntegrityError unique'."""
+    if excepcion is None:
+        return str(respuesta.status_code)
+    etiqueta = f'{respuesta.status_code} {type(excepcion).__name__}'
+    codigo = codigo_sql(excepcion)
+    if codigo:
+        etiqueta += f' {CODIGOS_SQL.get(codigo, codigo)}'
+    return etiqueta
+
+
+def parsear_mezcla(texto):
+    """'movimiento=4,gasto=3' -> {'movimiento': 4, 'gasto': 3}."""
+    pesos = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip()
+        if nombre not in OPERACIONES:
+            raise CommandError(f"Operación desconocida en --mezcla: '{nombre}' (opciones: {', '.join(OPERACIONES)})")
+        try:
+            pesos[nombre] = int(peso)
+        except ValueError:
+            raise CommandError(f"Peso inválido para '{nombre}' en --mezcla: '{peso}'")
+    if not any(peso > 0 for peso in pesos.values()):
+        raise CommandError("--mezcla necesita al menos una operación con peso positivo")
+    return pesos
+
+
+# ============================================================================
+# ESCENARIO
+# ============================================================================
+
+def crear_escenario(materiales, stock, presupuesto):
+    """Objetos compartidos por todos los trabajadores. Retorna sus ids (se pasan a los procesos)."""
+    hoy = date.today()
+    with transaction.atomic():
+        eliminar_escenario()
+        galpon = Galpon.objects.create(nombre=f'{PREFIJO} galpón', capacidad_maxima=5000)
+        lote = Lote.objects.create(
+            nombre=f'{PREFIJO} lote', galpon=galpon,
+            fecha_ingreso=hoy - timedelta(days=3650), cantidad_aves=1000
+        )
+        formula = FormulaAlimento.objects.create(nombre=f'{PREFIJO} fórmula')
+        proyecto = Proyecto.objects.create(
+            nombre=f'{PREFIJO} proyecto', presupuesto_objetivo=presupuesto, fecha_inicio=hoy
+        )
+        categoria = Categoria.objects.create(nombre=f'{PREFIJO} categoría')
+        creados = Material.objects.bulk_create(
+            Material(
+                nombre=f'{PREFIJO} material {numero}', tipo_inventario='GRANJA',
+                stock_actual=stock, stock_minimo_alerta=Decimal('10.00')
+            )
+            for numero in range(1, materiales + 1)
+        )
+    return {
+        'usuario': granja_sintetica.usuario_benchmark().pk,
+        'lote': lote.pk,
+        'formula': formula.pk,
+        'proyecto': proyecto.pk,
+        'categoria': categoria.pk,
+        'materiales': [material.pk for material in creados],
+        'stock_inicial': str(stock),
+    }
+
+
+def eliminar_escenario():
+    """Elimina lo creado por crear_escenario (y sus movimientos, gastos y registros)."""
+    filtro = f'{PREFIJO} '
+    with transaction.atomic():
+        Material.objects.filter(nombre__startswith=filtro).delete()
+        Proyecto.objects.filter(nombre__startswith=filtro).delete()
+        Categoria.objects.filter(nombre__startswith=filtro).delete()
+        Lote.objects.filter(nombre__startswith=filtro).delete()
+        FormulaAlimento.objects.filter(nombre__startswith=filtro).delete()
+        Galpon.objects.filter(nombre__startswith=filtro).delete()
+
+
+def verificar_invariantes(escenario):
+    """Violaciones de las invariantes de las rutas de escritura después de la carga."""
+    violaciones = {
+        'stock_negativo': [],
+        'stock_descuadrado': [],
+        'presupuesto_excedido': [],
+        'totales_proyecto_descuadrados': [],
+        'duplicados_lote_fecha': [],
+    }
+
+    stock_inicial = Decimal(escenario['stock_inicial'])
+    materiales = Material.objects.filter(pk__in=escenario['materiales']).annotate(
+        entradas=Sum('movimientos__cantidad', filter=Q(movimientos__tipo='ENTRADA')),
+        salidas=Sum('movimientos__cantidad', filter=Q(movimientos__tipo='SALIDA')),
+    )
+    for material in materiales:
+        esperado = stock_inicial + (material.entradas or 0) - (material.salidas or 0)
+        if material.stock_actual < 0:
+            violaciones['stock_negativo'].append({'material': material.pk, 'stock': str(material.stock_actual)})
+        if material.stock_actual != esperado:
+            violaciones['stock_descuadrado'].append({
+                'material': material.pk, 'stock': str(material.stock_actual), 'segun_movimientos': str(esperado)
+            })
+
+    proyecto = Proyecto.objects.get(pk=escenario['proyecto'])
+    reales = Gasto.objects.filter(proyecto=proyecto, eliminado=False).aggregate(total=Sum('monto'), cantidad=Count('id'))
+    total_real = reales['total'] or Decimal('0.00')
+    if total_real > proyecto.presupuesto_objetivo:
+        violaciones['presupuesto_excedido'].append({
+            'proyecto': proyecto.pk, 'presupuesto': str(proyecto.presupuesto_objetivo), 'gastado': str(total_real)
+        })
+    if total_real != proyecto.total_gastado or reales['cantidad'] != proyecto.cantidad_gastos:
+        violaciones['totales_proyecto_descuadrados'].append({
+            'proyecto': proyecto.pk,
+            'total_gastado': str(proyecto.total_gastado), 'suma_gastos': str(total_real),
+            'cantidad_gastos': proyecto.cantidad_gastos, 'gastos': reales['cantidad'],
+        })
+
+    for modelo in (Recoleccion, Racion):
+        duplicados = (
+            modelo.objects.filter(lote_id=escenario['lote'])
+            .values('fecha').annotate(filas=Count('id')).filter(filas__gt=1)
+        )
+        violaciones['duplicados_lote_fecha'] += [
+            {'modelo': modelo.__name__, 'fecha': str(fila['fecha']), 'filas': fila['filas']}
+            for fila in duplicados
+        ]
+    return violaciones
+
+
+def deadlocks_postgresql():
+    """Contador acumulado de deadlocks de la base de datos actual."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+        return cursor.fetchone()[0]
+
+
+class MuestreadorBloqueos(threading.Thread):
+    """Cuenta periódicamente las sesiones de la base de datos que esperan un bloqueo."""
+
+    def __init__(self, intervalo=0.05):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.muestras = []
+        self._detener = threading.Event()
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self._detener.is_set():
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                    )
+                    self.muestras.append(cursor.fetchone()[0])
+                    self._detener.wait(self.intervalo)
+        finally:
+            connections.close_all()
+
+    def detener(self):
+        self._detener.set()
+        if self.is_alive():
+            self.join()
+
+    def resumen(self):
+        if not self.muestras:
+            return {'muestras': 0}
+        return {
+            'muestras': len(self.muestras),
+            'promedio_sesiones_esperando': round(sum(self.muestras) / len(self.muestras), 2),
+            'max_sesiones_esperando': max(self.muestras),
+        }
+
+
+# ============================================================================
+# TRABAJADORES
+# ============================================================================
+
+def _peticion(operacion, escenario, azar, contadores):
+    """(método, url, datos) de la próxima petición de la operación."""
+    hoy = date.today()
+    if operacion == 'movimiento':
+        return 'post', '/api/inventario/movimientos/', {
+            'material': azar.choice(escenario['materiales']),
+            'tipo': 'SALIDA' if azar.random() < 0.6 else 'ENTRADA',
+            'cantidad': azar.randint(1, 10),
+            'nota': PREFIJO,
+        }
+    if operacion == 'gasto':
+        return 'post', '/api/finanzas/gastos/', {
+            'proyecto': escenario['proyecto'],
+            'categoria': escenario['categoria'],
+            'monto': f'{azar.randint(5000, 50000) / 100:.2f}',
+            'descripcion': PREFIJO,
+            'fecha': hoy.isoformat(),
+        }
+    if operacion in ('recoleccion', 'racion'):
+        # Todos los trabajadores recorren la misma secuencia de fechas
+        contadores[operacion] += 1
+        fecha = (hoy - timedelta(days=contadores[operacion])).isoformat()
+        if operacion == 'recoleccion':
+            return 'post', '/api/produccion/recolecciones/', {
+                'lote': escenario['lote'], 'fecha': fecha, 'cantidad_huevos': azar.randint(600, 900),
+            }
+        return 'post', '/api/alimentacion/raciones/', {
+            'lote': escenario['lote'], 'formula': escenario['formula'], 'fecha': fecha,
+            'cantidad_kg': f'{azar.randint(9000, 14000) / 100:.2f}',
+        }
+    url = azar.choice([
+        f"/api/inventario/materiales/{azar.choice(escenario['materiales'])}/",
+        f"/api/finanzas/gastos/?proyecto={escenario['proyecto']}",
+        f"/api/produccion/recolecciones/?lote={escenario['lote']}",
+    ])
+    return 'get', url, None
+
+
+def trabajador(parametros):
+    """
+    Hace peticiones hasta agotar la duración. Retorna las operaciones (operación, resultado, ms)
+    y la duración de cada consulta FOR UPDATE, que bajo contención es casi toda espera de bloqueo.
+    """
+    indice, escenario, pesos, duracion, semilla = parametros
+    azar = random.Random(semilla * 1000 + indice)
+    nombres = list(pesos)
+    ponderaciones = [pesos[nombre] for nombre in nombres]
+    contadores = Counter()
+    operaciones = []
+    esperas_ms = []
+
+    def envoltura(execute, sql, params, many, context):
+        if 'FOR UPDATE' not in sql:
+            return execute(sql, params, many, context)
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            esperas_ms.append((time.perf_counter() - inicio) * 1000)
+
+    try:
+        cliente = APIClient(raise_request_exception=False)
+        cliente.force_authenticate(User.objects.get(pk=escenario['usuario']))
+        limite = time.monotonic() + duracion
+        with connection.execute_wrapper(envoltura):
+            while time.monotonic() < limite:
+                operacion = azar.choices(nombres, ponderaciones)[0]
+                metodo, url, datos = _peticion(operacion, escenario, azar, contadores)
+                _excepcion_local.valor = None
+                inicio = time.perf_counter()
+                respuesta = getattr(cliente, metodo)(url, datos)
+                milisegundos = (time.perf_counter() - inicio) * 1000
+                operaciones.append((operacion, clasificar(respuesta, _excepcion_local.valor), milisegundos))
+    finally:
+        connections.close_all()
+    return {'operaciones': operaciones, 'esperas_ms': esperas_ms}
+
+
+def ejecutar_trabajadores(modo, parametros, muestreador):
+    """
+    Corre los trabajadores en hilos o en procesos (fork) y junta sus resultados.
+    El muestreador se inicia después del fork para que ningún hijo herede su conexión.
+    """
+    cantidad = len(parametros)
+    if modo == 'procesos':
+        # Cada proceso hijo debe abrir su propia conexión
+        connections.close_all()
+        with multiprocessing.get_context('fork').Pool(cantidad) as pool:
+            muestreador.start()
+            return pool.map(trabajador, parametros)
+
+    resultados = [None] * cantidad
+    errores = []
+
+    def correr(indice):
+        try:
+            resultados[indice] = trabajador(parametros[indice])
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=correr, args=(indice,)) for indice in range(cantidad)]
+    muestreador.start()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    if errores:
+        raise errores[0]
+    return resultados
+
+
+def resumir(resultados, segundos):
+    """Throughput, latencias y resultados por operación; espera en FOR UPDATE."""
+    por_operacion = {}
+    for resultado in resultados:
+        for operacion, etiqueta, milisegundos in resultado['operaciones']:
+            datos = por_operacion.setdefault(operacion, {'tiempos': [], 'resultados': Counter()})
+            datos['tiempos'].append(milisegundos)
+            datos['resultados'][etiqueta] += 1
+
+    operaciones = {}
+    total = 0
+    for operacion in sorted(por_operacion):
+        tiempos = por_operacion[operacion]['tiempos']
+        conteo = por_operacion[operacion]['resultados']
+        exitosas = sum(veces for etiqueta, veces in conteo.items() if etiqueta.startswith('2'))
+        total += len(tiempos)
+        operaciones[operacion] = {
+            'peticiones': len(tiempos),
+            'exitosas_por_segundo': round(exitosas / segundos, 1),
+            'p50_ms': round(percentil(tiempos, 50), 1),
+            'p95_ms': round(percentil(tiempos, 95), 1),
+            'p99_ms': round(percentil(tiempos, 99), 1),
+            'resultados': dict(conteo.most_common()),
+        }
+
+    esperas = [espera for resultado in resultados for espera in resultado['esperas_ms']]
+    bloqueos = {'consultas_for_update': len(esperas)}
+    if esperas:
+        bloqueos.update({
+            'espera_total_ms': round(sum(esperas), 1),
+            'p50_ms': round(percentil(esperas, 50), 1),
+            'p95_ms': round(percentil(esperas, 95), 1),
+            'max_ms': round(max(esperas), 1),
+        })
+    return {
+        'peticiones': total,
+        'peticiones_por_segundo': round(total / segundos, 1),
+        'operaciones': operaciones,
+        'for_update': bloqueos,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Carga concurrente sobre movimientos, gastos, recolecciones y raciones; verifica invariantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trabajadores', type=int, default=8, help='Hilos o procesos concurrentes (default: 8)')
+        parser.add_argument('--modo', choices=['hilos', 'procesos'], default='hilos',
+                            help='Trabajadores como hilos o procesos (default: hilos)')
+        parser.add_argument('--duracion', type=float, default=20, help='Segundos de carga (default: 20)')
+        parser.add_argument('--mezcla', default=MEZCLA_DEFAULT, help=f'Pesos por operación (default: {MEZCLA_DEFAULT})')
+        parser.add_argument('--materiales', type=int, default=3, help='Materiales en disputa (default: 3)')
+        parser.add_argument('--stock', type=Decimal, default=Decimal('100.00'),
+                            help='Stock inicial de cada material (default: 100)')
+        parser.add_argument('--presupuesto', type=Decimal, default=Decimal('20000.00'),
+                            help='Presupuesto del proyecto en Bs (default: 20000)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla de la mezcla de peticiones')
+        parser.add_argument('--salida', help='Archivo donde guardar el resultado JSON')
+        parser.add_argument('--conservar', action='store_true', help='No elimina los datos de la carga al terminar')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError(
+                "La carga concurrente necesita PostgreSQL: en otros motores select_for_update "
+                "no bloquea filas y los resultados no son representativos"
+            )
+        if options['trabajadores'] < 1 or options['materiales'] < 1:
+            raise CommandError("--trabajadores y --materiales deben ser al menos 1")
+        pesos = parsear_mezcla(options['mezcla'])
+
+        escenario = crear_escenario(options['materiales'], options['stock'], options['presupuesto'])
+        parametros = [
+            (indice, escenario, pesos, options['duracion'], options['semilla'])
+            for indice in range(options['trabajadores'])
+        ]
+        self.stdout.write(
+            f"{options['trabajadores']} {options['modo']} durante {options['duracion']:.0f} s "
+            f"({options['mezcla']})..."
+        )
+
+        setup_test_environment()
+        got_request_exception.connect(_guardar_excepcion, dispatch_uid='carga_concurrente')
+        try:
+            deadlocks_antes = deadlocks_postgresql()
+            muestreador = MuestreadorBloqueos()
+            inicio = time.perf_counter()
+            try:
+                resultados = ejecutar_trabajadores(options['modo'], parametros, muestreador)
+            finally:
+                segundos = time.perf_counter() - inicio
+                muestreador.detener()
+
+            resultado = {
+                'modo': options['modo'],
+                'trabajadores': options['trabajadores'],
+                'duracion_s': round(segundos, 1),
+                'mezcla': pesos,
+                **resumir(resultados, segundos),
+                'sesiones_esperando_bloqueo': muestreador.resumen(),
+                'deadlocks_postgresql': deadlocks_postgresql() - deadlocks_antes,
+                'invariantes': verificar_invariantes(escenario),
+            }
+        finally:
+            got_request_exception.disconnect(dispatch_uid='carga_concurrente')
+            teardown_test_environment()
+            if not options['conservar']:
+                eliminar_escenario()
+
+        texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(texto)
+            self.stdout.write(self.style.SUCCESS(f"Resultado guardado en {options['salida']}"))
+        else:
+            self.stdout.write(texto)
+
+        violadas = [nombre for nombre, casos in resultado['invariantes'].items() if casos]
+        if violadas:
+            raise CommandError(f"Invariantes violadas: {', '.join(violadas)}")
@@ -0,0 +1,122 @@
+"""
+Resumen de logs/consultas_lentas.log por firma de SQL (ver core.common.consultas_lentas).
+Ejecutar: python manage.py consultas_lentas [--top 20] [--orden total|max|veces] [--desde 2026-01-01]
+          [--archivo otro.log] [--json]
+
+Cada firma agrupa la misma consulta con distintos parámetros. Se muestra cuántas veces fue
+lenta, el tiempo total, p50/p95/máximo, desde qué vistas y acciones se ejecutó y el plan de
+EXPLAIN (ANALYZE, BUFFERS) de la ejecución más lenta que tenga uno.
+"""
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.common.instrumentacion import firma_consulta
+from core.common.utils import percentil
+
+ORIGENES_MAXIMO = 5
+
+
+def leer_registros(ruta, desde=None):
+    """Registros JSON del archivo; ignora las líneas que no lo son (p. ej. trazas de error)."""
+    registros = []
+    with open(ruta, encoding='utf-8') as archivo:
+        for linea in archivo:
+            if not linea.startswith('{'):
+                continue
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                continue
+            if desde and registro.get('fecha', '') < desde:
+                continue
+            registros.append(registro)
+    return registros
+
+
+def nombre_origen(registro):
+    """'GastoViewSet.resumen_mensual', 'GET /api/...' o el comando que ejecutó la consulta."""
+    if 'vista' in registro:
+        accion = registro.get('accion')
+        return f"{registro['vista']}.{accion}" if accion else registro['vista']
+    if 'ruta' in registro:
+        return f"{registro['metodo']} {registro['ruta']}"
+    return registro.get('proceso', '?')
+
+
+def agrupar(registros):
+    """Estadísticas por firma de SQL."""
+    grupos = {}
+    for registro in registros:
+        firma = firma_consulta(registro['sql'])
+        grupo = grupos.setdefault(firma, {'tiempos': [], 'origenes': Counter(), 'peor': None, 'peor_con_plan': None})
+        grupo['tiempos'].append(registro['ms'])
+        grupo['origenes'][nombre_origen(registro)] += 1
+        if grupo['peor'] is None or registro['ms'] > grupo['peor']['ms']:
+            grupo['peor'] = registro
+        if 'plan' in registro and (grupo['peor_con_plan'] is None or registro['ms'] > grupo['peor_con_plan']['ms']):
+            grupo['peor_con_plan'] = registro
+
+    resumen = []
+    for firma, grupo in grupos.items():
+        tiempos = grupo['tiempos']
+        con_plan = grupo['peor_con_plan']
+        resumen.append({
+            'firma': firma,
+            'veces': len(tiempos),
+            'total_ms': round(sum(tiempos), 1),
+            'p50_ms': round(percentil(tiempos, 50), 1),
+            'p95_ms': round(percentil(tiempos, 95), 1),
+            'max_ms': round(max(tiempos), 1),
+            'origenes': dict(grupo['origenes'].most_common(ORIGENES_MAXIMO)),
+            'ejemplo': grupo['peor']['sql'],
+            'plan': con_plan['plan'] if con_plan else None,
+            'plan_ms': con_plan['ms'] if con_plan else None,
+        })
+    return resumen
+
+
+class Command(BaseCommand):
+    help = 'Resume las consultas lentas registradas, agrupadas por firma de SQL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archivo', default=None,
+                            help='Archivo de consultas lentas (default: CONSULTAS_LENTAS_ARCHIVO)')
+        parser.add_argument('--top', type=int, default=20, help='Cantidad de firmas a mostrar (default: 20)')
+        parser.add_argument('--orden', choices=['total', 'max', 'veces'], default='total',
+                            help='Criterio de orden (default: total, tiempo acumulado)')
+        parser.add_argument('--desde', help='Solo registros desde esta fecha (AAAA-MM-DD)')
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def handle(self, *args, **options):
+        ruta = options['archivo'] or settings.CONSULTAS_LENTAS_ARCHIVO
+        try:
+            registros = leer_registros(ruta, options['desde'])
+        except FileNotFoundError:
+            raise CommandError(
+                f"No existe {ruta}. ¿Está activado CONSULTAS_LENTAS_UMBRAL_MS?"
+            )
+
+        clave = {'total': 'total_ms', 'max': 'max_ms', 'veces': 'veces'}[options['orden']]
+        resumen = sorted(agrupar(registros), key=lambda grupo: grupo[clave], reverse=True)[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(resumen, indent=2, ensure_ascii=False))
+            return
+
+        self.stdout.write(f"{len(registros)} consultas lentas, {len(resumen)} firmas mostradas\n")
+        for posicion, grupo in enumerate(resumen, 1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"#{posicion}  {grupo['veces']} veces  total {grupo['total_ms']} ms  "
+                f"p50 {grupo['p50_ms']} ms  p95 {grupo['p95_ms']} ms  máx {grupo['max_ms']} ms"
+            ))
+            for origen, veces in grupo['origenes'].items():
+                self.stdout.write(f"  {veces:>5}  {origen}")
+            self.stdout.write(f"  SQL: {grupo['ejemplo']}")
+            if grupo['plan']:
+                self.stdout.write(f"  Plan ({grupo['plan_ms']} ms):")
+                for linea in grupo['plan'].splitlines():
+                    self.stdout.write(f"    {linea}")
+            self.stdout.write('')
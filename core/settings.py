@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -56,7 +57,7 @@ INSTALLED_APPS = [
 ]
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.common.autenticacion.TokenCacheadoAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -67,8 +68,17 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # Límites de login (core.common.throttling), evaluados antes de verificar la contraseña
+    'DEFAULT_THROTTLE_RATES': {
+        'login_usuario': os.getenv('LOGIN_LIMITE_USUARIO', '5/min'),
+        'login_ip': os.getenv('LOGIN_LIMITE_IP', '20/min'),
+    },
+    # nginx (proxy_params) agrega la IP del cliente al final de X-Forwarded-For
+    'NUM_PROXIES': 1,
 }
 MIDDLEWARE = [
+    'core.common.instrumentacion.InstrumentacionMiddleware',
+    'core.common.consultas_lentas.ConsultasLentasMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -77,6 +87,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.common.perfilamiento.PerfilamientoMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -123,10 +134,88 @@ if not CORS_ALLOW_ALL_ORIGINS:
 # Permite credenciales en CORS si es necesario
 CORS_ALLOW_CREDENTIALS = True
 
+# X-Profile: perfilamiento a pedido (core.common.perfilamiento)
+CORS_ALLOW_HEADERS = (*default_headers, 'x-profile')
+
 # Manejo de Archivos Estáticos y Media (Fotos de Recibos)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media protegida: Django autoriza cada archivo y nginx lo envía (X-Accel-Redirect).
+# MEDIA_X_ACCEL_PREFIX debe coincidir con la location `internal` de elcampo_nginx.
+MEDIA_X_ACCEL_REDIRECT = os.getenv('MEDIA_X_ACCEL_REDIRECT', str(not DEBUG)) == 'True'
+MEDIA_X_ACCEL_PREFIX = '/_protegido/'
+MEDIA_AUTORIZACION_TTL = 60  # segundos que se cachea la decisión por usuario y archivo
+MEDIA_FIRMA_TTL = 300  # segundos de validez de las URLs firmadas de /media/ (?firma=)
+
+# Caché por proceso de token -> usuario, perfil de socio y grupos (core.common.autenticacion).
+# Los cambios se invalidan por señales en el proceso que los hace; en los demás workers al vencer el TTL.
+AUTENTICACION_CACHE_TTL = int(os.getenv('AUTENTICACION_CACHE_TTL', '60'))  # segundos
+AUTENTICACION_CACHE_MAXIMO = 1000  # tokens por proceso
+
+# Fracción de peticiones medidas por core.common.instrumentacion (0 = ninguna, 1 = todas):
+# header Server-Timing y una línea JSON por petición en el log (consultas, tiempos, consultas repetidas)
+INSTRUMENTACION_MUESTREO = float(os.getenv('INSTRUMENTACION_MUESTREO', '0'))
+
+# Caché de Django (bootstrap, agregados, autorización de media). Por defecto en memoria de cada proceso;
+# con CACHE_DIRECTORIO se usa una caché en archivos compartida por los workers de gunicorn.
+# 'representaciones' guarda objetos serializados (RepresentacionCacheadaMixin): acotada por
+# cantidad de entradas, al llenarse descarta una cuarta parte (en memoria, las menos usadas).
+CACHE_REPRESENTACIONES_OPCIONES = {
+    'MAX_ENTRIES': int(os.getenv('CACHE_REPRESENTACIONES_MAXIMO', '5000')),
+    'CULL_FREQUENCY': 4,
+}
+if os.getenv('CACHE_DIRECTORIO'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_DIRECTORIO'),
+        },
+        'representaciones': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(os.getenv('CACHE_DIRECTORIO'), 'representaciones'),
+            'TIMEOUT': 60 * 60 * 24,
+            'OPTIONS': CACHE_REPRESENTACIONES_OPCIONES,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'representaciones': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'representaciones',
+            'TIMEOUT': 60 * 60 * 24,
+            'OPTIONS': CACHE_REPRESENTACIONES_OPCIONES,
+        },
+    }
+
+# Límites de login (core.common.throttling): deben verse desde todos los workers, si no cada
+# proceso lleva su propia cuenta y el límite efectivo se multiplica por la cantidad de workers.
+# Tabla creada con `python manage.py createcachetable`; el check common.E001 rechaza cachés por proceso.
+CACHES['limites'] = {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+    'LOCATION': 'cache_limites',
+}
+
+# Respuestas de resumen_mensual y estadisticas (core.common.cache_agregados): se invalidan al
+# escribir en los modelos de los que dependen; el TTL solo libera entradas que ya nadie pide.
+CACHE_AGREGADOS_TTL = int(os.getenv('CACHE_AGREGADOS_TTL', str(60 * 60 * 24)))  # segundos
+
+# Consultas SQL más lentas que el umbral (0 = desactivado) van a logs/consultas_lentas.log con la
+# vista que las originó; una fracción de los SELECT lentos incluye EXPLAIN (ANALYZE, BUFFERS).
+# Resumen: python manage.py consultas_lentas
+CONSULTAS_LENTAS_UMBRAL_MS = float(os.getenv('CONSULTAS_LENTAS_UMBRAL_MS', '0'))
+CONSULTAS_LENTAS_EXPLAIN_MUESTREO = float(os.getenv('CONSULTAS_LENTAS_EXPLAIN_MUESTREO', '0.1'))
+CONSULTAS_LENTAS_ARCHIVO = os.path.join(BASE_DIR, 'logs', 'consultas_lentas.log')
+
+# Perfiles guardados con ?_profile=guardar (core.common.perfilamiento; solo usuarios staff)
+PERFILAMIENTO_DIRECTORIO = os.getenv('PERFILAMIENTO_DIRECTORIO') or os.path.join(BASE_DIR, 'logs', 'perfiles')
+
+# Partes de subidas reanudables en curso (fuera de MEDIA_ROOT: nginx no debe servirlas)
+SUBIDAS_ROOT = os.getenv('SUBIDAS_ROOT', os.path.join(BASE_DIR, 'subidas'))
+
 # Configuración de Logging
 LOGGING = {
     'version': 1,
@@ -140,6 +229,10 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'mensaje': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'console': {
@@ -151,6 +244,12 @@ LOGGING = {
             'filename': os.path.join(BASE_DIR, 'logs', 'django.log'),
             'formatter': 'verbose',
         },
+        'consultas_lentas': {
+            'class': 'logging.FileHandler',
+            'filename': CONSULTAS_LENTAS_ARCHIVO,
+            'formatter': 'mensaje',
+            'delay': True,
+        },
     },
     'root': {
         'handlers': ['console', 'file'],
@@ -167,6 +266,12 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        # Una línea JSON por consulta lenta, leída por el comando consultas_lentas
+        'core.common.consultas_lentas': {
+            'handlers': ['consultas_lentas'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -1,18 +1,18 @@
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
+from finanzas.views import media_protegida
+from core.views import BootstrapView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Datos de referencia para el inicio de la PWA
+    path('api/bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('api/finanzas/', include('finanzas.urls')),
     path('api/inventario/', include('inventario.urls')),
     path('api/calendario/', include('calendario.urls')),
     path('api/produccion/', include('produccion.urls')),
     path('api/salud/', include('salud.urls')),
     path('api/alimentacion/', include('alimentacion.urls')),
-]
-
-# Esto permite ver las fotos de los recibos en el navegador durante desarrollo
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Archivos subidos: requieren autenticación; en producción los envía nginx (X-Accel-Redirect)
+    path('media/<path:ruta>', media_protegida, name='media_protegida'),
+]
\ No newline at end of file
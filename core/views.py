@@ -0,0 +1,31 @@
+"""
+Vistas transversales a todos los módulos.
+"""
+from django.utils.http import parse_etags
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.common.models import VersionDatos
+from .bootstrap import VERSION_BOOTSTRAP, obtener_datos, perfil_usuario, etag_bootstrap
+
+
+class BootstrapView(APIView):
+    """
+    Datos de referencia para el inicio de la PWA en una sola respuesta:
+    categorías, proveedores, proyectos, galpones, lotes activos, fórmulas,
+    tipos de evento, materiales y el perfil del usuario.
+    Con If-None-Match vigente responde 304 sin cuerpo.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        version = VersionDatos.actual(VERSION_BOOTSTRAP)
+        perfil = perfil_usuario(request.user)
+        etag = etag_bootstrap(version, perfil)
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response({'version': version, 'usuario': perfil, **obtener_datos(version)}, headers=headers)
@@ -3,3 +3,18 @@ from django.apps import AppConfig
 
 class FinanzasConfig(AppConfig):
     name = 'finanzas'
+
+    def ready(self):
+        from django.contrib.auth.models import Group, User
+        from core.common.cache_agregados import observar_modelos
+        from .models import (
+            Album, CarpetaDocumento, Categoria, Comprobante, Documento, FotoAlbum, Gasto,
+            Proveedor, Proyecto, ReporteJob, Socio
+        )
+
+        # Invalidan resumen_mensual, las representaciones cacheadas de proveedores y socios
+        # y los ETag de los listados
+        observar_modelos(
+            Gasto, Comprobante, Proyecto, Categoria, Proveedor, Socio, Album, FotoAlbum,
+            CarpetaDocumento, Documento, ReporteJob, User, Group
+        )
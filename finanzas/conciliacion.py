@@ -0,0 +1,273 @@
+"""
+Conciliación de extractos bancarios (CSV) contra los gastos de un proyecto.
+Los gastos se cargan con una sola consulta y se indexan en memoria: por número
+de referencia y por monto, con las fechas ordenadas para buscar con bisect
+los candidatos dentro de la ventana de tolerancia.
+"""
+import csv
+import io
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from core.common.exceptions import ValidacionError
+from .models import Gasto
+
+
+TOLERANCIA_DIAS_DEFAULT = 3
+TOLERANCIA_DIAS_MAXIMA = 15
+MAX_LINEAS_EXTRACTO = 20000
+# Cota de los montos del extracto (Gasto.monto admite 10 dígitos)
+MONTO_MAXIMO_EXTRACTO = Decimal('1e12')
+
+FORMATOS_FECHA = ['%d/%m/%Y', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%y', '%d.%m.%Y']
+
+# Nombres de columna aceptados (normalizados: minúsculas, sin tildes ni signos)
+COLUMNAS = {
+    'fecha': ['fecha', 'fecha operacion', 'fecha transaccion', 'fecha valor'],
+    'monto': ['monto', 'importe', 'monto bs', 'importe bs'],
+    'debito': ['debito', 'debitos', 'cargo', 'cargos', 'retiro', 'retiros'],
+    'referencia': ['nro referencia', 'referencia', 'nro', 'numero', 'nro documento', 'documento', 'comprobante'],
+    'descripcion': ['descripcion', 'concepto', 'glosa', 'detalle'],
+}
+
+
+def _normalizar_texto(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', ' ', texto.lower()).strip()
+
+
+def normalizar_referencia(referencia):
+    """Referencia comparable: letras y dígitos en mayúsculas, sin ceros a la izquierda en los números."""
+    return re.sub(r'(?<![0-9])0+(?=[0-9])', '', re.sub(r'[^A-Z0-9]', '', (referencia or '').upper()))
+
+
+def _parsear_monto(texto):
+    """
+    Convierte montos con formato bancario a Decimal.
+    Acepta '1.234,56', '1,234.56', '1234.56', '-50,00', '(50.00)' y prefijo 'Bs'.
+    """
+    texto = (texto or '').strip().replace('Bs', '').replace('BOB', '').replace(' ', '')
+    if not texto:
+        return None
+    negativo = texto.startswith('(') and texto.endswith(')')
+    texto = texto.strip('()')
+
+    if ',' in texto and '.' in texto:
+        decimal = ',' if texto.rfind(',') > texto.rfind('.') else '.'
+        miles = '.' if decimal == ',' else ','
+        texto = texto.replace(miles, '').replace(decimal, '.')
+    elif ',' in texto:
+        # '50,00' es decimal; '1,234' es separador de miles
+        texto = texto.replace(',', '.') if re.search(r',\d{1,2}$', texto) else texto.replace(',', '')
+
+    try:
+        monto = Decimal(texto)
+    except InvalidOperation:
+        raise ValueError(f"Monto inválido: {texto}")
+    # Decimal acepta 'NaN', 'Infinity' y exponentes enormes ('1e999999')
+    if not monto.is_finite() or abs(monto) >= MONTO_MAXIMO_EXTRACTO:
+        raise ValueError(f"Monto inválido: {texto}")
+    return -monto if negativo else monto
+
+
+def _parsear_fecha(texto):
+    texto = (texto or '').strip()
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha inválida: {texto}")
+
+
+def leer_extracto(archivo) -> dict:
+    """
+    Lee un extracto bancario CSV (separador ',' o ';', UTF-8 o Latin-1).
+    Los montos negativos (o la columna de débitos) son los egresos a conciliar;
+    los créditos se ignoran.
+
+    Args:
+        archivo: Archivo subido (UploadedFile)
+
+    Returns:
+        dict: {'lineas': [...], 'ignoradas': int, 'errores': [{'linea', 'error'}]}
+
+    Raises:
+        ValidacionError: Si el archivo no tiene las columnas mínimas (fecha y monto)
+    """
+    contenido = archivo.read()
+    try:
+        texto = contenido.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        texto = contenido.decode('latin-1')
+
+    try:
+        dialecto = csv.Sniffer().sniff(texto[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    lector = csv.reader(io.StringIO(texto), dialecto)
+
+    encabezado = [_normalizar_texto(columna) for columna in next(lector, [])]
+    indices = {}
+    for campo, alias in COLUMNAS.items():
+        for posicion, columna in enumerate(encabezado):
+            if columna in alias:
+                indices[campo] = posicion
+                break
+    if 'fecha' not in indices or not ({'monto', 'debito'} & indices.keys()):
+        raise ValidacionError(
+            "El extracto debe tener columnas de fecha y monto (o débito)",
+            detalle={'columnas_encontradas': encabezado}
+        )
+
+    def _valor(fila, campo):
+        posicion = indices.get(campo)
+        return fila[posicion] if posicion is not None and posicion < len(fila) else ''
+
+    lineas, errores, ignoradas = [], [], 0
+    for numero, fila in enumerate(lector, start=2):
+        if not any(celda.strip() for celda in fila):
+            continue
+        if len(lineas) >= MAX_LINEAS_EXTRACTO:
+            raise ValidacionError(f"El extracto supera el máximo de {MAX_LINEAS_EXTRACTO} líneas")
+        try:
+            fecha = _parsear_fecha(_valor(fila, 'fecha'))
+            if 'monto' in indices:
+                monto = _parsear_monto(_valor(fila, 'monto'))
+                egreso = monto is not None and monto < 0
+            else:
+                monto = _parsear_monto(_valor(fila, 'debito'))
+                egreso = monto is not None and monto != 0
+        except (ValueError, InvalidOperation) as e:
+            errores.append({'linea': numero, 'error': str(e)})
+            continue
+
+        if monto is None or monto == 0:
+            ignoradas += 1
+            continue
+        lineas.append({
+            'linea': numero,
+            'fecha': fecha,
+            'monto': abs(monto),
+            'referencia': _valor(fila, 'referencia').strip(),
+            'descripcion': _valor(fila, 'descripcion').strip(),
+            'egreso': egreso,
+        })
+
+    # Con columna de monto con signo: si no hay negativos, el banco exporta egresos en positivo
+    if 'monto' in indices and not any(linea['egreso'] for linea in lineas):
+        for linea in lineas:
+            linea['egreso'] = True
+    ignoradas += sum(1 for linea in lineas if not linea['egreso'])
+    lineas = [linea for linea in lineas if linea['egreso']]
+
+    return {'lineas': lineas, 'ignoradas': ignoradas, 'errores': errores}
+
+
+def _centavos(monto):
+    return int(monto * 100)
+
+
+def conciliar(proyecto, lineas, tolerancia_dias=TOLERANCIA_DIAS_DEFAULT) -> dict:
+    """
+    Empareja líneas del extracto con gastos del proyecto (cada gasto con una sola línea).
+
+    1. Misma referencia y mismo monto (la fecha puede diferir).
+    2. Mismo monto y fecha dentro de ±tolerancia_dias: si hay un único candidato
+       libre o uno solo a la menor distancia en días, se concilia; si no, es ambiguo.
+
+    Args:
+        proyecto: Instancia de Proyecto
+        lineas: Lista retornada por leer_extracto()['lineas']
+        tolerancia_dias: Días de diferencia admitidos entre banco y registro
+
+    Returns:
+        dict: {'conciliados', 'ambiguos', 'sin_conciliar'}
+    """
+    if not lineas:
+        return {'conciliados': [], 'ambiguos': [], 'sin_conciliar': []}
+
+    tolerancia = timedelta(days=tolerancia_dias)
+    desde = min(linea['fecha'] for linea in lineas) - tolerancia
+    hasta = max(linea['fecha'] for linea in lineas) + tolerancia
+
+    # Una sola consulta: los gastos del proyecto en el rango de fechas del extracto
+    gastos = {}
+    por_referencia = {}
+    por_monto = {}
+    for gasto_id, fecha, monto, referencia in Gasto.objects.filter(
+        proyecto=proyecto, eliminado=False, fecha__gte=desde, fecha__lte=hasta
+    ).values_list('id', 'fecha', 'monto', 'nro_referencia').iterator(chunk_size=5000):
+        gastos[gasto_id] = (fecha, monto, referencia)
+        clave_referencia = normalizar_referencia(referencia)
+        if clave_referencia:
+            por_referencia.setdefault((clave_referencia, _centavos(monto)), []).append(gasto_id)
+        por_monto.setdefault(_centavos(monto), []).append((fecha.toordinal(), gasto_id))
+    for candidatos in por_monto.values():
+        candidatos.sort()
+
+    usados = set()
+    resultado = [None] * len(lineas)
+
+    # Pasada 1: coincidencia por referencia
+    for i, linea in enumerate(lineas):
+        clave = (normalizar_referencia(linea['referencia']), _centavos(linea['monto']))
+        if not clave[0]:
+            continue
+        libres = [gasto_id for gasto_id in por_referencia.get(clave, []) if gasto_id not in usados]
+        if libres:
+            gasto_id = min(libres, key=lambda g: abs((gastos[g][0] - linea['fecha']).days))
+            usados.add(gasto_id)
+            resultado[i] = ('conciliado', 'referencia', [gasto_id])
+
+    # Pasada 2: monto + ventana de fechas (bisect sobre las fechas ordenadas del monto)
+    for i, linea in enumerate(lineas):
+        if resultado[i] is not None:
+            continue
+        candidatos = por_monto.get(_centavos(linea['monto']), [])
+        dia = linea['fecha'].toordinal()
+        inicio = bisect_left(candidatos, (dia - tolerancia_dias, 0))
+        fin = bisect_right(candidatos, (dia + tolerancia_dias, float('inf')))
+        libres = [(abs(ordinal - dia), gasto_id) for ordinal, gasto_id in candidatos[inicio:fin]
+                  if gasto_id not in usados]
+        if not libres:
+            resultado[i] = ('sin_conciliar', None, [])
+            continue
+        libres.sort()
+        if len(libres) == 1 or libres[0][0] < libres[1][0]:
+            usados.add(libres[0][1])
+            resultado[i] = ('conciliado', 'monto_fecha', [libres[0][1]])
+        else:
+            resultado[i] = ('ambiguo', None, [gasto_id for _, gasto_id in libres])
+
+    salida = {'conciliados': [], 'ambiguos': [], 'sin_conciliar': []}
+    for linea, (estado, regla, gasto_ids) in zip(lineas, resultado):
+        datos_linea = {
+            'linea': linea['linea'],
+            'fecha': linea['fecha'].isoformat(),
+            'monto': str(linea['monto']),
+            'referencia': linea['referencia'],
+            'descripcion': linea['descripcion'],
+        }
+        if estado == 'conciliado':
+            salida['conciliados'].append({**datos_linea, 'regla': regla, 'gasto_id': gasto_ids[0]})
+        elif estado == 'ambiguo':
+            salida['ambiguos'].append({**datos_linea, 'candidatos': gasto_ids})
+        else:
+            salida['sin_conciliar'].append({
+                **datos_linea,
+                'gasto_propuesto': {
+                    'proyecto': proyecto.pk,
+                    'monto': str(linea['monto']),
+                    'fecha': linea['fecha'].isoformat(),
+                    'descripcion': (linea['descripcion'] or f"Movimiento bancario {linea['referencia']}".strip())[:255],
+                    'nro_referencia': linea['referencia'][:100],
+                    'metodo_pago': 'TRANSFERENCIA',
+                    'es_retroactivo': True,
+                    'notas_contexto': f"Propuesto por conciliación bancaria (línea {linea['linea']})",
+                },
+            })
+    return salida
@@ -62,3 +62,22 @@ COLOR_OK_PDF = (0, 128, 0)  # Verde
 # Límite de descripción en reportes PDF
 MAX_DESCRIPCION_PDF = 30
 MAX_PROVEEDOR_PDF = 20
+
+# Minutos en PROCESANDO tras los que se da por abandonado un reporte (worker caído)
+MINUTOS_LIMITE_PROCESANDO_REPORTE = 15
+
+
+# ============================================================================
+# CONFIGURACIÓN DE SUBIDAS POR PARTES
+# ============================================================================
+
+# Tamaño de cada parte (chunk) de una subida reanudable
+TAMANO_CHUNK_DEFAULT = 2 * 1024 * 1024  # 2 MB
+TAMANO_CHUNK_MINIMO = 256 * 1024  # 256 KB
+TAMANO_CHUNK_MAXIMO = 8 * 1024 * 1024  # 8 MB (debe caber en client_max_body_size de nginx)
+
+# Tamaño máximo del archivo completo
+TAMANO_MAXIMO_SUBIDA = 200 * 1024 * 1024  # 200 MB
+
+# Horas sin recibir partes tras las que una sesión de subida expira
+HORAS_EXPIRACION_SUBIDA = 24
@@ -0,0 +1,153 @@
+"""
+Benchmark del motor de reportes PDF sobre un proyecto sintético grande.
+Ejecutar: python manage.py benchmark_reporte_pdf [--gastos 50000] [--conservar] [--limite 600]
+"""
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from finanzas.models import Proyecto, Categoria, Gasto
+from finanzas.reportes import generar_pdf_gastos, normalizar_filtros
+
+
+def _rss_pico_mb():
+    """Pico de memoria residente del proceso actual (ru_maxrss está en KB en Linux)."""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _renderizar_y_medir(proyecto_id, destino, cola):
+    """Se ejecuta en un proceso hijo para medir el pico de RSS solo del renderizado."""
+    rss_inicial = _rss_pico_mb()
+    proyecto = Proyecto.objects.get(pk=proyecto_id)
+    inicio = time.perf_counter()
+    resumen = generar_pdf_gastos(proyecto, normalizar_filtros({}), destino)
+    segundos = time.perf_counter() - inicio
+    cola.put({
+        'filas': resumen['filas'],
+        'paginas': resumen['paginas'],
+        'segundos': round(segundos, 2),
+        'filas_por_segundo': round(resumen['filas'] / segundos) if segundos else None,
+        'rss_inicial_mb': rss_inicial,
+        'rss_pico_mb': _rss_pico_mb(),
+        'tamano_pdf_kb': round(os.path.getsize(destino) / 1024, 1),
+    })
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Genera un proyecto con muchos gastos y mide tiempo y pico de RSS del reporte PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--gastos',
+            type=int,
+            default=50000,
+            help='Cantidad de gastos del proyecto sintético (default: 50000)'
+        )
+        parser.add_argument(
+            '--conservar',
+            action='store_true',
+            help='No eliminar el proyecto sintético al terminar'
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=600,
+            help='Segundos máximos de renderizado antes de abortar (default: 600)'
+        )
+
+    def handle(self, *args, **options):
+        cantidad = options['gastos']
+
+        self.stdout.write(f"Creando proyecto sintético con {cantidad} gastos...")
+        proyecto = self._crear_proyecto(cantidad)
+
+        destino = os.path.join(tempfile.mkdtemp(), f'benchmark_{proyecto.pk}.pdf')
+        try:
+            # Proceso hijo: el pico de RSS no incluye la carga de datos sintéticos
+            connections.close_all()
+            contexto = multiprocessing.get_context('fork')
+            cola = contexto.Queue()
+            hijo = contexto.Process(target=_renderizar_y_medir, args=(proyecto.pk, destino, cola))
+            hijo.start()
+            resultado = self._esperar_resultado(hijo, cola, options['limite'])
+
+            resultado['gastos'] = cantidad
+            self.stdout.write(json.dumps(resultado, indent=2))
+        finally:
+            if os.path.exists(destino):
+                os.remove(destino)
+            if not options['conservar']:
+                proyecto.delete()
+                self.stdout.write("Proyecto sintético eliminado")
+
+    def _esperar_resultado(self, hijo, cola, limite):
+        """
+        Resultado del proceso hijo. Si muere sin enviarlo (p. ej. el OOM killer)
+        o excede el límite, falla en lugar de esperar para siempre.
+        """
+        vence = time.monotonic() + limite
+        while True:
+            try:
+                resultado = cola.get(timeout=1)
+                break
+            except queue.Empty:
+                if not hijo.is_alive():
+                    # Lo pudo haber enviado justo antes de terminar
+                    try:
+                        resultado = cola.get(timeout=1)
+                        break
+                    except queue.Empty:
+                        raise CommandError(f"El renderizado terminó sin resultado (exitcode {hijo.exitcode})")
+                if time.monotonic() > vence:
+                    hijo.terminate()
+                    hijo.join()
+                    raise CommandError(f"El renderizado superó el límite de {limite} s")
+        hijo.join()
+        if hijo.exitcode != 0:
+            raise CommandError(f"El renderizado terminó con exitcode {hijo.exitcode}")
+        return resultado
+
+    @transaction.atomic
+    def _crear_proyecto(self, cantidad):
+        """Crea el proyecto y sus gastos con bulk_create (sin pasar por Gasto.save)."""
+        aleatorio = random.Random(42)
+        categorias = [
+            Categoria.objects.get_or_create(nombre=nombre)[0]
+            for nombre in ['Materiales', 'Mano de Obra', 'Transporte', 'Equipamiento', 'Servicios']
+        ]
+        proyecto = Proyecto.objects.create(
+            nombre=f'Benchmark PDF {time.strftime("%Y%m%d%H%M%S")}',
+            presupuesto_objetivo=Decimal('9999999.99'),
+            fecha_inicio=date.today() - timedelta(days=5 * 365)
+        )
+
+        total = Decimal('0.00')
+        lote = []
+        for i in range(cantidad):
+            monto = Decimal(aleatorio.randint(100, 500000)) / 100
+            total += monto
+            lote.append(Gasto(
+                proyecto=proyecto,
+                categoria=aleatorio.choice(categorias),
+                monto=monto,
+                descripcion=f'Gasto sintético #{i} para medición de reportes',
+                fecha=proyecto.fecha_inicio + timedelta(days=i % (5 * 365)),
+            ))
+            if len(lote) == 5000:
+                Gasto.objects.bulk_create(lote)
+                lote = []
+        Gasto.objects.bulk_create(lote)
+
+        Proyecto.objects.filter(pk=proyecto.pk).update(total_gastado=total, cantidad_gastos=cantidad)
+        proyecto.refresh_from_db()
+        return proyecto
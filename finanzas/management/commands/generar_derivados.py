@@ -0,0 +1,145 @@
+"""
+Genera los derivados WebP (miniatura, mediana, original) de las imágenes subidas.
+Ejecutar: python manage.py generar_derivados [--modelo fotos] [--procesos 4] [--forzar]
+Como worker (elcampo-derivados.service): python manage.py generar_derivados --continuo
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from finanzas.models import Gasto, Comprobante, FotoAlbum
+
+
+MODELOS = {
+    'fotos': FotoAlbum,
+    'comprobantes': Comprobante,
+    'gastos': Gasto,
+}
+
+
+def _procesar_lote(nombre_modelo, ids, forzar):
+    """Se ejecuta en un proceso del pool: genera los derivados de un lote de registros."""
+    modelo = MODELOS[nombre_modelo]
+    generados = 0
+    for objeto in modelo.objects.filter(pk__in=ids):
+        objeto.actualizar_derivados(forzar=forzar)
+        if not objeto.derivados.get('error'):
+            generados += 1
+    return len(ids), generados
+
+
+def _procesar_lote_en_pool(nombre_modelo, ids, forzar):
+    """Se ejecuta en un proceso del pool, que cierra sus conexiones al terminar."""
+    try:
+        return _procesar_lote(nombre_modelo, ids, forzar)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Genera en paralelo los derivados WebP de las imágenes ya subidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modelo',
+            choices=list(MODELOS),
+            action='append',
+            help='Modelo a procesar (repetible). Por defecto todos'
+        )
+        parser.add_argument(
+            '--procesos',
+            type=int,
+            default=os.cpu_count(),
+            help='Cantidad de procesos del pool (default: núcleos disponibles)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=50,
+            help='Registros por tarea enviada al pool (default: 50)'
+        )
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Regenerar también los registros que ya tienen derivados'
+        )
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Queda esperando imágenes nuevas (worker de las subidas)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Con --continuo, segundos de espera cuando no hay imágenes pendientes (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        if not options['continuo']:
+            self.generar(options)
+            return
+
+        self.stdout.write("Worker de derivados iniciado")
+        while True:
+            close_old_connections()
+            if not self.generar({**options, 'forzar': False}, silencioso=True):
+                time.sleep(options['intervalo'])
+
+    def generar(self, options, silencioso=False):
+        """Procesa las imágenes pendientes. Retorna la cantidad procesada."""
+        tareas = []
+        for nombre in options['modelo'] or list(MODELOS):
+            modelo = MODELOS[nombre]
+            if options['forzar']:
+                queryset = modelo.objects.exclude(**{modelo.CAMPO_IMAGEN: ''}).exclude(
+                    **{f'{modelo.CAMPO_IMAGEN}__isnull': True}
+                )
+            else:
+                queryset = modelo.pendientes_derivados()
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+            if ids or not silencioso:
+                self.stdout.write(f"{nombre}: {len(ids)} imágenes pendientes")
+            for i in range(0, len(ids), options['lote']):
+                tareas.append((nombre, ids[i:i + options['lote']]))
+
+        if not tareas:
+            if not silencioso:
+                self.stdout.write(self.style.SUCCESS('No hay imágenes pendientes'))
+            return 0
+
+        inicio = time.perf_counter()
+        procesados = generados = 0
+        if (options['procesos'] or 1) <= 1 or len(tareas) == 1:
+            for nombre, ids in tareas:
+                cantidad, ok = _procesar_lote(nombre, ids, options['forzar'])
+                procesados += cantidad
+                generados += ok
+        else:
+            # Los procesos hijos abren sus propias conexiones
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options['procesos'],
+                mp_context=multiprocessing.get_context('fork')
+            ) as pool:
+                futuros = [
+                    pool.submit(_procesar_lote_en_pool, nombre, ids, options['forzar']) for nombre, ids in tareas
+                ]
+                for futuro in as_completed(futuros):
+                    cantidad, ok = futuro.result()
+                    procesados += cantidad
+                    generados += ok
+                    self.stdout.write(f"  {procesados} procesadas...")
+
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"Derivados generados para {generados} de {procesados} imágenes en {segundos:.1f}s"
+        ))
+        if generados < procesados:
+            self.stdout.write(self.style.WARNING(
+                f"{procesados - generados} archivos no pudieron procesarse (ver logs)"
+            ))
+        return procesados
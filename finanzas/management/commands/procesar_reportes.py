@@ -0,0 +1,47 @@
+"""
+Worker de reportes PDF. Corre como proceso independiente de gunicorn.
+Ejecutar: python manage.py procesar_reportes [--una-vez] [--intervalo 2]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from finanzas.services import ReporteService
+
+
+class Command(BaseCommand):
+    help = 'Procesa en segundo plano los reportes PDF solicitados (ReporteJob)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa los pendientes actuales y termina'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay reportes pendientes (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        una_vez = options['una_vez']
+        intervalo = options['intervalo']
+
+        self.stdout.write("Worker de reportes iniciado")
+        while True:
+            close_old_connections()
+            job = ReporteService.tomar_siguiente_pendiente()
+
+            if job is None:
+                if una_vez:
+                    break
+                time.sleep(intervalo)
+                continue
+
+            job = ReporteService.procesar(job)
+            if job.estado == 'COMPLETADO':
+                self.stdout.write(self.style.SUCCESS(f"  [OK] Reporte #{job.pk} generado"))
+            else:
+                self.stdout.write(self.style.ERROR(f"  [ERROR] Reporte #{job.pk}: {job.error}"))
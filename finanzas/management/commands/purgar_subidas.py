@@ -0,0 +1,17 @@
+"""
+Elimina las sesiones de subida por partes expiradas y sus partes en disco.
+Ejecutar: python manage.py purgar_subidas
+"""
+from django.core.management.base import BaseCommand
+from finanzas.services import SubidaService
+
+
+class Command(BaseCommand):
+    help = 'Purga las subidas reanudables expiradas y los directorios de partes huérfanos'
+
+    def handle(self, *args, **options):
+        resultado = SubidaService.purgar_expiradas()
+        self.stdout.write(self.style.SUCCESS(
+            f"Sesiones expiradas eliminadas: {resultado['sesiones']} | "
+            f"Directorios eliminados: {resultado['directorios']}"
+        ))
@@ -0,0 +1,37 @@
+"""
+Comando de Django para verificar los totales desnormalizados de los proyectos.
+Ejecutar: python manage.py reconciliar_totales [--corregir]
+"""
+from django.core.management.base import BaseCommand
+from finanzas.services import FinanzasService
+
+
+class Command(BaseCommand):
+    help = 'Compara Proyecto.total_gastado y Proyecto.cantidad_gastos contra los gastos registrados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corregir',
+            action='store_true',
+            help='Sobrescribe los contadores descuadrados con los valores reales'
+        )
+
+    def handle(self, *args, **options):
+        corregir = options['corregir']
+        diferencias = FinanzasService.reconciliar_totales(corregir=corregir)
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS("[OK] Todos los proyectos cuadran con sus gastos"))
+            return
+
+        for dif in diferencias:
+            self.stdout.write(self.style.WARNING(
+                f"  [DESCUADRE] {dif['proyecto_nombre']} (#{dif['proyecto_id']}): "
+                f"total {dif['total_registrado']} Bs -> {dif['total_real']} Bs, "
+                f"gastos {dif['cantidad_registrada']} -> {dif['cantidad_real']}"
+            ))
+
+        if corregir:
+            self.stdout.write(self.style.SUCCESS(f"\n[OK] {len(diferencias)} proyecto(s) corregido(s)"))
+        else:
+            self.stdout.write(f"\n{len(diferencias)} proyecto(s) descuadrado(s). Usar --corregir para ajustarlos.")
@@ -0,0 +1,42 @@
+# Generated by Django 6.0.1 on 2026-10-16 20:35
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def calcular_totales(apps, schema_editor):
+    """Inicializa los totales desnormalizados a partir de los gastos existentes."""
+    Proyecto = apps.get_model('finanzas', 'Proyecto')
+    Gasto = apps.get_model('finanzas', 'Gasto')
+
+    totales = Gasto.objects.filter(eliminado=False).values('proyecto_id').annotate(
+        total=Sum('monto'),
+        cantidad=Count('id')
+    ).order_by()
+    for fila in totales:
+        Proyecto.objects.filter(pk=fila['proyecto_id']).update(
+            total_gastado=fila['total'],
+            cantidad_gastos=fila['cantidad']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proyecto',
+            name='cantidad_gastos',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Cantidad de gastos no eliminados del proyecto'),
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='total_gastado',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, help_text='Suma de los gastos no eliminados del proyecto en Bs', max_digits=14),
+        ),
+        migrations.RunPython(calcular_totales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-16 20:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0002_proyecto_totales_desnormalizados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReporteJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado_en', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('eliminado', models.BooleanField(db_index=True, default=False)),
+                ('eliminado_en', models.DateTimeField(blank=True, null=True)),
+                ('filtros', models.JSONField(blank=True, default=dict, help_text='Filtros normalizados del reporte')),
+                ('clave_cache', models.CharField(db_index=True, help_text='Hash de proyecto + filtros + versión de datos', max_length=64)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('COMPLETADO', 'Completado'), ('ERROR', 'Error')], db_index=True, default='PENDIENTE', max_length=20)),
+                ('archivo', models.FileField(blank=True, upload_to='reportes/')),
+                ('nombre_archivo', models.CharField(blank=True, max_length=200)),
+                ('error', models.TextField(blank=True)),
+                ('iniciado_en', models.DateTimeField(blank=True, null=True)),
+                ('finalizado_en', models.DateTimeField(blank=True, null=True)),
+                ('eliminado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_eliminados', to=settings.AUTH_USER_MODEL)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reportes', to='finanzas.proyecto')),
+                ('solicitado_por', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reportes_solicitados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Reporte PDF',
+                'verbose_name_plural': 'Reportes PDF',
+                'ordering': ['-creado_en'],
+                'indexes': [models.Index(fields=['estado', 'creado_en'], name='finanzas_re_estado_914d99_idx'), models.Index(fields=['clave_cache', 'estado'], name='finanzas_re_clave_c_b1058b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0003_reportejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comprobante',
+            name='derivados',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Rutas de los derivados WebP de la imagen'),
+        ),
+        migrations.AddField(
+            model_name='fotoalbum',
+            name='derivados',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Rutas de los derivados WebP de la imagen'),
+        ),
+        migrations.AddField(
+            model_name='gasto',
+            name='derivados',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Rutas de los derivados WebP de la imagen'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-16 11:00
+
+import core.common.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+        ('finanzas', '0004_derivados_imagenes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comprobante',
+            name='imagen',
+            field=models.ImageField(storage=core.common.storage.AlmacenamientoDeduplicado(), upload_to='comprobantes/%Y/%m/'),
+        ),
+        migrations.AlterField(
+            model_name='documento',
+            name='archivo',
+            field=models.FileField(storage=core.common.storage.AlmacenamientoDeduplicado(), upload_to='documentos/%Y/%m/'),
+        ),
+        migrations.AlterField(
+            model_name='fotoalbum',
+            name='imagen',
+            field=models.ImageField(storage=core.common.storage.AlmacenamientoDeduplicado(), upload_to='galeria/%Y/%m/'),
+        ),
+        migrations.AlterField(
+            model_name='gasto',
+            name='imagen_comprobante',
+            field=models.ImageField(blank=True, help_text='Foto de la factura o comprobante del gasto', null=True, storage=core.common.storage.AlmacenamientoDeduplicado(), upload_to='comprobantes/%Y/%m/'),
+        ),
+    ]
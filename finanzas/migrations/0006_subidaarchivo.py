@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-16 12:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0005_almacenamiento_deduplicado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaArchivo',
+            fields=[
+                ('creado_en', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('eliminado', models.BooleanField(db_index=True, default=False)),
+                ('eliminado_en', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('destino', models.CharField(choices=[('DOCUMENTO', 'Documento'), ('FOTO', 'Foto de álbum')], max_length=20)),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('tamano_total', models.PositiveBigIntegerField(help_text='Tamaño del archivo completo en bytes')),
+                ('tamano_chunk', models.PositiveIntegerField(help_text='Tamaño de cada parte en bytes')),
+                ('sha256', models.CharField(blank=True, help_text='Checksum opcional del archivo completo, verificado al finalizar', max_length=64)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('COMPLETADA', 'Completada')], db_index=True, default='PENDIENTE', max_length=20)),
+                ('expira_en', models.DateTimeField(db_index=True)),
+                ('documento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='finanzas.documento')),
+                ('eliminado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_eliminados', to=settings.AUTH_USER_MODEL)),
+                ('foto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='finanzas.fotoalbum')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida de archivo',
+                'verbose_name_plural': 'Subidas de archivos',
+                'ordering': ['-creado_en'],
+                'indexes': [models.Index(fields=['estado', 'expira_en'], name='finanzas_su_estado_d31ff8_idx')],
+            },
+        ),
+    ]
@@ -1,9 +1,14 @@
-from django.db import models
+import math
+import uuid
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
-from django.db.models import Sum
+from django.db.models import Sum, F
+from django.utils import timezone
 from decimal import Decimal
-from core.common.models import BaseModel
+from core.common.models import BaseModel, ImagenConDerivadosModel
+from core.common.storage import almacenamiento_deduplicado
 
 
 # ============================================================================
@@ -80,6 +85,20 @@ class Proyecto(BaseModel):
     fecha_inicio = models.DateField(db_index=True)
     descripcion = models.TextField(blank=True)
 
+    # Totales desnormalizados, mantenidos por Gasto.save() / Gasto.delete()
+    total_gastado = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False,
+        help_text="Suma de los gastos no eliminados del proyecto en Bs"
+    )
+    cantidad_gastos = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Cantidad de gastos no eliminados del proyecto"
+    )
+
     class Meta:
         verbose_name = "Proyecto"
         verbose_name_plural = "Proyectos"
@@ -89,10 +108,23 @@ class Proyecto(BaseModel):
             models.Index(fields=['nombre']),
         ]
 
-    @property
-    def total_gastado(self):
-        """Suma total de todos los gastos del proyecto"""
-        return self.gastos.filter(eliminado=False).aggregate(total=Sum('monto'))['total'] or Decimal('0.00')
+    # Solo los escriben Gasto._aplicar_deltas y reconciliar_totales, con UPDATE
+    CAMPOS_TOTALES = ('total_gastado', 'cantidad_gastos')
+
+    def save(self, *args, **kwargs):
+        """
+        Al actualizar no escribe total_gastado ni cantidad_gastos salvo que update_fields
+        los nombre: los valores en memoria pueden ser anteriores a los deltas que aplicaron
+        los gastos registrados mientras tanto (API, admin, soft_delete, restore).
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            diferidos = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CAMPOS_TOTALES
+                and campo.attname not in diferidos
+            ]
+        super().save(*args, **kwargs)
 
     @property
     def saldo_restante(self):
@@ -110,7 +142,7 @@ class Proyecto(BaseModel):
 # MODELOS DE GASTOS
 # ============================================================================
 
-class Gasto(BaseModel):
+class Gasto(ImagenConDerivadosModel, BaseModel):
     """Registro de gastos realizados en proyectos"""
     
     METODO_PAGO = [
@@ -119,6 +151,8 @@ class Gasto(BaseModel):
         ('QR', 'Pago QR'),
     ]
 
+    CAMPO_IMAGEN = 'imagen_comprobante'
+
     # Relaciones
     proyecto = models.ForeignKey(
         Proyecto, 
@@ -182,6 +216,8 @@ class Gasto(BaseModel):
     )
     imagen_comprobante = models.ImageField(
         upload_to='comprobantes/%Y/%m/',
+        storage=almacenamiento_deduplicado,
+        db_index=True,
         blank=True,
         null=True,
         help_text="Foto de la factura o comprobante del gasto"
@@ -198,6 +234,62 @@ class Gasto(BaseModel):
             models.Index(fields=['metodo_pago']),
         ]
 
+    def save(self, *args, **kwargs):
+        """
+        Guarda el gasto y actualiza los totales desnormalizados del proyecto.
+        Cubre creación, edición, cambio de proyecto, soft delete y restauración.
+        La fila anterior se lee con select_for_update: dos ediciones simultáneas
+        del mismo gasto calculan su delta una después de la otra.
+        """
+        with transaction.atomic():
+            anterior = None
+            if self.pk:
+                anterior = Gasto.objects.select_for_update().filter(pk=self.pk).values(
+                    'proyecto_id', 'monto', 'eliminado'
+                ).first()
+
+            super().save(*args, **kwargs)
+
+            deltas = {}
+            if anterior and not anterior['eliminado']:
+                self._acumular_delta(deltas, anterior['proyecto_id'], -anterior['monto'], -1)
+            if not self.eliminado:
+                self._acumular_delta(deltas, self.proyecto_id, self.monto, 1)
+            self._aplicar_deltas(deltas)
+
+    def delete(self, *args, **kwargs):
+        """Elimina físicamente el gasto descontándolo de los totales del proyecto."""
+        with transaction.atomic():
+            anterior = Gasto.objects.select_for_update().filter(pk=self.pk).values(
+                'proyecto_id', 'monto', 'eliminado'
+            ).first()
+            resultado = super().delete(*args, **kwargs)
+
+            deltas = {}
+            if anterior and not anterior['eliminado']:
+                self._acumular_delta(deltas, anterior['proyecto_id'], -anterior['monto'], -1)
+            self._aplicar_deltas(deltas)
+        return resultado
+
+    @staticmethod
+    def _acumular_delta(deltas, proyecto_id, monto, cantidad):
+        total, cuenta = deltas.get(proyecto_id, (Decimal('0.00'), 0))
+        deltas[proyecto_id] = (total + Decimal(monto), cuenta + cantidad)
+
+    @staticmethod
+    def _aplicar_deltas(deltas):
+        """
+        Aplica los deltas con UPDATE atómicos (F expressions) sobre Proyecto.
+        También se aplican deltas en cero para que actualizado_en refleje
+        cualquier cambio en los gastos (lo usa la caché de reportes).
+        """
+        for proyecto_id, (total, cuenta) in deltas.items():
+            Proyecto.objects.filter(pk=proyecto_id).update(
+                total_gastado=F('total_gastado') + total,
+                cantidad_gastos=F('cantidad_gastos') + cuenta,
+                actualizado_en=timezone.now()
+            )
+
     def __str__(self):
         return f"{self.fecha} | {self.monto} Bs - {self.descripcion}"
 
@@ -205,7 +297,7 @@ class Gasto(BaseModel):
         return f"<Gasto: {self.monto} Bs - {self.categoria.nombre}>"
 
 
-class Comprobante(BaseModel):
+class Comprobante(ImagenConDerivadosModel, BaseModel):
     """Fotos/imágenes de comprobantes de gastos"""
     gasto = models.ForeignKey(
         Gasto, 
@@ -213,7 +305,7 @@ class Comprobante(BaseModel):
         related_name='fotos',
         db_index=True
     )
-    imagen = models.ImageField(upload_to='comprobantes/%Y/%m/')
+    imagen = models.ImageField(upload_to='comprobantes/%Y/%m/', storage=almacenamiento_deduplicado, db_index=True)
 
     class Meta:
         verbose_name = "Comprobante"
@@ -316,7 +408,7 @@ class Album(BaseModel):
         return f"<Album: {self.nombre}>"
 
 
-class FotoAlbum(BaseModel):
+class FotoAlbum(ImagenConDerivadosModel, BaseModel):
     """Fotos dentro de un álbum de la galería"""
     album = models.ForeignKey(
         Album, 
@@ -324,7 +416,7 @@ class FotoAlbum(BaseModel):
         related_name='fotos',
         db_index=True
     )
-    imagen = models.ImageField(upload_to='galeria/%Y/%m/')
+    imagen = models.ImageField(upload_to='galeria/%Y/%m/', storage=almacenamiento_deduplicado, db_index=True)
     titulo = models.CharField(max_length=100, blank=True)
     descripcion = models.CharField(max_length=255, blank=True)
     fecha_foto = models.DateField(
@@ -424,7 +516,7 @@ class Documento(BaseModel):
         db_index=True
     )
     nombre = models.CharField(max_length=150, db_index=True)
-    archivo = models.FileField(upload_to='documentos/%Y/%m/')
+    archivo = models.FileField(upload_to='documentos/%Y/%m/', storage=almacenamiento_deduplicado, db_index=True)
     descripcion = models.TextField(blank=True)
     fecha_documento = models.DateField(
         db_index=True,
@@ -452,4 +544,153 @@ class Documento(BaseModel):
         return f"{self.get_tipo_display()}: {self.nombre}"
 
     def __repr__(self):
-        return f"<Documento: {self.nombre} ({self.tipo})>"
\ No newline at end of file
+        return f"<Documento: {self.nombre} ({self.tipo})>"
+
+# ============================================================================
+# MODELOS DE REPORTES
+# ============================================================================
+
+class ReporteJob(BaseModel):
+    """
+    Solicitud de generación de un reporte PDF en segundo plano.
+    Lo procesa el comando `procesar_reportes`, fuera de los workers de gunicorn.
+    """
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('PROCESANDO', 'Procesando'),
+        ('COMPLETADO', 'Completado'),
+        ('ERROR', 'Error'),
+    ]
+
+    proyecto = models.ForeignKey(
+        Proyecto,
+        on_delete=models.CASCADE,
+        related_name='reportes',
+        db_index=True
+    )
+    solicitado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='reportes_solicitados'
+    )
+    filtros = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Filtros normalizados del reporte"
+    )
+    clave_cache = models.CharField(
+        max_length=64,
+        db_index=True,
+        help_text="Hash de proyecto + filtros + versión de datos"
+    )
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS,
+        default='PENDIENTE',
+        db_index=True
+    )
+    archivo = models.FileField(upload_to='reportes/', blank=True)
+    nombre_archivo = models.CharField(max_length=200, blank=True)
+    error = models.TextField(blank=True)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    finalizado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Reporte PDF"
+        verbose_name_plural = "Reportes PDF"
+        ordering = ['-creado_en']
+        indexes = [
+            models.Index(fields=['estado', 'creado_en']),
+            models.Index(fields=['clave_cache', 'estado']),
+        ]
+
+    def __str__(self):
+        return f"Reporte #{self.id} - {self.proyecto.nombre} ({self.estado})"
+
+    def __repr__(self):
+        return f"<ReporteJob: #{self.id} - {self.estado}>"
+
+
+# ============================================================================
+# MODELOS DE SUBIDAS REANUDABLES
+# ============================================================================
+
+class SubidaArchivo(BaseModel):
+    """
+    Sesión de subida por partes de un archivo grande (documento o foto).
+    Las partes se guardan en disco en SUBIDAS_ROOT/<id>/ y al finalizar se
+    ensamblan y se adjuntan a un Documento o FotoAlbum nuevo.
+    """
+    DESTINOS = [
+        ('DOCUMENTO', 'Documento'),
+        ('FOTO', 'Foto de álbum'),
+    ]
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('COMPLETADA', 'Completada'),
+    ]
+
+    # UUID: el id viaja en las URLs de las partes y no debe ser adivinable
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='subidas',
+        db_index=True
+    )
+    destino = models.CharField(max_length=20, choices=DESTINOS)
+    nombre_archivo = models.CharField(max_length=255)
+    tamano_total = models.PositiveBigIntegerField(help_text="Tamaño del archivo completo en bytes")
+    tamano_chunk = models.PositiveIntegerField(help_text="Tamaño de cada parte en bytes")
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Checksum opcional del archivo completo, verificado al finalizar"
+    )
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS,
+        default='PENDIENTE',
+        db_index=True
+    )
+    expira_en = models.DateTimeField(db_index=True)
+    documento = models.ForeignKey(
+        Documento,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    foto = models.ForeignKey(
+        FotoAlbum,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    class Meta:
+        verbose_name = "Subida de archivo"
+        verbose_name_plural = "Subidas de archivos"
+        ordering = ['-creado_en']
+        indexes = [
+            models.Index(fields=['estado', 'expira_en']),
+        ]
+
+    @property
+    def total_chunks(self):
+        """Cantidad de partes en que se divide el archivo."""
+        return max(1, math.ceil(self.tamano_total / self.tamano_chunk))
+
+    def tamano_esperado(self, numero):
+        """Tamaño en bytes que debe tener la parte `numero` (0-based)."""
+        if numero < self.total_chunks - 1:
+            return self.tamano_chunk
+        return self.tamano_total - self.tamano_chunk * (self.total_chunks - 1)
+
+    def __str__(self):
+        return f"Subida {self.nombre_archivo} ({self.estado})"
+
+    def __repr__(self):
+        return f"<SubidaArchivo: {self.id} - {self.estado}>"
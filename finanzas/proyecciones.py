@@ -0,0 +1,139 @@
+"""
+Proyección de consumo de presupuesto para todos los proyectos a la vez.
+Una consulta agrupada por (proyecto, fecha) alimenta una matriz proyectos x días
+sobre la que se calculan, vectorizadas con NumPy, las tasas de gasto, una regresión
+lineal del gasto diario y la fecha estimada de agotamiento del presupuesto.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Proyecto, Gasto
+
+
+# Ventana de días usada para tasas y tendencia
+VENTANA_DIAS_DEFAULT = 90
+VENTANA_DIAS_MINIMA = 14
+VENTANA_DIAS_MAXIMA = 365
+
+# Más allá de este horizonte se considera que el presupuesto no se agota
+HORIZONTE_MAXIMO_DIAS = 100 * 365
+
+
+def _regresion_lineal(matriz, pesos, x):
+    """
+    Mínimos cuadrados ponderados por fila: y = intercepto + pendiente * x.
+    Los pesos son 1 en los días en que el proyecto ya existía y 0 antes.
+
+    Returns:
+        tuple: (intercepto, pendiente), arrays de una posición por proyecto
+    """
+    n = pesos.sum(axis=1)
+    sx = (pesos * x).sum(axis=1)
+    sy = (pesos * matriz).sum(axis=1)
+    sxx = (pesos * x * x).sum(axis=1)
+    sxy = (pesos * x * matriz).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominador = n * sxx - sx * sx
+        pendiente = np.where(denominador > 0, (n * sxy - sx * sy) / denominador, 0.0)
+        intercepto = np.where(n > 0, (sy - pendiente * sx) / n, 0.0)
+    return intercepto, pendiente
+
+
+def _dias_hasta_agotar(saldo, velocidad, pendiente):
+    """
+    Días hasta que el gasto acumulado alcance el saldo, con gasto diario
+    v(t) = velocidad + pendiente * t. Resuelve velocidad*t + pendiente*t²/2 = saldo.
+    Retorna NaN donde el presupuesto no se agota con la tendencia actual.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lineal = np.where(velocidad > 0, saldo / velocidad, np.nan)
+        discriminante = velocidad ** 2 + 2 * pendiente * saldo
+        cuadratica = np.where(
+            discriminante >= 0,
+            (-velocidad + np.sqrt(np.maximum(discriminante, 0))) / pendiente,
+            np.nan
+        )
+        dias = np.where(np.abs(pendiente) < 1e-9, lineal, cuadratica)
+    dias = np.where(saldo <= 0, 0.0, dias)
+    return np.where((dias >= 0) & (dias <= HORIZONTE_MAXIMO_DIAS), dias, np.nan)
+
+
+def calcular_proyecciones(ventana_dias=VENTANA_DIAS_DEFAULT) -> list:
+    """
+    Tasas de gasto y proyección de agotamiento de todos los proyectos no eliminados.
+
+    Args:
+        ventana_dias: Días hacia atrás (incluido hoy) usados para tasas y tendencia
+
+    Returns:
+        list: Un dict por proyecto con gasto_diario, gasto_semanal, tendencia_diaria,
+            velocidad_ajustada, dias_hasta_agotamiento y fecha_agotamiento
+    """
+    hoy = timezone.localdate()
+    desde = hoy - timedelta(days=ventana_dias - 1)
+
+    proyectos = list(Proyecto.objects.filter(eliminado=False).order_by('id').values(
+        'id', 'nombre', 'presupuesto_objetivo', 'total_gastado', 'fecha_inicio'
+    ))
+    if not proyectos:
+        return []
+    fila_de = {p['id']: i for i, p in enumerate(proyectos)}
+
+    # Una sola consulta agrupada por (proyecto, fecha) dentro de la ventana
+    serie = Gasto.objects.filter(
+        eliminado=False,
+        proyecto__eliminado=False,
+        fecha__gte=desde,
+        fecha__lte=hoy
+    ).values('proyecto_id', 'fecha').annotate(total=Sum('monto')).order_by()
+
+    matriz = np.zeros((len(proyectos), ventana_dias))
+    filas, columnas, montos = [], [], []
+    for registro in serie:
+        filas.append(fila_de[registro['proyecto_id']])
+        columnas.append((registro['fecha'] - desde).days)
+        montos.append(float(registro['total']))
+    np.add.at(matriz, (np.array(filas, dtype=int), np.array(columnas, dtype=int)), montos)
+
+    # Días de la ventana en que cada proyecto ya existía (o ya tenía gastos retroactivos)
+    x = np.arange(ventana_dias, dtype=float)
+    inicio = np.array([max((p['fecha_inicio'] - desde).days, 0) for p in proyectos], dtype=float)
+    con_gastos = matriz.any(axis=1)
+    inicio[con_gastos] = np.minimum(inicio[con_gastos], np.argmax(matriz[con_gastos] > 0, axis=1))
+    pesos = (x[np.newaxis, :] >= inicio[:, np.newaxis]).astype(float)
+    dias_activos = pesos.sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gasto_diario = np.where(dias_activos > 0, matriz.sum(axis=1) / dias_activos, 0.0)
+    intercepto, pendiente = _regresion_lineal(matriz, pesos, x)
+    velocidad = np.maximum(intercepto + pendiente * x[-1], 0.0)
+
+    presupuesto = np.array([float(p['presupuesto_objetivo']) for p in proyectos])
+    gastado = np.array([float(p['total_gastado']) for p in proyectos])
+    saldo = presupuesto - gastado
+    dias_restantes = _dias_hasta_agotar(saldo, velocidad, pendiente)
+
+    resultado = []
+    for i, proyecto in enumerate(proyectos):
+        dias = dias_restantes[i]
+        agotamiento = None if np.isnan(dias) else int(np.ceil(dias))
+        resultado.append({
+            'proyecto_id': proyecto['id'],
+            'proyecto_nombre': proyecto['nombre'],
+            'presupuesto_total': str(proyecto['presupuesto_objetivo']),
+            'total_gastado': str(proyecto['total_gastado']),
+            'saldo_disponible': str(proyecto['presupuesto_objetivo'] - proyecto['total_gastado']),
+            'porcentaje_consumido': round(float(gastado[i] / presupuesto[i] * 100), 2) if presupuesto[i] > 0 else 0,
+            'gasto_diario': round(float(gasto_diario[i]), 2),
+            'gasto_semanal': round(float(gasto_diario[i]) * 7, 2),
+            'tendencia_diaria': round(float(pendiente[i]), 4),
+            'velocidad_ajustada': round(float(velocidad[i]), 2),
+            'dias_hasta_agotamiento': agotamiento,
+            'fecha_agotamiento': (hoy + timedelta(days=agotamiento)).isoformat() if agotamiento is not None else None,
+            'agotado': bool(saldo[i] <= 0),
+        })
+    return resultado
@@ -0,0 +1,290 @@
+"""
+Generación de reportes PDF de gastos por proyecto.
+Compartido entre la descarga síncrona (exportar_pdf) y el worker de reportes.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet
+
+from core.common.exceptions import ValidacionError
+from .models import Categoria, Gasto
+
+
+# Estilos construidos una sola vez por proceso y reutilizados entre reportes
+ESTILOS = getSampleStyleSheet()
+
+ANCHOS_DETALLE = [70, 230, 100, 80]
+ANCHOS_RESUMEN = [300, 150]
+ENCABEZADO_DETALLE = ['Fecha', 'Descripción', 'Categoría', 'Monto (Bs)']
+
+# Filas de detalle por tabla: una tabla por página aproximadamente
+FILAS_POR_TABLA = 40
+
+ESTILO_TABLA_DETALLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.green),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (2, -1), (-1, -1), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.whitesmoke, colors.white]),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+])
+
+ESTILO_TABLA_RESUMEN = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+
+
+def normalizar_filtros(params) -> dict:
+    """
+    Convierte los query params del reporte en un diccionario canónico.
+    Los atajos mes_actual / mes_anterior se resuelven a fechas concretas,
+    de modo que el mismo reporte siempre produce el mismo diccionario.
+
+    Args:
+        params: QueryDict o dict con fecha_inicio, fecha_fin, categoria,
+            mes_actual y mes_anterior
+
+    Returns:
+        dict: {'fecha_inicio', 'fecha_fin', 'categoria', 'periodo'}
+
+    Raises:
+        ValidacionError: Si alguna fecha o la categoría no son válidas
+    """
+    def _es_verdadero(valor):
+        return str(valor or '').lower() == 'true'
+
+    fecha_inicio = params.get('fecha_inicio') or None
+    fecha_fin = params.get('fecha_fin') or None
+    categoria = params.get('categoria') or None
+    periodo = None
+
+    hoy = timezone.localdate()
+    if _es_verdadero(params.get('mes_actual')):
+        periodo = 'mes_actual'
+        fecha_inicio = hoy.replace(day=1).isoformat()
+        fecha_fin = hoy.isoformat()
+    elif _es_verdadero(params.get('mes_anterior')):
+        periodo = 'mes_anterior'
+        ultimo_dia_mes_anterior = hoy.replace(day=1) - timedelta(days=1)
+        fecha_inicio = ultimo_dia_mes_anterior.replace(day=1).isoformat()
+        fecha_fin = ultimo_dia_mes_anterior.isoformat()
+
+    try:
+        if fecha_inicio:
+            fecha_inicio = date.fromisoformat(str(fecha_inicio)).isoformat()
+        if fecha_fin:
+            fecha_fin = date.fromisoformat(str(fecha_fin)).isoformat()
+    except ValueError:
+        raise ValidacionError("Las fechas deben tener el formato YYYY-MM-DD")
+
+    if categoria is not None:
+        try:
+            categoria = int(categoria)
+        except (TypeError, ValueError):
+            raise ValidacionError("El parámetro 'categoria' debe ser un ID numérico")
+
+    return {
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'categoria': categoria,
+        'periodo': periodo,
+    }
+
+
+def obtener_gastos_filtrados(proyecto, filtros):
+    """
+    Retorna el queryset de gastos del proyecto con los filtros normalizados aplicados.
+
+    Args:
+        proyecto: Instancia de Proyecto
+        filtros: dict retornado por normalizar_filtros()
+
+    Returns:
+        QuerySet: Gastos ordenados por fecha
+    """
+    gastos = Gasto.objects.filter(
+        proyecto=proyecto,
+        eliminado=False
+    ).order_by('fecha', 'id')
+
+    if filtros.get('fecha_inicio'):
+        gastos = gastos.filter(fecha__gte=filtros['fecha_inicio'])
+    if filtros.get('fecha_fin'):
+        gastos = gastos.filter(fecha__lte=filtros['fecha_fin'])
+    if filtros.get('categoria'):
+        gastos = gastos.filter(categoria_id=filtros['categoria'])
+    return gastos
+
+
+def nombre_archivo_reporte(proyecto, filtros) -> str:
+    """Nombre de descarga del PDF según el periodo filtrado."""
+    nombre_archivo = f'Reporte_{proyecto.nombre}'
+    if filtros.get('periodo') == 'mes_actual':
+        nombre_archivo += '_MesActual'
+    elif filtros.get('periodo') == 'mes_anterior':
+        nombre_archivo += '_MesAnterior'
+    return f'{nombre_archivo}.pdf'
+
+
+class _FlujoPerezoso(list):
+    """
+    Lista de flowables que se rellena desde un generador a medida que ReportLab la consume.
+    BaseDocTemplate.build() (reportlab 4.2, fijado en requirements.txt) consulta len() y
+    procesa flowables[0] en cada vuelta sobre la misma lista, así que solo hay en memoria
+    unas pocas tablas a la vez en lugar del reporte completo.
+
+    Si una versión de ReportLab copiara la lista, el reporte saldría truncado:
+    verificar_consumido() lo convierte en error en lugar de un PDF incompleto.
+    """
+    def __init__(self, generador, reserva=4):
+        super().__init__()
+        self._generador = generador
+        self._reserva = reserva
+        self.maximo = 0
+
+    def _rellenar(self):
+        while self._generador is not None and list.__len__(self) < self._reserva:
+            try:
+                self.append(next(self._generador))
+            except StopIteration:
+                self._generador = None
+        self.maximo = max(self.maximo, list.__len__(self))
+
+    def __len__(self):
+        self._rellenar()
+        return list.__len__(self)
+
+    def verificar_consumido(self):
+        """
+        Raises:
+            RuntimeError: Si build() terminó sin consumir el generador y la lista
+        """
+        if self._generador is not None or list.__len__(self):
+            raise RuntimeError(
+                "ReportLab no consumió el flujo de flowables en el lugar; "
+                "revisar _FlujoPerezoso con la versión instalada"
+            )
+
+
+def _tabla_detalle(filas, acumulado, etiqueta):
+    """Tabla de una porción del detalle, con encabezado y fila de acumulado."""
+    data = [ENCABEZADO_DETALLE] + filas + [['', '', etiqueta, f"{acumulado:,.2f}"]]
+    tabla = Table(data, colWidths=ANCHOS_DETALLE, repeatRows=1)
+    tabla.setStyle(ESTILO_TABLA_DETALLE)
+    return tabla
+
+
+def _flowables_reporte(proyecto, gastos, filtros_texto, resumen):
+    """
+    Genera los flowables del reporte en una sola pasada sobre los gastos.
+    El resumen por categoría y los totales se acumulan mientras se recorren las filas.
+    """
+    yield Paragraph(f"Reporte de Inversión: {proyecto.nombre}", ESTILOS['Title'])
+    yield Paragraph(f"Presupuesto Total: {proyecto.presupuesto_objetivo:,.2f} Bs", ESTILOS['Normal'])
+    yield Paragraph(f"Total Gastado: {proyecto.total_gastado:,.2f} Bs", ESTILOS['Normal'])
+    yield Paragraph(f"Saldo Disponible: {proyecto.saldo_restante:,.2f} Bs", ESTILOS['Normal'])
+    if filtros_texto:
+        yield Paragraph(f"Filtros: {', '.join(filtros_texto)}", ESTILOS['Italic'])
+    yield Spacer(1, 20)
+
+    # Detalle en tablas del tamaño de una página
+    yield Paragraph("Detalle de Gastos", ESTILOS['Heading2'])
+    por_categoria = {}
+    acumulado = Decimal('0.00')
+    filas = []
+    for fecha, descripcion, categoria, monto in gastos.values_list(
+        'fecha', 'descripcion', 'categoria__nombre', 'monto'
+    ).iterator(chunk_size=2000):
+        filas.append([
+            fecha.strftime('%d/%m/%Y'),
+            descripcion[:35],
+            categoria,
+            f"{monto:,.2f}"
+        ])
+        acumulado += monto
+        por_categoria[categoria] = por_categoria.get(categoria, Decimal('0.00')) + monto
+        resumen['filas'] += 1
+
+        if len(filas) == FILAS_POR_TABLA:
+            yield _tabla_detalle(filas, acumulado, 'Acumulado:')
+            filas = []
+
+    yield _tabla_detalle(filas, acumulado, 'TOTAL:')
+    resumen['total'] = acumulado
+
+    # Resumen por Categoría (calculado en la misma pasada)
+    if por_categoria:
+        yield Spacer(1, 20)
+        yield Paragraph("Resumen por Categoría", ESTILOS['Heading2'])
+        data_resumen = [['Categoría', 'Total (Bs)']]
+        for nombre, total in sorted(por_categoria.items(), key=lambda item: item[1], reverse=True):
+            data_resumen.append([nombre, f"{total:,.2f}"])
+        tabla_resumen = Table(data_resumen, colWidths=ANCHOS_RESUMEN, repeatRows=1)
+        tabla_resumen.setStyle(ESTILO_TABLA_RESUMEN)
+        yield tabla_resumen
+
+
+def renderizar_reporte(proyecto, gastos, destino, filtros_texto=None) -> dict:
+    """
+    Motor de renderizado de reportes de gastos con memoria acotada.
+    Recorre el queryset con un iterador y arma tablas de una página con encabezado
+    repetido, en lugar de una única tabla con todas las filas.
+    
+    Args:
+        proyecto: Instancia de Proyecto
+        gastos: QuerySet de Gasto ya filtrado y ordenado
+        destino: Ruta o file-like donde se escribe el PDF
+        filtros_texto: Lista opcional de textos de filtros para el encabezado
+        
+    Returns:
+        dict: {'filas', 'total', 'paginas'}
+    """
+    resumen = {'filas': 0, 'total': Decimal('0.00'), 'paginas': 0}
+    doc = SimpleDocTemplate(destino, pagesize=letter, pageCompression=1)
+    flujo = _FlujoPerezoso(_flowables_reporte(proyecto, gastos, filtros_texto, resumen))
+    doc.build(flujo)
+    flujo.verificar_consumido()
+    resumen['paginas'] = doc.page
+    return resumen
+
+
+def generar_pdf_gastos(proyecto, filtros, destino) -> dict:
+    """
+    Construye el reporte PDF de inversión de un proyecto.
+
+    Args:
+        proyecto: Instancia de Proyecto
+        filtros: dict retornado por normalizar_filtros()
+        destino: Ruta o file-like donde se escribe el PDF
+
+    Returns:
+        dict: {'filas', 'total', 'paginas'}
+    """
+    filtros_texto = []
+    if filtros.get('fecha_inicio'):
+        filtros_texto.append(f"Desde: {filtros['fecha_inicio']}")
+    if filtros.get('fecha_fin'):
+        filtros_texto.append(f"Hasta: {filtros['fecha_fin']}")
+    if filtros.get('categoria'):
+        nombre = Categoria.objects.filter(pk=filtros['categoria']).values_list('nombre', flat=True).first()
+        if nombre:
+            filtros_texto.append(f"Categoría: {nombre}")
+
+    gastos = obtener_gastos_filtrados(proyecto, filtros)
+    return renderizar_reporte(proyecto, gastos, destino, filtros_texto)
@@ -1,13 +1,27 @@
+# Python imports
+from decimal import Decimal
+
 # Django imports
-from django.contrib.auth.models import User
+from django.contrib.auth.models import Group, User
+from django.db.models import Count, Prefetch, Q, Sum
+from django.db.models.functions import Coalesce
 
 # Django REST Framework imports
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
 # Local imports
+from core.common.serializers import (
+    CamposDinamicosMixin, DerivadosImagenField, RepresentacionCacheadaListSerializer,
+    RepresentacionCacheadaMixin, urls_derivados
+)
 from .models import (
     Proyecto, Categoria, Gasto, Comprobante, Proveedor,
-    Socio, Album, FotoAlbum, CarpetaDocumento, Documento
+    Socio, Album, FotoAlbum, CarpetaDocumento, Documento, ReporteJob, SubidaArchivo
+)
+from .services import SubidaService
+from .constants import (
+    TAMANO_CHUNK_DEFAULT, TAMANO_CHUNK_MINIMO, TAMANO_CHUNK_MAXIMO, TAMANO_MAXIMO_SUBIDA
 )
 
 
@@ -32,8 +46,13 @@ class UserSerializer(serializers.ModelSerializer):
 # SERIALIZERS DE SOCIOS/FAMILIA
 # ============================================================================
 
-class SocioSerializer(serializers.ModelSerializer):
-    """Serializer para socios/familia del proyecto."""
+class SocioSerializer(RepresentacionCacheadaMixin, CamposDinamicosMixin, serializers.ModelSerializer):
+    """Serializer para socios/familia del proyecto. Cachea cada socio con su usuario anidado."""
+    versiones_representacion = (User, Group)
+    relaciones_campos = {
+        'usuario_detalle': ('usuario', 'usuario__groups'),
+        'nombre_completo': ('usuario',),
+    }
     usuario_detalle = UserSerializer(source='usuario', read_only=True)
     nombre_completo = serializers.SerializerMethodField()
     rol_display = serializers.CharField(source='get_rol_display', read_only=True)
@@ -45,6 +64,7 @@ class SocioSerializer(serializers.ModelSerializer):
             'rol', 'rol_display', 'telefono', 'parentesco', 
             'activo', 'fecha_registro'
         ]
+        list_serializer_class = RepresentacionCacheadaListSerializer
 
     def get_nombre_completo(self, obj):
         return obj.usuario.get_full_name() or obj.usuario.username
@@ -54,7 +74,7 @@ class SocioSerializer(serializers.ModelSerializer):
 # SERIALIZERS DE CATEGORÍAS Y COMPROBANTES
 # ============================================================================
 
-class CategoriaSerializer(serializers.ModelSerializer):
+class CategoriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para categorías de gastos."""
     class Meta:
         model = Categoria
@@ -63,26 +83,53 @@ class CategoriaSerializer(serializers.ModelSerializer):
 
 class ComprobanteSerializer(serializers.ModelSerializer):
     """Serializer para comprobantes/fotos de gastos."""
+    imagen_derivados = DerivadosImagenField()
+    subido_en = serializers.DateTimeField(source='creado_en', read_only=True)
+
     class Meta:
         model = Comprobante
-        fields = ['id', 'imagen', 'subido_en']
+        fields = ['id', 'imagen', 'imagen_derivados', 'subido_en']
 
 
 # ============================================================================
 # SERIALIZERS DE PROVEEDORES
 # ============================================================================
 
-class ProveedorSerializer(serializers.ModelSerializer):
-    """Serializer para proveedores con cálculos agregados."""
-    total_pagado = serializers.ReadOnlyField()
+class ProveedorSerializer(RepresentacionCacheadaMixin, CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Serializer para proveedores con cálculos agregados.
+    Los agregados se anotan en el queryset; sin anotación se calculan por proveedor.
+    La representación se cachea hasta que cambia el proveedor o algún gasto.
+    """
+    versiones_representacion = (Gasto,)
+    total_pagado = serializers.SerializerMethodField()
     cantidad_gastos = serializers.SerializerMethodField()
+    anotaciones_campos = {
+        'total_pagado': {
+            'total_pagado_anotado': Coalesce(
+                Sum('gastos__monto', filter=Q(gastos__eliminado=False)), Decimal('0.00')
+            ),
+        },
+        'cantidad_gastos': {
+            'cantidad_gastos_anotada': Count('gastos', filter=Q(gastos__eliminado=False)),
+        },
+    }
 
     class Meta:
         model = Proveedor
         fields = '__all__'
+        list_serializer_class = RepresentacionCacheadaListSerializer
+
+    def get_total_pagado(self, obj):
+        """Retorna el total pagado al proveedor."""
+        if hasattr(obj, 'total_pagado_anotado'):
+            return obj.total_pagado_anotado
+        return obj.total_pagado
 
     def get_cantidad_gastos(self, obj):
         """Retorna la cantidad de gastos asociados al proveedor."""
+        if hasattr(obj, 'cantidad_gastos_anotada'):
+            return obj.cantidad_gastos_anotada
         return obj.gastos.filter(eliminado=False).count()
 
 
@@ -90,12 +137,16 @@ class ProveedorSerializer(serializers.ModelSerializer):
 # SERIALIZERS DE GASTOS
 # ============================================================================
 
-class GastoSerializer(serializers.ModelSerializer):
-    """Serializer para gastos con información relacionada."""
+class GastoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Serializer para gastos con información relacionada.
+    ?expand=proyecto_detalle,categoria_detalle agrega el proyecto y la categoría completos.
+    """
     fotos = ComprobanteSerializer(many=True, read_only=True)
     categoria_nombre = serializers.ReadOnlyField(source='categoria.nombre')
     usuario_detalle = UserSerializer(source='usuario', read_only=True)
     proveedor_detalle = ProveedorSerializer(source='proveedor_rel', read_only=True)
+    imagen_comprobante_derivados = DerivadosImagenField()
 
     class Meta:
         model = Gasto
@@ -103,17 +154,35 @@ class GastoSerializer(serializers.ModelSerializer):
             'id', 'proyecto', 'categoria', 'categoria_nombre', 'usuario', 
             'usuario_detalle', 'monto', 'descripcion', 'fecha', 
             'proveedor_rel', 'proveedor_detalle', 'metodo_pago', 'nro_referencia', 
-            'es_retroactivo', 'notas_contexto', 'imagen_comprobante', 'fotos', 'creado_en'
+            'es_retroactivo', 'notas_contexto', 'imagen_comprobante',
+            'imagen_comprobante_derivados', 'fotos', 'creado_en'
         ]
 
+    campos_expandibles = {
+        'proyecto_detalle': lambda: ProyectoSerializer(source='proyecto', read_only=True),
+        'categoria_detalle': lambda: CategoriaSerializer(source='categoria', read_only=True),
+    }
+    relaciones_campos = {
+        'categoria_nombre': ('categoria',),
+        'categoria_detalle': ('categoria',),
+        'proyecto_detalle': ('proyecto',),
+        'usuario_detalle': ('usuario', 'usuario__groups'),
+        'proveedor_detalle': (
+            Prefetch(
+                'proveedor_rel',
+                queryset=Proveedor.objects.annotate(**ProveedorSerializer.todas_las_anotaciones())
+            ),
+        ),
+        'fotos': ('fotos',),
+    }
+
 
 # ============================================================================
 # SERIALIZERS DE PROYECTOS
 # ============================================================================
 
-class ProyectoSerializer(serializers.ModelSerializer):
+class ProyectoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para proyectos con cálculos de presupuesto."""
-    total_gastado = serializers.ReadOnlyField()
     saldo_restante = serializers.ReadOnlyField()
     porcentaje_consumido = serializers.SerializerMethodField()
 
@@ -121,8 +190,10 @@ class ProyectoSerializer(serializers.ModelSerializer):
         model = Proyecto
         fields = [
             'id', 'nombre', 'presupuesto_objetivo', 'fecha_inicio', 
-            'descripcion', 'total_gastado', 'saldo_restante', 'porcentaje_consumido'
+            'descripcion', 'total_gastado', 'cantidad_gastos',
+            'saldo_restante', 'porcentaje_consumido'
         ]
+        read_only_fields = ['total_gastado', 'cantidad_gastos']
 
     def get_porcentaje_consumido(self, obj):
         """Calcula el porcentaje del presupuesto consumido."""
@@ -136,14 +207,17 @@ class ProyectoSerializer(serializers.ModelSerializer):
 # SERIALIZERS DE GALERÍA
 # ============================================================================
 
-class FotoAlbumSerializer(serializers.ModelSerializer):
+class FotoAlbumSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para fotos de álbumes."""
+    relaciones_campos = {'subido_por_nombre': ('subido_por',)}
     subido_por_nombre = serializers.SerializerMethodField()
+    imagen_derivados = DerivadosImagenField()
+    fecha_subida = serializers.DateTimeField(source='creado_en', read_only=True)
 
     class Meta:
         model = FotoAlbum
         fields = [
-            'id', 'album', 'imagen', 'titulo', 'descripcion',
+            'id', 'album', 'imagen', 'imagen_derivados', 'titulo', 'descripcion',
             'fecha_foto', 'fecha_subida', 'subido_por', 'subido_por_nombre'
         ]
 
@@ -153,17 +227,22 @@ class FotoAlbumSerializer(serializers.ModelSerializer):
         return None
 
 
-class AlbumSerializer(serializers.ModelSerializer):
-    """Serializer para álbumes con fotos anidadas."""
-    fotos = FotoAlbumSerializer(many=True, read_only=True)
+class AlbumSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Serializer para el detalle de un álbum.
+    Las fotos no se anidan: se consultan paginadas en albumes/{id}/fotos/.
+    """
+    relaciones_campos = {'creado_por_nombre': ('creado_por',)}
     cantidad_fotos = serializers.ReadOnlyField()
     creado_por_nombre = serializers.SerializerMethodField()
+    fecha_creacion = serializers.DateTimeField(source='creado_en', read_only=True)
+    fotos_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Album
         fields = [
             'id', 'nombre', 'descripcion', 'fecha_creacion',
-            'creado_por', 'creado_por_nombre', 'cantidad_fotos', 'fotos'
+            'creado_por', 'creado_por_nombre', 'cantidad_fotos', 'fotos_url'
         ]
 
     def get_creado_por_nombre(self, obj):
@@ -171,10 +250,15 @@ class AlbumSerializer(serializers.ModelSerializer):
             return obj.creado_por.get_full_name() or obj.creado_por.username
         return None
 
+    def get_fotos_url(self, obj):
+        return reverse('album-fotos', args=[obj.pk], request=self.context.get('request'))
 
-class AlbumListSerializer(serializers.ModelSerializer):
+
+class AlbumListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de álbumes (sin fotos anidadas)."""
+    relaciones_campos = {'portada': ('fotos',)}
     cantidad_fotos = serializers.ReadOnlyField()
+    fecha_creacion = serializers.DateTimeField(source='creado_en', read_only=True)
     portada = serializers.SerializerMethodField()
 
     class Meta:
@@ -182,10 +266,10 @@ class AlbumListSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombre', 'descripcion', 'fecha_creacion', 'cantidad_fotos', 'portada']
 
     def get_portada(self, obj):
-        """Retorna la URL de la primera foto como portada."""
+        """Retorna la miniatura de la primera foto como portada."""
         primera_foto = obj.fotos.first()
         if primera_foto:
-            return primera_foto.imagen.url
+            return urls_derivados(primera_foto, self.context.get('request'))['miniatura']
         return None
 
 
@@ -193,11 +277,16 @@ class AlbumListSerializer(serializers.ModelSerializer):
 # SERIALIZERS DE DOCUMENTOS
 # ============================================================================
 
-class DocumentoSerializer(serializers.ModelSerializer):
+class DocumentoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para documentos."""
+    relaciones_campos = {
+        'subido_por_nombre': ('subido_por',),
+        'carpeta_nombre': ('carpeta',),
+    }
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
     subido_por_nombre = serializers.SerializerMethodField()
     carpeta_nombre = serializers.SerializerMethodField()
+    fecha_subida = serializers.DateTimeField(source='creado_en', read_only=True)
 
     class Meta:
         model = Documento
@@ -218,8 +307,13 @@ class DocumentoSerializer(serializers.ModelSerializer):
         return "Sin carpeta"
 
 
-class CarpetaDocumentoSerializer(serializers.ModelSerializer):
+class CarpetaDocumentoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para carpetas de documentos."""
+    relaciones_campos = {
+        'documentos': (
+            Prefetch('documentos', queryset=Documento.objects.select_related('subido_por', 'carpeta')),
+        ),
+    }
     documentos = DocumentoSerializer(many=True, read_only=True)
     cantidad_documentos = serializers.ReadOnlyField()
 
@@ -231,10 +325,73 @@ class CarpetaDocumentoSerializer(serializers.ModelSerializer):
         ]
 
 
-class CarpetaDocumentoListSerializer(serializers.ModelSerializer):
+class CarpetaDocumentoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de carpetas (sin documentos anidados)."""
     cantidad_documentos = serializers.ReadOnlyField()
 
     class Meta:
         model = CarpetaDocumento
-        fields = ['id', 'nombre', 'descripcion', 'icono', 'cantidad_documentos']
\ No newline at end of file
+        fields = ['id', 'nombre', 'descripcion', 'icono', 'cantidad_documentos']
+
+
+# ============================================================================
+# SERIALIZERS DE REPORTES
+# ============================================================================
+
+class ReporteJobSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """Serializer para el estado de un reporte PDF en segundo plano."""
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    url_descarga = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReporteJob
+        fields = [
+            'id', 'proyecto', 'estado', 'estado_display', 'filtros',
+            'nombre_archivo', 'error', 'url_descarga',
+            'creado_en', 'iniciado_en', 'finalizado_en'
+        ]
+        read_only_fields = fields
+
+    def get_url_descarga(self, obj):
+        """URL de descarga, solo cuando el PDF está listo."""
+        if obj.estado != 'COMPLETADO':
+            return None
+        return reverse('reportejob-descargar', args=[obj.pk], request=self.context.get('request'))
+
+
+# ============================================================================
+# SERIALIZERS DE SUBIDAS REANUDABLES
+# ============================================================================
+
+class SubidaArchivoSerializer(serializers.ModelSerializer):
+    """Serializer para crear y consultar sesiones de subida por partes."""
+    total_chunks = serializers.ReadOnlyField()
+    chunks_recibidos = serializers.SerializerMethodField()
+    tamano_chunk = serializers.IntegerField(
+        required=False,
+        min_value=TAMANO_CHUNK_MINIMO,
+        max_value=TAMANO_CHUNK_MAXIMO
+    )
+    tamano_total = serializers.IntegerField(min_value=1, max_value=TAMANO_MAXIMO_SUBIDA)
+
+    class Meta:
+        model = SubidaArchivo
+        fields = [
+            'id', 'destino', 'nombre_archivo', 'tamano_total', 'tamano_chunk', 'sha256',
+            'estado', 'total_chunks', 'chunks_recibidos', 'expira_en',
+            'documento', 'foto', 'creado_en'
+        ]
+        read_only_fields = ['id', 'estado', 'expira_en', 'documento', 'foto', 'creado_en']
+
+    def get_chunks_recibidos(self, obj):
+        return SubidaService.chunks_recibidos(obj)
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise serializers.ValidationError("Debe ser un hash SHA-256 en hexadecimal")
+        return value
+
+    def validate(self, attrs):
+        attrs.setdefault('tamano_chunk', TAMANO_CHUNK_DEFAULT)
+        return attrs
@@ -1,10 +1,39 @@
 """
 Servicios de lógica de negocio para el módulo de finanzas.
 """
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import shutil
+import uuid
+from datetime import timedelta
 from decimal import Decimal
-from django.db.models import Sum
-from .models import Proyecto, Gasto
+from typing import Iterator
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import Sum, Count, Max, Q
+from django.utils import timezone
+from core.common.cache_agregados import invalidar_modelos, nombre_version
+from core.common.exceptions import ValidacionError, NegocioError
+from core.common.imagenes import DIRECTORIO_DERIVADOS
+from core.common.models import VersionDatos
+from .models import (
+    Proyecto, Gasto, Categoria, Comprobante, Proveedor, Album, FotoAlbum, CarpetaDocumento, Documento,
+    ReporteJob, SubidaArchivo
+)
+from .constants import HORAS_EXPIRACION_SUBIDA, MINUTOS_LIMITE_PROCESANDO_REPORTE
 from .exceptions import PresupuestoExcedidoError
+from .reportes import generar_pdf_gastos, nombre_archivo_reporte
+from .proyecciones import calcular_proyecciones
+from .conciliacion import leer_extracto, conciliar
+
+logger = logging.getLogger(__name__)
 
 
 class FinanzasService:
@@ -21,11 +50,7 @@ class FinanzasService:
         Returns:
             Decimal: Saldo disponible
         """
-        total_gastado = proyecto.gastos.filter(eliminado=False).aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
-        return proyecto.presupuesto_objetivo - total_gastado
+        return proyecto.saldo_restante
     
     @staticmethod
     def validar_presupuesto_disponible(proyecto: Proyecto, monto_gasto: Decimal) -> bool:
@@ -53,6 +78,27 @@ class FinanzasService:
         
         return True
     
+    @staticmethod
+    def reservar_presupuesto(proyecto: Proyecto, monto_gasto: Decimal) -> Proyecto:
+        """
+        Bloquea la fila del proyecto y valida que el gasto quepa en el saldo.
+        Debe llamarse dentro de transaction.atomic(), junto con el INSERT del gasto,
+        para que dos registros simultáneos no puedan exceder el presupuesto.
+        
+        Args:
+            proyecto: Instancia de Proyecto
+            monto_gasto: Monto del gasto a reservar
+            
+        Returns:
+            Proyecto: Proyecto bloqueado con los totales vigentes
+            
+        Raises:
+            PresupuestoExcedidoError: Si no hay presupuesto suficiente
+        """
+        proyecto = Proyecto.objects.select_for_update().get(pk=proyecto.pk)
+        FinanzasService.validar_presupuesto_disponible(proyecto, monto_gasto)
+        return proyecto
+    
     @staticmethod
     def obtener_resumen_proyecto(proyecto: Proyecto) -> dict:
         """
@@ -64,10 +110,7 @@ class FinanzasService:
         Returns:
             dict: Resumen con totales y porcentajes
         """
-        total_gastado = proyecto.gastos.filter(eliminado=False).aggregate(
-            total=Sum('monto')
-        )['total'] or Decimal('0.00')
-        
+        total_gastado = proyecto.total_gastado
         saldo_disponible = proyecto.presupuesto_objetivo - total_gastado
         porcentaje_consumido = (total_gastado / proyecto.presupuesto_objetivo * 100) if proyecto.presupuesto_objetivo > 0 else 0
         
@@ -78,5 +121,562 @@ class FinanzasService:
             'total_gastado': str(total_gastado),
             'saldo_disponible': str(saldo_disponible),
             'porcentaje_consumido': round(float(porcentaje_consumido), 2),
-            'cantidad_gastos': proyecto.gastos.filter(eliminado=False).count()
+            'cantidad_gastos': proyecto.cantidad_gastos
         }
+
+    @staticmethod
+    def obtener_proyecciones_portafolio(ventana_dias: int) -> dict:
+        """
+        Tasas de gasto y proyección de agotamiento de todos los proyectos.
+        El resultado se cachea con una versión que cambia con cualquier escritura
+        de Gasto (Gasto.save/delete actualizan Proyecto.actualizado_en) o de Proyecto,
+        y con el día actual, de modo que no hace falta invalidarlo explícitamente.
+        
+        Args:
+            ventana_dias: Días hacia atrás usados para tasas y tendencia
+            
+        Returns:
+            dict: {'fecha', 'ventana_dias', 'proyectos': [...]}
+        """
+        version = Proyecto.objects.aggregate(
+            ultima_modificacion=Max('actualizado_en'),
+            cantidad=Count('id')
+        )
+        hoy = timezone.localdate()
+        clave = 'proyecciones:' + hashlib.sha256(json.dumps({
+            'ultima_modificacion': str(version['ultima_modificacion']),
+            'cantidad': version['cantidad'],
+            'hoy': hoy.isoformat(),
+            'ventana': ventana_dias,
+        }, sort_keys=True).encode('utf-8')).hexdigest()
+
+        resultado = cache.get(clave)
+        if resultado is None:
+            resultado = {
+                'fecha': hoy.isoformat(),
+                'ventana_dias': ventana_dias,
+                'proyectos': calcular_proyecciones(ventana_dias),
+            }
+            cache.set(clave, resultado, 60 * 60 * 24)
+        return resultado
+
+    @staticmethod
+    def conciliar_extracto(proyecto: Proyecto, archivo, tolerancia_dias: int) -> dict:
+        """
+        Concilia un extracto bancario CSV contra los gastos del proyecto.
+        No modifica datos: los movimientos sin gasto se devuelven como gastos
+        retroactivos propuestos para que el usuario los confirme.
+        
+        Args:
+            proyecto: Instancia de Proyecto
+            archivo: CSV subido
+            tolerancia_dias: Días de diferencia admitidos entre banco y registro
+            
+        Returns:
+            dict: {'resumen', 'conciliados', 'ambiguos', 'sin_conciliar', 'errores'}
+            
+        Raises:
+            ValidacionError: Si el CSV no tiene el formato esperado
+        """
+        extracto = leer_extracto(archivo)
+        resultado = conciliar(proyecto, extracto['lineas'], tolerancia_dias)
+        resultado['errores'] = extracto['errores']
+        resultado['resumen'] = {
+            'lineas': len(extracto['lineas']),
+            'conciliados': len(resultado['conciliados']),
+            'ambiguos': len(resultado['ambiguos']),
+            'sin_conciliar': len(resultado['sin_conciliar']),
+            'ignoradas': extracto['ignoradas'],
+            'con_error': len(extracto['errores']),
+            'tolerancia_dias': tolerancia_dias,
+        }
+        return resultado
+
+    @staticmethod
+    def reconciliar_totales(corregir: bool = False) -> list:
+        """
+        Compara los totales desnormalizados de cada Proyecto contra el libro de gastos.
+        
+        Args:
+            corregir: Si es True, sobrescribe los contadores con los valores reales
+            
+        Returns:
+            list: Diferencias encontradas (una entrada por proyecto descuadrado)
+        """
+        diferencias = []
+        with transaction.atomic():
+            # Con corregir se bloquean los proyectos antes de leer el libro
+            proyectos = Proyecto.objects.select_for_update() if corregir else Proyecto.objects.all()
+            proyectos = list(proyectos.only('id', 'nombre', 'total_gastado', 'cantidad_gastos'))
+
+            reales = {
+                fila['proyecto_id']: (fila['total'], fila['cantidad'])
+                for fila in Gasto.objects.filter(eliminado=False).values('proyecto_id').annotate(
+                    total=Sum('monto'),
+                    cantidad=Count('id')
+                ).order_by()
+            }
+
+            for proyecto in proyectos:
+                total_real, cantidad_real = reales.get(proyecto.id, (Decimal('0.00'), 0))
+                if proyecto.total_gastado == total_real and proyecto.cantidad_gastos == cantidad_real:
+                    continue
+
+                diferencias.append({
+                    'proyecto_id': proyecto.id,
+                    'proyecto_nombre': proyecto.nombre,
+                    'total_registrado': str(proyecto.total_gastado),
+                    'total_real': str(total_real),
+                    'cantidad_registrada': proyecto.cantidad_gastos,
+                    'cantidad_real': cantidad_real,
+                })
+                if corregir:
+                    Proyecto.objects.filter(pk=proyecto.pk).update(
+                        total_gastado=total_real,
+                        cantidad_gastos=cantidad_real,
+                        actualizado_en=timezone.now()
+                    )
+            if corregir and diferencias:
+                invalidar_modelos(Proyecto)
+
+        return diferencias
+
+
+class ReporteService:
+    """Servicio para la generación de reportes PDF en segundo plano."""
+
+    DIRECTORIO = 'reportes'
+
+    @staticmethod
+    def calcular_clave_cache(proyecto: Proyecto, filtros: dict) -> str:
+        """
+        Clave del artefacto PDF: proyecto + filtros normalizados + versión de datos.
+        La versión es Proyecto.actualizado_en, que se actualiza con cada cambio de sus gastos,
+        más las versiones (VersionDatos) de Categoria y Proveedor, cuyos cambios (p. ej. renombrar
+        una categoría del resumen) no pasan por los gastos.
+        
+        Args:
+            proyecto: Instancia de Proyecto
+            filtros: dict retornado por reportes.normalizar_filtros()
+            
+        Returns:
+            str: Hash SHA-256 en hexadecimal
+        """
+        contenido = json.dumps({
+            'proyecto': proyecto.pk,
+            'filtros': filtros,
+            'version': proyecto.actualizado_en.isoformat(),
+            'versiones': VersionDatos.actuales([nombre_version(Categoria), nombre_version(Proveedor)]),
+        }, sort_keys=True)
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def ruta_artefacto(proyecto_id: int, clave: str) -> str:
+        """Nombre relativo a MEDIA_ROOT del PDF cacheado."""
+        return f'{ReporteService.DIRECTORIO}/{proyecto_id}/{clave}.pdf'
+
+    @staticmethod
+    def solicitar_reporte(proyecto: Proyecto, filtros: dict, usuario=None) -> ReporteJob:
+        """
+        Registra una solicitud de reporte.
+        Si el PDF ya existe en disco para la misma clave se retorna completado;
+        si ya hay un trabajo en curso con la misma clave se reutiliza (salvo que
+        lleve en PROCESANDO más de MINUTOS_LIMITE_PROCESANDO_REPORTE).
+        
+        Args:
+            proyecto: Instancia de Proyecto
+            filtros: dict retornado por reportes.normalizar_filtros()
+            usuario: Usuario que solicita el reporte
+            
+        Returns:
+            ReporteJob: Trabajo nuevo, en curso o ya completado
+        """
+        clave = ReporteService.calcular_clave_cache(proyecto, filtros)
+        ruta = ReporteService.ruta_artefacto(proyecto.pk, clave)
+
+        en_curso = ReporteJob.objects.filter(
+            Q(estado='PENDIENTE') | Q(estado='PROCESANDO', iniciado_en__gte=ReporteService.limite_procesando()),
+            clave_cache=clave,
+            eliminado=False
+        ).first()
+        if en_curso:
+            return en_curso
+
+        job = ReporteJob(
+            proyecto=proyecto,
+            solicitado_por=usuario,
+            filtros=filtros,
+            clave_cache=clave,
+            nombre_archivo=nombre_archivo_reporte(proyecto, filtros)
+        )
+        if default_storage.exists(ruta):
+            ahora = timezone.now()
+            job.estado = 'COMPLETADO'
+            job.archivo.name = ruta
+            job.iniciado_en = ahora
+            job.finalizado_en = ahora
+        job.save()
+        return job
+
+    @staticmethod
+    def limite_procesando():
+        """Los trabajos iniciados antes de este momento y aún en PROCESANDO se dan por abandonados."""
+        return timezone.now() - timedelta(minutes=MINUTOS_LIMITE_PROCESANDO_REPORTE)
+
+    @staticmethod
+    def marcar_abandonados() -> int:
+        """
+        Pasa a ERROR los trabajos que un worker caído dejó en PROCESANDO.
+        No se reintentan: un reporte que tumba al worker lo volvería a tumbar.
+        Una nueva solicitud con la misma clave crea otro trabajo.
+        
+        Returns:
+            int: Cantidad de trabajos marcados
+        """
+        ahora = timezone.now()
+        marcados = ReporteJob.objects.filter(
+            estado='PROCESANDO',
+            iniciado_en__lt=ReporteService.limite_procesando(),
+            eliminado=False
+        ).update(
+            estado='ERROR',
+            error=f'El worker no terminó el reporte en {MINUTOS_LIMITE_PROCESANDO_REPORTE} minutos',
+            finalizado_en=ahora,
+            actualizado_en=ahora
+        )
+        if marcados:
+            invalidar_modelos(ReporteJob)
+        return marcados
+
+    @staticmethod
+    def tomar_siguiente_pendiente():
+        """
+        Marca como PROCESANDO el reporte pendiente más antiguo y lo retorna.
+        Usa SKIP LOCKED para que varios workers no tomen el mismo trabajo.
+        Antes marca como ERROR los trabajos abandonados en PROCESANDO.
+        
+        Returns:
+            ReporteJob | None: Trabajo tomado, o None si no hay pendientes
+        """
+        abandonados = ReporteService.marcar_abandonados()
+        if abandonados:
+            logger.warning(f'{abandonados} reporte(s) abandonados en PROCESANDO marcados como ERROR')
+
+        with transaction.atomic():
+            job = ReporteJob.objects.select_for_update(skip_locked=True).filter(
+                estado='PENDIENTE',
+                eliminado=False
+            ).order_by('creado_en').first()
+            if job is None:
+                return None
+            job.estado = 'PROCESANDO'
+            job.iniciado_en = timezone.now()
+            job.save(update_fields=['estado', 'iniciado_en', 'actualizado_en'])
+        return job
+
+    @staticmethod
+    def procesar(job: ReporteJob) -> ReporteJob:
+        """
+        Genera el PDF de un trabajo y lo guarda bajo MEDIA_ROOT con su clave.
+        El archivo se escribe en un temporal y se renombra, así una descarga
+        concurrente nunca ve un PDF a medias.
+        
+        Args:
+            job: ReporteJob en estado PROCESANDO
+            
+        Returns:
+            ReporteJob: Trabajo COMPLETADO o en ERROR
+        """
+        ruta = ReporteService.ruta_artefacto(job.proyecto_id, job.clave_cache)
+        try:
+            if not default_storage.exists(ruta):
+                destino = default_storage.path(ruta)
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                temporal = f'{destino}.{os.getpid()}.tmp'
+                try:
+                    generar_pdf_gastos(job.proyecto, job.filtros, temporal)
+                    os.replace(temporal, destino)
+                finally:
+                    if os.path.exists(temporal):
+                        os.remove(temporal)
+            job.archivo.name = ruta
+            job.estado = 'COMPLETADO'
+            job.error = ''
+        except Exception as e:
+            logger.exception(f'Error generando reporte #{job.pk}')
+            job.estado = 'ERROR'
+            job.error = str(e)
+
+        job.finalizado_en = timezone.now()
+        job.save(update_fields=['archivo', 'estado', 'error', 'finalizado_en', 'actualizado_en'])
+        return job
+
+
+class ArchivoEnsamblado(UploadedFile):
+    """
+    Archivo ensamblado en disco a partir de las partes de una subida.
+    Expone temporary_file_path() como TemporaryUploadedFile para que la
+    validación de imágenes lo lea desde disco y no lo cargue en memoria.
+    """
+    def __init__(self, ruta, nombre, tamano):
+        content_type, _ = mimetypes.guess_type(nombre)
+        super().__init__(open(ruta, 'rb'), name=nombre, content_type=content_type, size=tamano)
+        self._ruta = ruta
+
+    def temporary_file_path(self):
+        return self._ruta
+
+
+class SubidaService:
+    """Servicio para subidas reanudables por partes (chunks)."""
+
+    BLOQUE_LECTURA = 64 * 1024
+
+    @staticmethod
+    def directorio(subida: SubidaArchivo) -> str:
+        """Directorio en disco con las partes de la subida."""
+        return os.path.join(settings.SUBIDAS_ROOT, str(subida.pk))
+
+    @staticmethod
+    def nueva_expiracion():
+        """Momento de expiración de una sesión que acaba de recibir actividad."""
+        return timezone.now() + timedelta(hours=HORAS_EXPIRACION_SUBIDA)
+
+    @staticmethod
+    def chunks_recibidos(subida: SubidaArchivo) -> list:
+        """Números de las partes ya guardadas completas (0-based)."""
+        try:
+            nombres = os.listdir(SubidaService.directorio(subida))
+        except FileNotFoundError:
+            return []
+        return sorted(int(nombre[:-5]) for nombre in nombres if nombre.endswith('.part'))
+
+    @staticmethod
+    def guardar_chunk(subida: SubidaArchivo, numero: int, stream, longitud: int) -> None:
+        """
+        Escribe una parte directamente a disco, en bloques, sin cargarla en memoria.
+        Se escribe en un temporal y se renombra al final: reenviar una parte
+        (reintento) es idempotente y nunca deja una parte a medias.
+        
+        Args:
+            subida: Sesión de subida PENDIENTE y no expirada
+            numero: Número de parte (0-based)
+            stream: Objeto con read() (cuerpo de la petición)
+            longitud: Content-Length declarado
+            
+        Raises:
+            ValidacionError: Si el número o el tamaño de la parte no son válidos
+        """
+        if not 0 <= numero < subida.total_chunks:
+            raise ValidacionError(
+                f"Número de parte inválido: debe estar entre 0 y {subida.total_chunks - 1}"
+            )
+        esperado = subida.tamano_esperado(numero)
+        if longitud != esperado:
+            raise ValidacionError(f"La parte {numero} debe tener {esperado} bytes (recibidos {longitud})")
+
+        directorio = SubidaService.directorio(subida)
+        os.makedirs(directorio, exist_ok=True)
+        destino_final = os.path.join(directorio, f'{numero}.part')
+        temporal = os.path.join(directorio, f'{numero}.{uuid.uuid4().hex}.tmp')
+
+        escrito = 0
+        try:
+            with open(temporal, 'wb') as destino:
+                while escrito < esperado:
+                    bloque = stream.read(min(SubidaService.BLOQUE_LECTURA, esperado - escrito))
+                    if not bloque:
+                        break
+                    destino.write(bloque)
+                    escrito += len(bloque)
+            if escrito != esperado:
+                raise ValidacionError(f"La parte {numero} llegó incompleta ({escrito} de {esperado} bytes)")
+            os.replace(temporal, destino_final)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+        # Expiración deslizante: mientras lleguen partes la sesión sigue viva
+        SubidaArchivo.objects.filter(pk=subida.pk).update(expira_en=SubidaService.nueva_expiracion())
+
+    @staticmethod
+    def ensamblar(subida: SubidaArchivo) -> ArchivoEnsamblado:
+        """
+        Une las partes en un único archivo en disco y verifica el checksum si se informó.
+        
+        Returns:
+            ArchivoEnsamblado: Archivo listo para asignar a un FileField (cerrarlo al terminar)
+            
+        Raises:
+            ValidacionError: Si faltan partes o el checksum no coincide
+        """
+        faltantes = sorted(set(range(subida.total_chunks)) - set(SubidaService.chunks_recibidos(subida)))
+        if faltantes:
+            raise ValidacionError(
+                f"Faltan {len(faltantes)} partes por subir",
+                detalle={'chunks_faltantes': faltantes}
+            )
+
+        directorio = SubidaService.directorio(subida)
+        ruta = os.path.join(directorio, 'completo')
+        sha256 = hashlib.sha256()
+        with open(ruta, 'wb') as destino:
+            for numero in range(subida.total_chunks):
+                with open(os.path.join(directorio, f'{numero}.part'), 'rb') as origen:
+                    for bloque in iter(lambda: origen.read(1024 * 1024), b''):
+                        sha256.update(bloque)
+                        destino.write(bloque)
+
+        if subida.sha256 and sha256.hexdigest() != subida.sha256:
+            os.remove(ruta)
+            raise ValidacionError("El checksum del archivo no coincide con el informado al crear la subida")
+
+        return ArchivoEnsamblado(ruta, subida.nombre_archivo, subida.tamano_total)
+
+    @staticmethod
+    def bloquear_pendiente(subida: SubidaArchivo) -> SubidaArchivo:
+        """
+        Toma un lock sobre la sesión para finalizarla (llamar dentro de transaction.atomic).
+        
+        Raises:
+            NegocioError: Si la sesión ya fue finalizada
+        """
+        subida = SubidaArchivo.objects.select_for_update().get(pk=subida.pk)
+        if subida.estado != 'PENDIENTE':
+            raise NegocioError("La subida ya fue finalizada")
+        return subida
+
+    @staticmethod
+    def marcar_completada(subida: SubidaArchivo, instancia) -> None:
+        """Registra el Documento/FotoAlbum creado y borra las partes tras el commit."""
+        subida.estado = 'COMPLETADA'
+        if subida.destino == 'DOCUMENTO':
+            subida.documento = instancia
+        else:
+            subida.foto = instancia
+        subida.save(update_fields=['estado', 'documento', 'foto', 'actualizado_en'])
+
+        directorio = SubidaService.directorio(subida)
+        transaction.on_commit(lambda: shutil.rmtree(directorio, ignore_errors=True))
+
+    @staticmethod
+    def purgar_expiradas() -> dict:
+        """
+        Elimina las sesiones pendientes expiradas y los directorios de partes
+        que ya no corresponden a ninguna sesión pendiente.
+        
+        Returns:
+            dict: {'sesiones', 'directorios'} con las cantidades eliminadas
+        """
+        expiradas = SubidaArchivo.objects.filter(estado='PENDIENTE', expira_en__lt=timezone.now())
+        sesiones, _ = expiradas.delete()
+
+        directorios = 0
+        if os.path.isdir(settings.SUBIDAS_ROOT):
+            # Listar antes de consultar: una sesión creada en medio queda como vigente
+            nombres = os.listdir(settings.SUBIDAS_ROOT)
+            vigentes = {
+                str(pk) for pk in SubidaArchivo.objects.filter(estado='PENDIENTE').values_list('pk', flat=True)
+            }
+            for nombre in nombres:
+                if nombre not in vigentes:
+                    shutil.rmtree(os.path.join(settings.SUBIDAS_ROOT, nombre), ignore_errors=True)
+                    directorios += 1
+
+        return {'sesiones': sesiones, 'directorios': directorios}
+
+
+class MediaService:
+    """Autorización de descargas de archivos de MEDIA_ROOT."""
+
+    # Campos de archivo que pueden entregarse y el modelo dueño
+    CAMPOS_PROTEGIDOS = [
+        (Gasto, 'imagen_comprobante'),
+        (Comprobante, 'imagen'),
+        (FotoAlbum, 'imagen'),
+        (Documento, 'archivo'),
+    ]
+
+    @staticmethod
+    def puede_ver(usuario, ruta: str) -> bool:
+        """
+        Indica si el usuario puede descargar el archivo.
+        La decisión se cachea MEDIA_AUTORIZACION_TTL segundos por usuario y ruta,
+        de modo que ver una galería no repite las consultas por cada miniatura.
+        
+        Args:
+            usuario: Usuario autenticado
+            ruta: Ruta normalizada relativa a MEDIA_ROOT
+            
+        Returns:
+            bool: True si existe un registro visible dueño del archivo
+        """
+        clave = f"media_auth:{usuario.pk}:{hashlib.sha1(ruta.encode('utf-8')).hexdigest()}"
+        decision = cache.get(clave)
+        if decision is None:
+            decision = usuario.is_active and MediaService.archivo_visible(ruta)
+            cache.set(clave, decision, settings.MEDIA_AUTORIZACION_TTL)
+        return decision
+
+    @staticmethod
+    def archivo_visible(ruta: str) -> bool:
+        """
+        Busca un registro no eliminado que referencie el archivo.
+        Los derivados de imagen heredan la visibilidad de su imagen fuente.
+        """
+        if ruta.startswith(f'{ReporteService.DIRECTORIO}/'):
+            clave = posixpath.splitext(posixpath.basename(ruta))[0]
+            return ReporteJob.objects.filter(clave_cache=clave, archivo=ruta, eliminado=False).exists()
+
+        if ruta.startswith(f'{DIRECTORIO_DERIVADOS}/'):
+            # derivados/<fuente sin extensión>/<tamaño>.webp
+            base = posixpath.dirname(ruta[len(DIRECTORIO_DERIVADOS) + 1:])
+            return any(
+                modelo.objects.filter(eliminado=False).filter(
+                    Q(**{campo: base}) | Q(**{f'{campo}__startswith': f'{base}.'})
+                ).exists()
+                for modelo, campo in MediaService.CAMPOS_PROTEGIDOS
+                if modelo is not Documento
+            )
+
+        return any(
+            modelo.objects.filter(eliminado=False, **{campo: ruta}).exists()
+            for modelo, campo in MediaService.CAMPOS_PROTEGIDOS
+        )
+
+    @staticmethod
+    def entradas_zip_album(album: Album) -> Iterator[tuple]:
+        """
+        Fotos no eliminadas del álbum como entradas de generar_zip().
+        Se recorren con iterator() para no cargar el álbum completo en memoria.
+        
+        Yields:
+            tuple: (ruta en el storage, nombre dentro del ZIP, fecha)
+        """
+        fotos = FotoAlbum.objects.filter(album=album, eliminado=False).order_by('fecha_foto', 'creado_en', 'id')
+        for foto_id, ruta, titulo, fecha_foto, creado_en in fotos.values_list(
+            'id', 'imagen', 'titulo', 'fecha_foto', 'creado_en'
+        ).iterator(chunk_size=500):
+            if not ruta:
+                continue
+            extension = posixpath.splitext(ruta)[1]
+            yield ruta, f"{titulo or f'foto_{foto_id}'}{extension}", fecha_foto or timezone.localtime(creado_en)
+
+    @staticmethod
+    def entradas_zip_carpeta(carpeta: CarpetaDocumento) -> Iterator[tuple]:
+        """
+        Documentos no eliminados de la carpeta como entradas de generar_zip().
+        
+        Yields:
+            tuple: (ruta en el storage, nombre dentro del ZIP, fecha)
+        """
+        documentos = Documento.objects.filter(carpeta=carpeta, eliminado=False).order_by('-fecha_documento', 'id')
+        for ruta, nombre, fecha_documento in documentos.values_list(
+            'archivo', 'nombre', 'fecha_documento'
+        ).iterator(chunk_size=500):
+            if not ruta:
+                continue
+            extension = posixpath.splitext(ruta)[1]
+            if nombre.lower().endswith(extension.lower()):
+                extension = ''
+            yield ruta, f"{nombre}{extension}", fecha_documento
@@ -1,3 +1,1194 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import Http404
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from core.bootstrap import VERSION_BOOTSTRAP
+from core.common.autenticacion import autenticar_token, cache_autenticacion
+from core.common.comprimidos import generar_zip
+from core.common.consultas_lentas import envoltura_consulta
+from core.common.imagenes import generar_derivados
+from core.common.instrumentacion import firma_consulta
+from core.common.media import normalizar_ruta
+from core.common.models import Blob, VersionDatos
+from core.common.serializers import estadisticas_representaciones, urls_derivados
+from core.common.throttling import contadores_login, verificar_cache_limites
+from core.management.commands.consultas_lentas import agrupar
+from inventario.models import Material
+from produccion.models import Galpon, Lote
+
+from .conciliacion import leer_extracto
+from .constants import MINUTOS_LIMITE_PROCESANDO_REPORTE, TAMANO_CHUNK_MINIMO
+from .models import Proyecto, Categoria, Gasto, Proveedor, ReporteJob, Socio, Documento, SubidaArchivo
+from .proyecciones import VENTANA_DIAS_MINIMA, calcular_proyecciones
+from reportlab.platypus import Table
+
+from . import reportes
+from .reportes import normalizar_filtros, obtener_gastos_filtrados, renderizar_reporte
+from .services import FinanzasService, MediaService, ReporteService
+
+
+class ReservaPresupuestoTests(TestCase):
+    """Validación de presupuesto al registrar gastos."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('registrador', password='x')
+        self.categoria = Categoria.objects.create(nombre='Materiales')
+        self.proyecto = Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal('100.00'), fecha_inicio=date.today()
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def _crear_gasto(self, monto):
+        return self.client.post('/api/finanzas/gastos/', {
+            'proyecto': self.proyecto.id,
+            'categoria': self.categoria.id,
+            'monto': monto,
+            'descripcion': 'Cemento',
+            'fecha': date.today().isoformat(),
+        })
+
+    def test_rechazo_incluye_detalle_del_saldo(self):
+        self.assertEqual(self._crear_gasto('70.00').status_code, status.HTTP_201_CREATED)
+
+        response = self._crear_gasto('40.00')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['detalle'], {
+            'presupuesto_total': '100.00',
+            'total_gastado': '70.00',
+            'saldo_disponible': '30.00',
+            'monto_solicitado': '40.00',
+        })
+        self.proyecto.refresh_from_db()
+        self.assertEqual(self.proyecto.total_gastado, Decimal('70.00'))
+        self.assertEqual(self.proyecto.cantidad_gastos, 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ReservaPresupuestoConcurrenteTests(TransactionTestCase):
+    """Registros simultáneos contra un mismo proyecto no deben exceder el presupuesto."""
+
+    HILOS = 10
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('registrador', password='x')
+        self.categoria = Categoria.objects.create(nombre='Materiales')
+        self.proyecto = Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal('100.00'), fecha_inicio=date.today()
+        )
+
+    def test_creaciones_paralelas_no_exceden_presupuesto(self):
+        barrera = threading.Barrier(self.HILOS)
+        resultados = []
+
+        def registrar():
+            client = APIClient()
+            client.force_authenticate(self.usuario)
+            try:
+                barrera.wait()
+                response = client.post('/api/finanzas/gastos/', {
+                    'proyecto': self.proyecto.id,
+                    'categoria': self.categoria.id,
+                    'monto': '20.00',
+                    'descripcion': 'Cemento',
+                    'fecha': date.today().isoformat(),
+                })
+                resultados.append(response.status_code)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=registrar) for _ in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(resultados.count(status.HTTP_201_CREATED), 5)
+        self.assertEqual(resultados.count(status.HTTP_400_BAD_REQUEST), self.HILOS - 5)
+
+        self.proyecto.refresh_from_db()
+        self.assertEqual(self.proyecto.total_gastado, Decimal('100.00'))
+        self.assertEqual(self.proyecto.cantidad_gastos, 5)
+        self.assertEqual(Gasto.objects.filter(proyecto=self.proyecto, eliminado=False).count(), 5)
+
+
+class TotalesProyectoTests(TestCase):
+    """Gasto.save() y delete() mantienen total_gastado y cantidad_gastos del proyecto."""
+
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nombre='Materiales')
+        self.proyecto = Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+        )
+        self.otro = Proyecto.objects.create(
+            nombre='Bodega', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+        )
+
+    def _crear_gasto(self, monto, proyecto=None):
+        return Gasto.objects.create(
+            proyecto=proyecto or self.proyecto, categoria=self.categoria,
+            monto=Decimal(monto), descripcion='Cemento', fecha=date.today()
+        )
+
+    def assertTotales(self, proyecto, total, cantidad):
+        proyecto.refresh_from_db()
+        self.assertEqual((proyecto.total_gastado, proyecto.cantidad_gastos), (Decimal(total), cantidad))
+
+    def test_crear_editar_y_mover(self):
+        gasto = self._crear_gasto('30.00')
+        self._crear_gasto('20.00')
+        self.assertTotales(self.proyecto, '50.00', 2)
+
+        gasto.monto = Decimal('45.00')
+        gasto.save()
+        self.assertTotales(self.proyecto, '65.00', 2)
+
+        gasto.proyecto = self.otro
+        gasto.save()
+        self.assertTotales(self.proyecto, '20.00', 1)
+        self.assertTotales(self.otro, '45.00', 1)
+
+    def test_soft_delete_restaurar_y_eliminar(self):
+        gasto = self._crear_gasto('30.00')
+        self._crear_gasto('20.00')
+
+        gasto.soft_delete()
+        self.assertTotales(self.proyecto, '20.00', 1)
+        gasto.soft_delete()
+        self.assertTotales(self.proyecto, '20.00', 1)
+
+        gasto.restore()
+        self.assertTotales(self.proyecto, '50.00', 2)
+
+        gasto.delete()
+        self.assertTotales(self.proyecto, '20.00', 1)
+
+    def test_editar_proyecto_no_pisa_totales(self):
+        proyecto = Proyecto.objects.get(pk=self.proyecto.pk)
+        # Gastos registrados después de cargar el proyecto (otra petición, otro worker)
+        self._crear_gasto('30.00')
+        self._crear_gasto('20.00')
+
+        proyecto.nombre = 'Galpón norte'
+        proyecto.save()
+        self.assertTotales(self.proyecto, '50.00', 2)
+        self.assertEqual(self.proyecto.nombre, 'Galpón norte')
+
+        proyecto.soft_delete()
+        proyecto.restore()
+        self.assertTotales(self.proyecto, '50.00', 2)
+
+    def test_reconciliar_totales(self):
+        self._crear_gasto('30.00')
+        self._crear_gasto('15.00', proyecto=self.otro)
+        Proyecto.objects.filter(pk=self.proyecto.pk).update(total_gastado=Decimal('99.00'), cantidad_gastos=7)
+
+        diferencias = FinanzasService.reconciliar_totales()
+        self.assertEqual([diferencia['proyecto_id'] for diferencia in diferencias], [self.proyecto.pk])
+        self.assertEqual(diferencias[0]['total_real'], '30.00')
+        self.assertTotales(self.proyecto, '99.00', 7)
+
+        FinanzasService.reconciliar_totales(corregir=True)
+        self.assertTotales(self.proyecto, '30.00', 1)
+        self.assertTotales(self.otro, '15.00', 1)
+        self.assertEqual(FinanzasService.reconciliar_totales(), [])
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class EdicionConcurrenteGastoTests(TransactionTestCase):
+    """Ediciones simultáneas del mismo gasto no descuadran los totales del proyecto."""
+
+    HILOS = 8
+
+    def test_ediciones_paralelas(self):
+        proyecto = Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal('10000.00'), fecha_inicio=date.today()
+        )
+        gasto = Gasto.objects.create(
+            proyecto=proyecto, categoria=Categoria.objects.create(nombre='Materiales'),
+            monto=Decimal('10.00'), descripcion='Cemento', fecha=date.today()
+        )
+        barrera = threading.Barrier(self.HILOS)
+
+        def editar(monto):
+            try:
+                copia = Gasto.objects.get(pk=gasto.pk)
+                copia.monto = monto
+                barrera.wait()
+                copia.save()
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=editar, args=(Decimal(20 + numero),)) for numero in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        gasto.refresh_from_db()
+        proyecto.refresh_from_db()
+        self.assertEqual(proyecto.total_gastado, gasto.monto)
+        self.assertEqual(proyecto.cantidad_gastos, 1)
+
+
+class ColaReportesTests(TestCase):
+    """Estados de ReporteJob: reutilización, toma por el worker y trabajos abandonados."""
+
+    def setUp(self):
+        self.proyecto = Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+        )
+        self.filtros = normalizar_filtros({})
+
+    def test_solicitudes_iguales_reutilizan_el_trabajo(self):
+        job = ReporteService.solicitar_reporte(self.proyecto, self.filtros)
+        self.assertEqual(job.estado, 'PENDIENTE')
+        self.assertEqual(ReporteService.solicitar_reporte(self.proyecto, self.filtros).pk, job.pk)
+
+        tomado = ReporteService.tomar_siguiente_pendiente()
+        self.assertEqual((tomado.pk, tomado.estado), (job.pk, 'PROCESANDO'))
+        self.assertIsNone(ReporteService.tomar_siguiente_pendiente())
+        self.assertEqual(ReporteService.solicitar_reporte(self.proyecto, self.filtros).pk, job.pk)
+
+    def test_trabajo_abandonado_en_procesando(self):
+        job = ReporteService.solicitar_reporte(self.proyecto, self.filtros)
+        ReporteService.tomar_siguiente_pendiente()
+        ReporteJob.objects.filter(pk=job.pk).update(
+            iniciado_en=timezone.now() - timedelta(minutes=MINUTOS_LIMITE_PROCESANDO_REPORTE + 1)
+        )
+
+        nuevo = ReporteService.solicitar_reporte(self.proyecto, self.filtros)
+        self.assertNotEqual(nuevo.pk, job.pk)
+        self.assertEqual(nuevo.estado, 'PENDIENTE')
+
+        self.assertEqual(ReporteService.tomar_siguiente_pendiente().pk, nuevo.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.estado, 'ERROR')
+        self.assertIsNotNone(job.finalizado_en)
+
+    def test_renombrar_categoria_cambia_la_clave(self):
+        categoria = Categoria.objects.create(nombre='Materiales')
+        clave = ReporteService.calcular_clave_cache(self.proyecto, self.filtros)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            categoria.nombre = 'Materiales de obra'
+            categoria.save()
+        self.proyecto.refresh_from_db()
+        self.assertNotEqual(ReporteService.calcular_clave_cache(self.proyecto, self.filtros), clave)
+
+
+class ProyeccionesTests(TestCase):
+    """Tasas, tendencia y fecha de agotamiento calculadas sobre series conocidas."""
+
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nombre='Materiales')
+        self.hoy = timezone.localdate()
+
+    def _crear_proyecto(self, presupuesto, dias_desde_inicio=60):
+        return Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal(presupuesto),
+            fecha_inicio=self.hoy - timedelta(days=dias_desde_inicio)
+        )
+
+    def _crear_gastos(self, proyecto, montos_por_dias_atras):
+        for dias_atras, monto in montos_por_dias_atras.items():
+            Gasto.objects.create(
+                proyecto=proyecto, categoria=self.categoria, monto=Decimal(monto),
+                descripcion='Cemento', fecha=self.hoy - timedelta(days=dias_atras)
+            )
+
+    def _proyeccion(self, proyecto):
+        proyecciones = calcular_proyecciones(VENTANA_DIAS_MINIMA)
+        return next(p for p in proyecciones if p['proyecto_id'] == proyecto.pk)
+
+    def test_gasto_constante_agota_en_forma_lineal(self):
+        proyecto = self._crear_proyecto('1000.00')
+        self._crear_gastos(proyecto, {dias: '10.00' for dias in range(VENTANA_DIAS_MINIMA)})
+
+        proyeccion = self._proyeccion(proyecto)
+        self.assertEqual((proyeccion['gasto_diario'], proyeccion['gasto_semanal']), (10.0, 70.0))
+        self.assertEqual((proyeccion['tendencia_diaria'], proyeccion['velocidad_ajustada']), (0.0, 10.0))
+        # Saldo 860 a 10 por día
+        self.assertEqual(proyeccion['dias_hasta_agotamiento'], 86)
+        self.assertEqual(proyeccion['fecha_agotamiento'], (self.hoy + timedelta(days=86)).isoformat())
+        self.assertFalse(proyeccion['agotado'])
+
+    def test_tendencia_creciente_usa_la_solucion_cuadratica(self):
+        proyecto = self._crear_proyecto('1000.00')
+        # 1, 2, ..., 14 desde el primer día de la ventana hasta hoy
+        self._crear_gastos(proyecto, {
+            dias: str(VENTANA_DIAS_MINIMA - dias) for dias in range(VENTANA_DIAS_MINIMA)
+        })
+
+        proyeccion = self._proyeccion(proyecto)
+        self.assertEqual((proyeccion['tendencia_diaria'], proyeccion['velocidad_ajustada']), (1.0, 14.0))
+        # 14t + t²/2 = 895 -> t = -14 + sqrt(1986) ≈ 30.56; a velocidad constante serían 64 días
+        self.assertEqual(proyeccion['dias_hasta_agotamiento'], 31)
+
+    def test_saldo_agotado_son_cero_dias(self):
+        proyecto = self._crear_proyecto('100.00')
+        self._crear_gastos(proyecto, {0: '120.00'})
+
+        proyeccion = self._proyeccion(proyecto)
+        self.assertEqual(proyeccion['dias_hasta_agotamiento'], 0)
+        self.assertEqual(proyeccion['fecha_agotamiento'], self.hoy.isoformat())
+        self.assertTrue(proyeccion['agotado'])
+
+    def test_proyecto_sin_gastos_no_se_agota(self):
+        proyecto = self._crear_proyecto('1000.00')
+
+        proyeccion = self._proyeccion(proyecto)
+        self.assertEqual((proyeccion['gasto_diario'], proyeccion['velocidad_ajustada']), (0.0, 0.0))
+        self.assertIsNone(proyeccion['dias_hasta_agotamiento'])
+        self.assertIsNone(proyeccion['fecha_agotamiento'])
+
+    def test_fecha_inicio_dentro_de_la_ventana(self):
+        # Siete días de vida a 10 por día: sin pesos serían 5 por día y una tendencia creciente
+        proyecto = self._crear_proyecto('1000.00', dias_desde_inicio=6)
+        self._crear_gastos(proyecto, {dias: '10.00' for dias in range(7)})
+        # Un gasto retroactivo anterior al inicio adelanta los días activos
+        retroactivo = self._crear_proyecto('1000.00', dias_desde_inicio=3)
+        self._crear_gastos(retroactivo, {9: '40.00'})
+
+        proyeccion = self._proyeccion(proyecto)
+        self.assertEqual((proyeccion['gasto_diario'], proyeccion['tendencia_diaria']), (10.0, 0.0))
+        self.assertEqual(proyeccion['dias_hasta_agotamiento'], 93)
+        self.assertEqual(self._proyeccion(retroactivo)['gasto_diario'], 4.0)
+
+
+@mock.patch.object(reportes, 'FILAS_POR_TABLA', 3)
+class ReportePdfTests(TestCase):
+    """Detalle en tablas de FILAS_POR_TABLA filas con acumulado, resumen por categoría y PDF válido."""
+
+    def setUp(self):
+        self.proyecto = Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+        )
+        materiales = Categoria.objects.create(nombre='Materiales')
+        transporte = Categoria.objects.create(nombre='Transporte')
+        # 7 gastos: tablas de 3, 3 y 1 filas
+        for dia, (categoria, monto) in enumerate([
+            (materiales, '10.00'), (transporte, '5.00'), (materiales, '20.00'), (materiales, '1.50'),
+            (transporte, '2.50'), (materiales, '3.00'), (transporte, '100.00'),
+        ]):
+            Gasto.objects.create(
+                proyecto=self.proyecto, categoria=categoria, monto=Decimal(monto),
+                descripcion=f'Gasto {dia}', fecha=date.today() - timedelta(days=7 - dia)
+            )
+        self.proyecto.refresh_from_db()
+        self.gastos = obtener_gastos_filtrados(self.proyecto, normalizar_filtros({}))
+
+    def test_tablas_acumulados_y_resumen(self):
+        resumen = {'filas': 0, 'total': Decimal('0.00')}
+        tablas = [
+            flowable._cellvalues for flowable in reportes._flowables_reporte(self.proyecto, self.gastos, [], resumen)
+            if isinstance(flowable, Table)
+        ]
+        *detalle, por_categoria = tablas
+
+        self.assertEqual([len(tabla) - 2 for tabla in detalle], [3, 3, 1])
+        self.assertEqual([tabla[-1][2:] for tabla in detalle], [
+            ['Acumulado:', '35.00'], ['Acumulado:', '42.00'], ['TOTAL:', '142.00'],
+        ])
+        self.assertEqual(por_categoria, [
+            ['Categoría', 'Total (Bs)'], ['Transporte', '107.50'], ['Materiales', '34.50'],
+        ])
+        self.assertEqual((resumen['filas'], resumen['total']), (7, Decimal('142.00')))
+
+    def test_renderiza_pdf_completo(self):
+        flujos = []
+
+        class FlujoRegistrado(reportes._FlujoPerezoso):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                flujos.append(self)
+
+        destino = io.BytesIO()
+        with mock.patch.object(reportes, '_FlujoPerezoso', FlujoRegistrado):
+            resumen = renderizar_reporte(self.proyecto, self.gastos, destino)
+        pdf = destino.getvalue()
+        self.assertTrue(pdf.startswith(b'%PDF-'))
+        self.assertIn(b'%%EOF', pdf[-32:])
+        self.assertEqual((resumen['filas'], resumen['total']), (7, Decimal('142.00')))
+        self.assertGreaterEqual(resumen['paginas'], 1)
+        # Nunca hubo más flowables en memoria que la reserva del flujo
+        self.assertLessEqual(flujos[0].maximo, 4)
+
+    def test_flujo_copiado_falla(self):
+        flujo = reportes._FlujoPerezoso(iter(range(10)), reserva=4)
+        self.assertLess(len(list(flujo)), 10)  # una copia no ve los flowables pendientes
+        with self.assertRaises(RuntimeError):
+            flujo.verificar_consumido()
+
+
+class DerivadosImagenTests(TestCase):
+    """Derivados WebP: fuera de la petición de subida y sin error ante imágenes inválidas."""
+
+    def test_bomba_de_descompresion(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64)).save(buffer, 'PNG')
+        with tempfile.TemporaryDirectory() as directorio, override_settings(MEDIA_ROOT=directorio):
+            nombre = default_storage.save('comprobantes/bomba.png', ContentFile(buffer.getvalue()))
+            archivo = SimpleNamespace(name=nombre, storage=default_storage)
+
+            with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+                self.assertEqual(generar_derivados(archivo), {})
+            self.assertIn('original', generar_derivados(archivo))
+
+    def test_subida_deja_derivados_al_worker(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64)).save(buffer, 'PNG')
+        with tempfile.TemporaryDirectory() as directorio, override_settings(MEDIA_ROOT=directorio):
+            gasto = Gasto(
+                proyecto=Proyecto.objects.create(
+                    nombre='Galpón', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+                ),
+                categoria=Categoria.objects.create(nombre='Materiales'), monto=Decimal('10.00'),
+                descripcion='Cemento', fecha=date.today()
+            )
+            gasto.imagen_comprobante.save('factura.png', ContentFile(buffer.getvalue()), save=False)
+            with self.captureOnCommitCallbacks(execute=True):
+                gasto.save()
+            gasto.refresh_from_db()
+            self.assertEqual(gasto.derivados, {})
+            self.assertEqual(list(Gasto.pendientes_derivados()), [gasto])
+            self.assertEqual(urls_derivados(gasto)['miniatura'], gasto.imagen_comprobante.url)
+
+            call_command('generar_derivados', '--modelo', 'gastos', '--procesos', '1', stdout=io.StringIO())
+            gasto.refresh_from_db()
+            self.assertEqual(gasto.derivados['fuente'], gasto.imagen_comprobante.name)
+            self.assertFalse(Gasto.pendientes_derivados().exists())
+
+            # Otra imagen vuelve a quedar pendiente; una inválida se marca y no se reintenta
+            gasto.imagen_comprobante.save('roto.png', ContentFile(b'no es una imagen'), save=False)
+            gasto.save()
+            self.assertEqual(list(Gasto.pendientes_derivados()), [gasto])
+            call_command('generar_derivados', '--modelo', 'gastos', '--procesos', '1', stdout=io.StringIO())
+            gasto.refresh_from_db()
+            self.assertTrue(gasto.derivados['error'])
+            self.assertFalse(Gasto.pendientes_derivados().exists())
+
+
+class BlobsTests(TestCase):
+    """Referencias de los blobs deduplicados y purga de los que ya nadie usa."""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(MEDIA_ROOT=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def crear_documento(self, contenido=b'plan de pago', nombre='plan.pdf'):
+        return Documento.objects.create(
+            nombre=nombre, fecha_documento=date.today(), archivo=ContentFile(contenido, name=nombre)
+        )
+
+    def referencias(self, nombre):
+        return Blob.objects.get(nombre=nombre).referencias
+
+    def existe(self, nombre):
+        return Documento._meta.get_field('archivo').storage.exists(nombre)
+
+    def purgar(self, gracia):
+        call_command('purgar_blobs', '--gracia', str(gracia), stdout=io.StringIO())
+
+    def test_blob_compartido(self):
+        uno, otro = self.crear_documento(), self.crear_documento(nombre='copia.pdf')
+        nombre = uno.archivo.name
+        self.assertEqual(otro.archivo.name, nombre)
+        self.assertEqual(self.referencias(nombre), 2)
+
+        # El soft delete conserva la referencia: el registro puede restaurarse
+        uno.soft_delete()
+        self.assertEqual(self.referencias(nombre), 2)
+
+        uno.delete()
+        self.assertEqual(self.referencias(nombre), 1)
+        Blob.objects.filter(nombre=nombre).update(actualizado_en=timezone.now() - timedelta(days=2))
+        self.purgar(0)
+        self.assertTrue(self.existe(nombre))
+
+    def test_reemplazar_archivo_mueve_la_referencia(self):
+        documento = self.crear_documento()
+        anterior = documento.archivo.name
+
+        documento.archivo = ContentFile(b'plan de pago corregido', name='plan.pdf')
+        documento.save()
+        self.assertNotEqual(documento.archivo.name, anterior)
+        self.assertEqual(self.referencias(anterior), 0)
+        self.assertEqual(self.referencias(documento.archivo.name), 1)
+
+    def test_purga_sin_referencias_y_pasada_la_gracia(self):
+        documento = self.crear_documento()
+        nombre = documento.archivo.name
+        self.purgar(0)
+        self.assertTrue(self.existe(nombre))
+
+        documento.delete()
+        self.purgar(24)
+        self.assertTrue(self.existe(nombre))
+
+        Blob.objects.filter(nombre=nombre).update(actualizado_en=timezone.now() - timedelta(hours=25))
+        self.purgar(24)
+        self.assertFalse(self.existe(nombre))
+        self.assertFalse(Blob.objects.filter(nombre=nombre).exists())
+
+    def test_subida_revertida_deja_huerfano(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            nombre = self.crear_documento().archivo.name
+            raise RuntimeError
+        self.assertFalse(Blob.objects.filter(nombre=nombre).exists())
+        self.assertTrue(self.existe(nombre))
+
+        self.purgar(24)
+        self.assertTrue(self.existe(nombre))
+
+        ruta = Documento._meta.get_field('archivo').storage.path(nombre)
+        hace_dos_dias = (timezone.now() - timedelta(days=2)).timestamp()
+        os.utime(ruta, (hace_dos_dias, hace_dos_dias))
+        self.purgar(24)
+        self.assertFalse(self.existe(nombre))
+
+    def test_only_y_defer_no_descuentan(self):
+        documento = self.crear_documento()
+        nombre = documento.archivo.name
+
+        parcial = Documento.objects.only('id', 'nombre').get(pk=documento.pk)
+        parcial.nombre = 'Plan de pago 2026'
+        parcial.save()
+        self.assertEqual(self.referencias(nombre), 1)
+
+        diferido = Documento.objects.defer('archivo').get(pk=documento.pk)
+        diferido.soft_delete()
+        diferido.restore()
+        self.assertEqual(self.referencias(nombre), 1)
+
+
+class SubidasReanudablesTests(TestCase):
+    """Subidas por partes: orden, reintentos, tamaños, checksum, finalización y expiración."""
+
+    # Tres partes: dos completas y una de 100 bytes
+    CONTENIDO = bytes(range(256)) * (2 * TAMANO_CHUNK_MINIMO // 256) + b'x' * 100
+
+    def setUp(self):
+        for ajuste in ('MEDIA_ROOT', 'SUBIDAS_ROOT'):
+            directorio = tempfile.TemporaryDirectory()
+            self.addCleanup(directorio.cleanup)
+            ajustes = override_settings(**{ajuste: directorio.name})
+            ajustes.enable()
+            self.addCleanup(ajustes.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('registrador', password='x'))
+
+    def crear_subida(self, sha256=None):
+        respuesta = self.client.post('/api/finanzas/subidas/', {
+            'destino': 'DOCUMENTO', 'nombre_archivo': 'plan.pdf', 'tamano_total': len(self.CONTENIDO),
+            'tamano_chunk': TAMANO_CHUNK_MINIMO,
+            'sha256': sha256 if sha256 is not None else hashlib.sha256(self.CONTENIDO).hexdigest(),
+        }, format='json')
+        self.assertEqual(respuesta.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(respuesta.data['total_chunks'], 3)
+        return respuesta.data['id']
+
+    def enviar(self, subida, numero, contenido=None):
+        if contenido is None:
+            contenido = self.CONTENIDO[numero * TAMANO_CHUNK_MINIMO:(numero + 1) * TAMANO_CHUNK_MINIMO]
+        return self.client.put(
+            f'/api/finanzas/subidas/{subida}/chunks/{numero}/', contenido, content_type='application/octet-stream'
+        )
+
+    def finalizar(self, subida):
+        return self.client.post(f'/api/finanzas/subidas/{subida}/finalizar/', {
+            'nombre': 'Plan de pago', 'fecha_documento': date.today().isoformat(),
+        }, format='json')
+
+    def test_partes_desordenadas_y_reintentadas(self):
+        subida = self.crear_subida()
+        for numero in (2, 0, 0, 1):
+            self.assertEqual(self.enviar(subida, numero).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(f'/api/finanzas/subidas/{subida}/').data['chunks_recibidos'], [0, 1, 2])
+
+        respuesta = self.finalizar(subida)
+        self.assertEqual(respuesta.status_code, status.HTTP_201_CREATED)
+        with Documento.objects.get(pk=respuesta.data['id']).archivo.open('rb') as archivo:
+            self.assertEqual(archivo.read(), self.CONTENIDO)
+
+        # Segunda finalización y partes tardías
+        self.assertEqual(self.finalizar(subida).status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.enviar(subida, 0).status_code, status.HTTP_409_CONFLICT)
+
+    def test_tamano_o_numero_de_parte_invalidos(self):
+        subida = self.crear_subida()
+        self.assertEqual(self.enviar(subida, 0, b'corto').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.enviar(subida, 2, b'x' * 101).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.enviar(subida, 3, b'x' * 100).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(f'/api/finanzas/subidas/{subida}/').data['chunks_recibidos'], [])
+
+    def test_finalizar_con_partes_faltantes(self):
+        subida = self.crear_subida()
+        self.enviar(subida, 1)
+        respuesta = self.finalizar(subida)
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(respuesta.data['detalle'], {'chunks_faltantes': [0, 2]})
+        self.assertEqual(SubidaArchivo.objects.get(pk=subida).estado, 'PENDIENTE')
+
+    def test_checksum_distinto(self):
+        subida = self.crear_subida(sha256='0' * 64)
+        for numero in range(3):
+            self.enviar(subida, numero)
+        self.assertEqual(self.finalizar(subida).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Documento.objects.exists())
+        self.assertEqual(SubidaArchivo.objects.get(pk=subida).estado, 'PENDIENTE')
+
+    def test_sesion_expirada(self):
+        subida = self.crear_subida()
+        SubidaArchivo.objects.filter(pk=subida).update(expira_en=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.enviar(subida, 0).status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.finalizar(subida).status_code, status.HTTP_410_GONE)
+
+    def test_purgar_subidas(self):
+        expirada, vigente = self.crear_subida(), self.crear_subida()
+        for subida in (expirada, vigente):
+            self.enviar(subida, 0)
+        SubidaArchivo.objects.filter(pk=expirada).update(expira_en=timezone.now() - timedelta(minutes=1))
+        os.makedirs(os.path.join(settings.SUBIDAS_ROOT, 'huerfano'))
+
+        call_command('purgar_subidas', stdout=io.StringIO())
+        self.assertFalse(SubidaArchivo.objects.filter(pk=expirada).exists())
+        self.assertEqual(sorted(os.listdir(settings.SUBIDAS_ROOT)), [str(vigente)])
+        self.assertEqual(self.client.get(f'/api/finanzas/subidas/{vigente}/').data['chunks_recibidos'], [0])
+
+
+@override_settings(MEDIA_X_ACCEL_REDIRECT=True)
+class MediaProtegidaTests(TestCase):
+    """/media/ solo entrega archivos de registros visibles a usuarios activos autenticados."""
+
+    RUTA = 'comprobantes/2026/01/factura.jpg'
+
+    def setUp(self):
+        caches['default'].clear()
+        cache_autenticacion.limpiar()
+        self.usuario = User.objects.create_user('registrador', password='x')
+        self.token = Token.objects.create(user=self.usuario)
+        self.gasto = Gasto.objects.create(
+            proyecto=Proyecto.objects.create(
+                nombre='Galpón', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+            ),
+            categoria=Categoria.objects.create(nombre='Materiales'), monto=Decimal('10.00'),
+            descripcion='Cemento', fecha=date.today(), imagen_comprobante=self.RUTA
+        )
+        self.client = APIClient()
+
+    def _get(self, ruta, **extra):
+        return self.client.get(f'/media/{ruta}', **extra)
+
+    def test_sin_credenciales(self):
+        self.assertEqual(self._get(self.RUTA).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            self._get(self.RUTA, HTTP_AUTHORIZATION='Token invalido').status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_archivo_visible(self):
+        response = self._get(self.RUTA, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], f'/_protegido/{self.RUTA}')
+
+    def test_sin_registro_o_eliminado(self):
+        self.gasto.soft_delete()
+        for ruta in (self.RUTA, 'comprobantes/2026/01/otra.jpg'):
+            response = self._get(ruta, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_usuario_inactivo(self):
+        self.usuario.is_active = False
+        self.usuario.save()
+        response = self._get(self.RUTA, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(MediaService.puede_ver(self.usuario, self.RUTA))
+
+    def test_rutas_fuera_de_media_root(self):
+        for ruta in ('../core/settings.py', 'comprobantes/../../core/settings.py', '/etc/passwd', 'blobs/tmp/x'):
+            with self.assertRaises(Http404):
+                normalizar_ruta(ruta)
+        response = self._get('comprobantes/../../core/settings.py', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_url_firmada(self):
+        self.client.force_authenticate(self.usuario)
+        url = self.client.get('/api/finanzas/media/firmar/', {'ruta': f'/media/{self.RUTA}'}).data['url']
+        self.client.force_authenticate(None)
+
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        firma = url.split('firma=')[1]
+        otra = self._get('comprobantes/2026/01/otra.jpg', data={'firma': firma})
+        self.assertEqual(otra.status_code, status.HTTP_401_UNAUTHORIZED)
+        with override_settings(MEDIA_FIRMA_TTL=-1):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ExtractoBancarioTests(TestCase):
+    """Las celdas de monto no numéricas o no finitas son errores de la línea, no de la petición."""
+
+    def test_montos_invalidos(self):
+        csv = (
+            'Fecha;Monto;Referencia\n'
+            '05/01/2026;-50,00;A1\n'
+            '06/01/2026;NaN;A2\n'
+            '07/01/2026;-Infinity;A3\n'
+            '08/01/2026;1e999999;A4\n'
+            '09/01/2026;abc;A5\n'
+        )
+        extracto = leer_extracto(ContentFile(csv.encode('utf-8')))
+
+        self.assertEqual([linea['monto'] for linea in extracto['lineas']], [Decimal('50.00')])
+        self.assertEqual([error['linea'] for error in extracto['errores']], [3, 4, 5, 6])
+
+
+class DescargaZipTests(TestCase):
+    """Las entradas con fechas fuera del rango ZIP (antes de 1980) no cortan la descarga."""
+
+    def test_fecha_anterior_a_1980(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(MEDIA_ROOT=directorio):
+            ruta = default_storage.save('documentos/acta.pdf', ContentFile(b'%PDF-1.4 acta'))
+            contenido = b''.join(generar_zip([
+                (ruta, 'Acta 1975.pdf', date(1975, 3, 1)),
+                (ruta, 'Acta 2026.pdf', date(2026, 3, 1)),
+            ]))
+
+        with zipfile.ZipFile(io.BytesIO(contenido)) as archivo_zip:
+            self.assertEqual([info.date_time[:3] for info in archivo_zip.infolist()], [(1980, 1, 1), (2026, 3, 1)])
+            self.assertEqual(archivo_zip.read('Acta_1975.pdf'), b'%PDF-1.4 acta')
+
+
+class CacheAutenticacionTests(TestCase):
+    """El token se resuelve desde la caché del proceso y las señales la invalidan."""
+
+    def setUp(self):
+        cache_autenticacion.limpiar()
+        self.usuario = User.objects.create_user('registrador', password='x')
+        self.socio = Socio.objects.create(usuario=self.usuario, parentesco='Hermana')
+        self.usuario.groups.add(Group.objects.create(name='Registradores'))
+        self.token = Token.objects.create(user=self.usuario)
+
+    def test_segunda_peticion_no_consulta_la_base(self):
+        autenticar_token(self.token.key)
+
+        with self.assertNumQueries(0):
+            usuario, _ = autenticar_token(self.token.key)
+            self.assertTrue(usuario.perfil_socio.activo)
+            self.assertEqual([grupo.name for grupo in usuario.groups.all()], ['Registradores'])
+
+    def test_cambios_invalidan_la_entrada(self):
+        autenticar_token(self.token.key)
+
+        self.socio.activo = False
+        self.socio.save()
+        self.usuario.groups.clear()
+        usuario, _ = autenticar_token(self.token.key)
+        self.assertFalse(usuario.perfil_socio.activo)
+        self.assertEqual(list(usuario.groups.all()), [])
+
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            autenticar_token(self.token.key)
+
+    def test_cambio_del_usuario_invalida_solo_sus_entradas(self):
+        otro = User.objects.create_user('visualizador', password='x')
+        token_otro = Token.objects.create(user=otro)
+        autenticar_token(self.token.key)
+        autenticar_token(token_otro.key)
+
+        self.usuario.is_active = False
+        self.usuario.save()
+        with self.assertRaises(AuthenticationFailed):
+            autenticar_token(self.token.key)
+        with self.assertNumQueries(0):
+            autenticar_token(token_otro.key)
+
+
+class LimitesLoginTests(TestCase):
+    """Los intentos de login se limitan por usuario en la caché compartida 'limites'."""
+
+    def setUp(self):
+        caches['limites'].clear()
+        User.objects.create_user('registrador', password='correcta')
+        self.client = APIClient()
+
+    def test_limite_por_usuario_y_contadores(self):
+        for _ in range(5):
+            response = self.client.post('/api/finanzas/auth/login/', {'username': 'Registrador', 'password': 'x'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/finanzas/auth/login/', {'username': 'registrador', 'password': 'correcta'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.assertEqual(contadores_login()['login_usuario'], {'permitidos': 5, 'rechazados': 1})
+        self.assertEqual(verificar_cache_limites(None), [])
+
+    def test_cuerpo_que_no_es_un_objeto(self):
+        response = self.client.post('/api/finanzas/auth/login/', ['registrador'], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'limites': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    })
+    def test_check_rechaza_cache_por_proceso(self):
+        self.assertEqual([error.id for error in verificar_cache_limites(None)], ['common.E001'])
+
+
+class PaginacionKeysetTests(TestCase):
+    """Los gastos se paginan por (fecha, id) sin saltar ni repetir filas con la misma fecha."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('registrador', password='x')
+        categoria = Categoria.objects.create(nombre='Materiales')
+        proyecto = Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+        )
+        self.ids = [
+            Gasto.objects.create(
+                proyecto=proyecto, categoria=categoria, usuario=self.usuario,
+                monto=Decimal('10.00'), descripcion=f'Cemento {i}', fecha=date(2026, 1, 1 + i // 3)
+            ).id
+            for i in range(7)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_recorre_todas_las_paginas_y_vuelve(self):
+        esperados = sorted(self.ids, key=lambda pk: (self.ids.index(pk) // 3, pk), reverse=True)
+        vistos, paginas = [], []
+        url = '/api/finanzas/gastos/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            paginas.append(response.data)
+            vistos += [gasto['id'] for gasto in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(vistos, esperados)
+        self.assertNotIn('count_estimado', paginas[0])
+        anterior = self.client.get(paginas[-1]['previous'])
+        self.assertEqual(
+            [gasto['id'] for gasto in anterior.data['results']],
+            [gasto['id'] for gasto in paginas[-2]['results']]
+        )
+
+
+class GetCondicionalTests(TestCase):
+    """Listado y detalle responden 304 mientras no cambien los datos que muestran."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('registrador', password='x')
+        self.categoria = Categoria.objects.create(nombre='Materiales')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_detalle_y_listado_no_modificados(self):
+        url = f'/api/finanzas/categorias/{self.categoria.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        etag_listado = self.client.get('/api/finanzas/categorias/')['ETag']
+        self.assertEqual(
+            self.client.get('/api/finanzas/categorias/', HTTP_IF_NONE_MATCH=etag_listado).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.categoria.descripcion = 'Cemento y arena'
+            self.categoria.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.get('/api/finanzas/categorias/', HTTP_IF_NONE_MATCH=etag_listado).status_code,
+            status.HTTP_200_OK
+        )
+
+    def test_listado_sin_recorrer_el_queryset(self):
+        for numero in range(3):
+            Categoria.objects.create(nombre=f'Categoría {numero}')
+        etag = self.client.get('/api/finanzas/categorias/')['ETag']
+        with self.assertNumQueries(1):  # solo las versiones
+            respuesta = self.client.get('/api/finanzas/categorias/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_datos_de_claves_foraneas_invalidan(self):
+        proyecto = Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+        )
+        otro = Proyecto.objects.create(
+            nombre='Bodega', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+        )
+        proveedor = Proveedor.objects.create(nombre='Ferretería Central')
+        gasto = Gasto.objects.create(
+            proyecto=proyecto, categoria=self.categoria, usuario=self.usuario, proveedor_rel=proveedor,
+            monto=Decimal('10.00'), descripcion='Cemento', fecha=date.today()
+        )
+        url_listado = f'/api/finanzas/gastos/?proyecto={proyecto.id}'
+        url_detalle = f'/api/finanzas/gastos/{gasto.id}/'
+
+        def sin_cambios(url, etag):
+            return self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        etag_listado, etag_detalle = self.client.get(url_listado)['ETag'], self.client.get(url_detalle)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.categoria.nombre = 'Materiales de obra'
+            self.categoria.save()
+        self.assertFalse(sin_cambios(url_listado, etag_listado))
+        self.assertFalse(sin_cambios(url_detalle, etag_detalle))
+
+        # Los totales del proveedor incluyen sus gastos en otros proyectos
+        etag_listado, etag_detalle = self.client.get(url_listado)['ETag'], self.client.get(url_detalle)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Gasto.objects.create(
+                proyecto=otro, categoria=self.categoria, proveedor_rel=proveedor,
+                monto=Decimal('5.00'), descripcion='Arena', fecha=date.today()
+            )
+        self.assertFalse(sin_cambios(url_detalle, etag_detalle))
+        self.assertFalse(sin_cambios(url_listado, etag_listado))
+
+        etag_detalle = self.client.get(url_detalle)['ETag']
+        self.assertTrue(sin_cambios(url_detalle, etag_detalle))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.first_name = 'Ana'
+            self.usuario.save()
+        self.assertFalse(sin_cambios(url_detalle, etag_detalle))
+
+
+class BootstrapTests(TestCase):
+    """La versión del bootstrap solo cambia al confirmar escrituras sobre datos que sirve."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('registrador', password='x'))
+        galpon = Galpon.objects.create(nombre='Galpón 1', capacidad_maxima=500)
+        self.lote = Lote.objects.create(
+            nombre='Lote 1', galpon=galpon, fecha_ingreso=date.today(), cantidad_aves=400
+        )
+        self.material = Material.objects.create(nombre='Cemento')
+
+    def version(self):
+        return VersionDatos.actual(VERSION_BOOTSTRAP)
+
+    def test_etag_vigente_responde_304(self):
+        respuesta = self.client.get('/api/bootstrap/')
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual([lote['cantidad_aves'] for lote in respuesta.data['lotes']], [400])
+
+        no_modificada = self.client.get('/api/bootstrap/', HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(no_modificada.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(no_modificada['ETag'], respuesta['ETag'])
+        self.assertFalse(no_modificada.content)
+
+    def test_escrituras_observadas_incrementan_al_confirmar(self):
+        etag = self.client.get('/api/bootstrap/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Categoria.objects.create(nombre='Alimento')
+            self.assertEqual(self.version(), 0)
+        self.assertEqual(self.version(), 1)
+        respuesta = self.client.get('/api/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual([categoria['nombre'] for categoria in respuesta.data['categorias']], ['Alimento'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lote.cantidad_aves = 380
+            self.lote.save(update_fields=['cantidad_aves'])
+        self.assertEqual(self.version(), 2)
+        respuesta = self.client.get('/api/bootstrap/', HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual([lote['cantidad_aves'] for lote in respuesta.data['lotes']], [380])
+
+    def test_campos_no_servidos_no_incrementan(self):
+        etag = self.client.get('/api/bootstrap/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.stock_actual = Decimal('12.00')
+            self.material.save(update_fields=['stock_actual', 'actualizado_en'])
+        self.assertEqual(self.version(), 0)
+        self.assertEqual(
+            self.client.get('/api/bootstrap/', HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.stock_minimo_alerta = Decimal('10.00')
+            self.material.save(update_fields=['stock_minimo_alerta', 'actualizado_en'])
+        self.assertEqual(self.version(), 1)
+
+
+class CamposDinamicosTests(TestCase):
+    """?fields= recorta la respuesta y ?expand= agrega relaciones anidadas."""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('registrador', password='x')
+        proveedor = Proveedor.objects.create(nombre='Ferretería Central')
+        self.gasto = Gasto.objects.create(
+            proyecto=Proyecto.objects.create(
+                nombre='Galpón', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+            ),
+            categoria=Categoria.objects.create(nombre='Materiales'), usuario=self.usuario,
+            proveedor_rel=proveedor, monto=Decimal('25.50'), descripcion='Cemento', fecha=date.today()
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_fields_y_expand(self):
+        url = f'/api/finanzas/gastos/{self.gasto.id}/'
+        self.assertEqual(set(self.client.get(url, {'fields': 'id,monto'}).data), {'id', 'monto'})
+
+        respuesta = self.client.get(url, {'fields': 'id', 'expand': 'proyecto_detalle'})
+        self.assertEqual(set(respuesta.data), {'id', 'proyecto_detalle'})
+        self.assertEqual(respuesta.data['proyecto_detalle']['nombre'], 'Galpón')
+
+        proveedor = self.client.get(url).data['proveedor_detalle']
+        self.assertEqual(proveedor['cantidad_gastos'], 1)
+        self.assertEqual(Decimal(str(proveedor['total_pagado'])), Decimal('25.50'))
+
+    def test_fields_omite_consultas_de_relaciones(self):
+        url = '/api/finanzas/gastos/'
+        with CaptureQueriesContext(connection) as completo:
+            self.client.get(url)
+        # Sin usuario_detalle, proveedor_detalle ni fotos no se prefetchean grupos,
+        # proveedores anotados ni comprobantes: tres consultas menos.
+        with self.assertNumQueries(len(completo) - 3):
+            respuesta = self.client.get(url, {'fields': 'id,monto'})
+        self.assertEqual(set(respuesta.data['results'][0]), {'id', 'monto'})
+
+
+class InstrumentacionTests(TestCase):
+    """Las peticiones muestreadas informan consultas y tiempos en Server-Timing."""
+
+    def setUp(self):
+        Categoria.objects.create(nombre='Materiales')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('registrador', password='x'))
+
+    def test_firma_agrupa_parametros(self):
+        self.assertEqual(
+            firma_consulta('SELECT * FROM t WHERE id IN (%s, %s) LIMIT 21'),
+            firma_consulta('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 20')
+        )
+
+    def test_server_timing_solo_con_muestreo(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/finanzas/categorias/'))
+
+        with override_settings(INSTRUMENTACION_MUESTREO=1):
+            with self.assertLogs('core.common.instrumentacion', level='INFO'):
+                respuesta = self.client.get('/api/finanzas/categorias/')
+        self.assertIn('db;dur=', respuesta['Server-Timing'])
+        self.assertIn('serializacion;dur=', respuesta['Server-Timing'])
+        self.assertIn('render;dur=', respuesta['Server-Timing'])
+
+
+class PerfilamientoTests(TestCase):
+    """?_profile=1 reemplaza la respuesta por el perfil, solo para staff."""
+
+    def setUp(self):
+        Categoria.objects.create(nombre='Materiales')
+        self.client = APIClient()
+
+    def autenticar(self, **campos):
+        usuario = User.objects.create_user('perfilador', password='x', **campos)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=usuario).key}')
+
+    def test_staff_recibe_perfil(self):
+        self.autenticar(is_staff=True)
+        respuesta = self.client.get('/api/finanzas/categorias/?_profile=1')
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual(respuesta.json()['estado'], status.HTTP_200_OK)
+        self.assertGreater(respuesta.json()['consultas'], 0)
+        self.assertTrue(respuesta.json()['funciones'])
+
+    def test_no_staff_recibe_respuesta_normal(self):
+        self.autenticar()
+        respuesta = self.client.get('/api/finanzas/categorias/', HTTP_X_PROFILE='1')
+        self.assertNotIn('funciones', respuesta.json())
+
+
+class ConsultasLentasTests(TestCase):
+    """Las consultas sobre el umbral se registran con la vista y acción que las originó."""
+
+    def setUp(self):
+        Categoria.objects.create(nombre='Materiales')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('registrador', password='x'))
+
+    def test_registra_vista_y_accion(self):
+        with override_settings(CONSULTAS_LENTAS_UMBRAL_MS=0.000001, CONSULTAS_LENTAS_EXPLAIN_MUESTREO=0):
+            with connection.execute_wrapper(envoltura_consulta):
+                with self.assertLogs('core.common.consultas_lentas', level='WARNING') as logs:
+                    self.client.get('/api/finanzas/categorias/')
+
+        registros = [json.loads(linea.split(':', 2)[2]) for linea in logs.output]
+        self.assertTrue(any(
+            registro.get('vista') == 'CategoriaViewSet' and registro.get('accion') == 'list'
+            for registro in registros
+        ))
+
+    def test_agrupa_por_firma(self):
+        resumen = agrupar([
+            {'sql': 'SELECT * FROM t WHERE id = %s LIMIT 21', 'ms': 120.0, 'vista': 'GastoViewSet', 'accion': 'list'},
+            {'sql': 'SELECT * FROM t WHERE id = %s LIMIT 20', 'ms': 80.0, 'proceso': 'manage.py procesar_reportes'},
+        ])
+        self.assertEqual(len(resumen), 1)
+        self.assertEqual(resumen[0]['veces'], 2)
+        self.assertEqual(resumen[0]['max_ms'], 120.0)
+        self.assertIn('GastoViewSet.list', resumen[0]['origenes'])
+
+
+class RepresentacionCacheadaTests(TestCase):
+    """Los proveedores se arman desde la caché hasta que cambian ellos o sus gastos."""
+
+    def setUp(self):
+        caches['representaciones'].clear()
+        self.usuario = User.objects.create_user('registrador', password='x')
+        self.proveedor = Proveedor.objects.create(nombre='Ferretería Central')
+        self.proyecto = Proyecto.objects.create(
+            nombre='Galpón', presupuesto_objetivo=Decimal('1000.00'), fecha_inicio=date.today()
+        )
+        self.categoria = Categoria.objects.create(nombre='Materiales')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def total_pagado(self):
+        resultados = self.client.get('/api/finanzas/proveedores/').data['results']
+        return Decimal(str(resultados[0]['total_pagado']))
+
+    def test_invalida_con_gastos(self):
+        self.assertEqual(self.total_pagado(), Decimal('0'))
+        aciertos = estadisticas_representaciones()['aciertos']
+        self.assertEqual(self.total_pagado(), Decimal('0'))
+        self.assertEqual(estadisticas_representaciones()['aciertos'], aciertos + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Gasto.objects.create(
+                proyecto=self.proyecto, categoria=self.categoria, usuario=self.usuario,
+                proveedor_rel=self.proveedor, monto=Decimal('40.00'), descripcion='Cemento', fecha=date.today()
+            )
+        self.assertEqual(self.total_pagado(), Decimal('40.00'))
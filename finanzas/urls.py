@@ -8,9 +8,13 @@ from .views import (
     # Galería
     AlbumViewSet, FotoAlbumViewSet,
     # Documentos
-    CarpetaDocumentoViewSet, DocumentoViewSet,
+    CarpetaDocumentoViewSet, DocumentoViewSet, SubidaArchivoViewSet,
+    # Reportes
+    ReporteJobViewSet,
     # Auth
-    CustomAuthToken, CambiarContrasenaView
+    CustomAuthToken, CambiarContrasenaView, LimitesLoginView,
+    # Media protegida
+    FirmarMediaView
 )
 
 # Router para los endpoints REST
@@ -32,10 +36,16 @@ router.register(r'fotos', FotoAlbumViewSet)
 # Documentos
 router.register(r'carpetas', CarpetaDocumentoViewSet)
 router.register(r'documentos', DocumentoViewSet)
+router.register(r'subidas', SubidaArchivoViewSet)
+
+# Reportes
+router.register(r'reportes', ReporteJobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/login/', CustomAuthToken.as_view(), name='api_token_auth'),
+    path('auth/login/limites/', LimitesLoginView.as_view(), name='limites_login'),
     path('auth/cambiar-contrasena/', CambiarContrasenaView.as_view(), name='cambiar_contrasena'),
+    path('media/firmar/', FirmarMediaView.as_view(), name='firmar_media'),
 ]
 
@@ -3,15 +3,12 @@ Utilidades y funciones helper para el módulo de finanzas.
 """
 import io
 from decimal import Decimal
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
 
 
 def generar_reporte_proyecto_pdf(proyecto, gastos):
     """
     Genera un reporte PDF para un proyecto específico.
+    DEPRECATED: Usar finanzas.reportes.generar_pdf_gastos()
     
     Args:
         proyecto: Instancia del modelo Proyecto
@@ -20,53 +17,10 @@ def generar_reporte_proyecto_pdf(proyecto, gastos):
     Returns:
         BytesIO: Buffer con el contenido del PDF
     """
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-
-    # Título y Encabezado
-    elements.append(Paragraph(f"Reporte de Inversión: {proyecto.nombre}", styles['Title']))
-    elements.append(Paragraph(
-        f"Presupuesto Total: {proyecto.presupuesto_objetivo} Bs | "
-        f"Total Gastado: {proyecto.total_gastado} Bs | "
-        f"Saldo Disponible: {proyecto.saldo_restante} Bs",
-        styles['Normal']
-    ))
-    elements.append(Paragraph("<br/><br/>", styles['Normal']))
-
-    # Tabla de Gastos
-    data = [['Fecha', 'Descripción', 'Categoría', 'Proveedor', 'Monto (Bs)']]
-    for g in gastos:
-        proveedor_nombre = g.proveedor_rel.nombre if g.proveedor_rel else 'N/A'
-        data.append([
-            g.fecha.strftime('%d/%m/%Y'),
-            g.descripcion[:25],  # Acortar para que quepa
-            g.categoria.nombre,
-            proveedor_nombre[:20],
-            f"{g.monto:.2f}"
-        ])
-
-    # Fila de totales
-    data.append(['', '', '', 'TOTAL:', f"{proyecto.total_gastado:.2f}"])
-
-    # Estilo de la tabla
-    tabla = Table(data, colWidths=[70, 150, 90, 100, 70])
-    tabla.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.green),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.whitesmoke, colors.white]),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-    ]))
-    
-    elements.append(tabla)
-    doc.build(elements)
+    from .reportes import renderizar_reporte
 
+    buffer = io.BytesIO()
+    renderizar_reporte(proyecto, gastos.order_by('fecha', 'id'), buffer)
     buffer.seek(0)
     return buffer
 
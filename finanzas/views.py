@@ -1,42 +1,51 @@
 # Standard library imports
 import io
 import logging
-from datetime import datetime, timedelta
 
 # Django imports
-from django.http import FileResponse
+from django.conf import settings
+from django.http import FileResponse, Http404, JsonResponse
+from django.views.decorators.http import require_safe
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
 from django.db.models import Sum
 
 # Django REST Framework imports
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, mixins, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from rest_framework.parsers import MultiPartParser, FormParser
 
-# ReportLab imports
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-
 # Local imports
 from .models import (
     Proyecto, Categoria, Gasto, Proveedor,
-    Socio, Album, FotoAlbum, CarpetaDocumento, Documento
+    Socio, Album, FotoAlbum, CarpetaDocumento, Documento, ReporteJob, SubidaArchivo
 )
 from .serializers import (
     ProyectoSerializer, CategoriaSerializer, GastoSerializer, ProveedorSerializer,
     SocioSerializer, AlbumSerializer, AlbumListSerializer, FotoAlbumSerializer,
-    CarpetaDocumentoSerializer, CarpetaDocumentoListSerializer, DocumentoSerializer
+    CarpetaDocumentoSerializer, CarpetaDocumentoListSerializer, DocumentoSerializer,
+    ReporteJobSerializer, SubidaArchivoSerializer
 )
-from core.common.mixins import OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.pagination import KeysetPagination
+from core.common.cache_agregados import cachear_agregado
 from .constants import ERROR_PRESUPUESTO_EXCEDIDO
-from .services import FinanzasService
+from .services import FinanzasService, ReporteService, SubidaService, MediaService
+from .exceptions import PresupuestoExcedidoError
+from .reportes import normalizar_filtros, generar_pdf_gastos, nombre_archivo_reporte
+from .proyecciones import VENTANA_DIAS_DEFAULT, VENTANA_DIAS_MINIMA, VENTANA_DIAS_MAXIMA
+from .conciliacion import TOLERANCIA_DIAS_DEFAULT, TOLERANCIA_DIAS_MAXIMA
+from core.common.exceptions import ValidacionError, NegocioError
 from core.common.permissions import IsAdminOrReadOnly
+from core.common.media import normalizar_ruta, usuario_de_peticion, respuesta_archivo, url_firmada
+from core.common.comprimidos import respuesta_zip
+from core.common.autenticacion import autenticar_token
+from core.bootstrap import perfil_usuario
+from core.common.throttling import LoginUsuarioThrottle, LoginIPThrottle, contadores_login
 
 # Logger configuration
 logger = logging.getLogger(__name__)
@@ -45,41 +54,33 @@ logger = logging.getLogger(__name__)
 class CustomAuthToken(ObtainAuthToken):
     """
     Vista personalizada para autenticación que retorna token + datos de usuario + perfil socio.
+    Los intentos se limitan por usuario y por IP antes de verificar la contraseña.
     """
+    throttle_classes = [LoginUsuarioThrottle, LoginIPThrottle]
+
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data,
                                            context={'request': request})
         serializer.is_valid(raise_exception=True)
-        user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
+        token, created = Token.objects.get_or_create(user=serializer.validated_data['user'])
+        # Deja el token en la caché de autenticación: perfil y grupos salen de ella
+        user, token = autenticar_token(token.key)
         
-        # Obtener perfil de socio si existe
-        perfil_socio = None
-        try:
-            socio = user.perfil_socio
-            perfil_socio = {
-                'rol': socio.rol,
-                'parentesco': socio.parentesco,
-                'activo': socio.activo
-            }
-        except Socio.DoesNotExist:
-            pass
-        
-        return Response({
-            'token': token.key,
-            'user_id': user.pk,
-            'username': user.username,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'is_superuser': user.is_superuser,
-            'is_staff': user.is_staff,
-            'roles': [group.name for group in user.groups.all()],
-            'perfil_socio': perfil_socio
-        })
+        return Response({'token': token.key, **perfil_usuario(user)})
 
 
 from rest_framework.views import APIView
 
+class LimitesLoginView(APIView):
+    """
+    Contadores de intentos de login permitidos y rechazados por cada límite (solo staff).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(contadores_login())
+
+
 class CambiarContrasenaView(APIView):
     """
     Vista para cambiar la contraseña del usuario autenticado.
@@ -115,7 +116,7 @@ class CambiarContrasenaView(APIView):
 # VIEWSETS DE SOCIOS/FAMILIA
 # ============================================================================
 
-class SocioViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class SocioViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar socios/familia del proyecto.
     Solo administradores pueden crear/editar/eliminar socios.
@@ -123,6 +124,7 @@ class SocioViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = Socio.objects.filter(activo=True, eliminado=False)
     serializer_class = SocioSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminOrReadOnly]
+    dependencias_validador = ('usuario', 'usuario__groups')
 
     def get_queryset(self):
         """Optimiza queries."""
@@ -133,13 +135,15 @@ class SocioViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
 # VIEWSETS DE GALERÍA
 # ============================================================================
 
-class AlbumViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class AlbumViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar álbumes de fotos.
     """
     queryset = Album.objects.filter(eliminado=False)
     serializer_class = AlbumSerializer
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('fotos',)
+    dependencias_validador = ('creado_por',)
 
     def get_serializer_class(self):
         """Usa serializer ligero para listado."""
@@ -148,22 +152,49 @@ class AlbumViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
         return AlbumSerializer
 
     def get_queryset(self):
-        """Optimiza queries."""
-        queryset = super().get_queryset()
-        return queryset.select_related('creado_por').prefetch_related('fotos')
+        """Optimiza queries. Solo el listado necesita las fotos (para la portada)."""
+        queryset = super().get_queryset().select_related('creado_por')
+        if self.action == 'list':
+            queryset = queryset.prefetch_related('fotos')
+        return queryset
 
     def perform_create(self, serializer):
         """Asigna el usuario que crea el álbum."""
         serializer.save(creado_por=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def fotos(self, request, pk=None):
+        """
+        Fotos del álbum, paginadas y con URLs de sus derivados.
+        Reemplaza la lista anidada completa en el detalle del álbum.
+        """
+        album = self.get_object()
+        fotos = FotoAlbum.objects.filter(
+            album=album, eliminado=False
+        ).select_related('subido_por').order_by('-creado_en', '-id')
 
-class FotoAlbumViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+        pagina = self.paginate_queryset(fotos)
+        serializer = FotoAlbumSerializer(pagina, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def descargar_zip(self, request, pk=None):
+        """
+        Descarga todas las fotos del álbum en un ZIP generado en streaming.
+        Las fotos se guardan sin recomprimir y el envío empieza de inmediato.
+        """
+        album = self.get_object()
+        return respuesta_zip(MediaService.entradas_zip_album(album), f"{album.nombre}.zip")
+
+
+class FotoAlbumViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar fotos dentro de álbumes.
     """
     queryset = FotoAlbum.objects.filter(eliminado=False)
     serializer_class = FotoAlbumSerializer
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('subido_por',)
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
@@ -186,33 +217,46 @@ class FotoAlbumViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
 # VIEWSETS DE DOCUMENTOS
 # ============================================================================
 
-class CarpetaDocumentoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class CarpetaDocumentoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar carpetas de documentos.
     """
     queryset = CarpetaDocumento.objects.filter(eliminado=False)
     serializer_class = CarpetaDocumentoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('documentos',)
 
     def get_serializer_class(self):
-        """Usa serializer ligero para listado."""
-        if self.action == 'list':
+        """Usa serializer ligero para listado y para la descarga ZIP (que no anida documentos)."""
+        if self.action in ('list', 'descargar_zip'):
             return CarpetaDocumentoListSerializer
         return CarpetaDocumentoSerializer
 
     def get_queryset(self):
-        """Optimiza queries."""
-        queryset = super().get_queryset()
-        return queryset.prefetch_related('documentos').order_by('nombre')
+        """
+        Ordena por nombre. Los documentos anidados los precarga CarpetaDocumentoSerializer
+        solo si se piden; la descarga ZIP los recorre por su cuenta.
+        """
+        return super().get_queryset().order_by('nombre')
+
+    @action(detail=True, methods=['get'])
+    def descargar_zip(self, request, pk=None):
+        """
+        Descarga todos los documentos de la carpeta en un ZIP generado en streaming.
+        La memoria usada no depende del tamaño de la carpeta.
+        """
+        carpeta = self.get_object()
+        return respuesta_zip(MediaService.entradas_zip_carpeta(carpeta), f"{carpeta.nombre}.zip")
 
 
-class DocumentoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class DocumentoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar documentos.
     """
     queryset = Documento.objects.filter(eliminado=False)
     serializer_class = DocumentoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('carpeta', 'subido_por')
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
@@ -245,27 +289,118 @@ class DocumentoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.Model
         serializer.save(subido_por=self.request.user)
 
 
+class SubidaArchivoViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Subidas reanudables por partes para documentos y fotos de álbum.
+    
+    1. POST   subidas/                      crea la sesión (nombre, tamaño, destino)
+    2. PUT    subidas/{id}/chunks/{n}/      envía la parte n (cuerpo binario, reintentable)
+    3. GET    subidas/{id}/                 consulta qué partes ya llegaron (para reanudar)
+    4. POST   subidas/{id}/finalizar/       ensambla y crea el Documento o FotoAlbum
+    """
+    queryset = SubidaArchivo.objects.all()
+    serializer_class = SubidaArchivoSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """Cada usuario solo ve sus propias sesiones."""
+        return super().get_queryset().filter(usuario=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(usuario=self.request.user, expira_en=SubidaService.nueva_expiracion())
+
+    def _verificar_vigente(self, subida):
+        """Respuesta de error si la sesión ya no admite partes, o None."""
+        if subida.estado != 'PENDIENTE':
+            return Response({"error": "La subida ya fue finalizada"}, status=status.HTTP_409_CONFLICT)
+        if subida.expira_en < timezone.now():
+            return Response({"error": "La sesión de subida expiró"}, status=status.HTTP_410_GONE)
+        return None
+
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<numero>[0-9]+)')
+    def chunk(self, request, pk=None, numero=None):
+        """
+        Recibe una parte como cuerpo binario (application/octet-stream).
+        El cuerpo no pasa por los parsers: se copia a disco en bloques.
+        """
+        subida = self.get_object()
+        error = self._verificar_vigente(subida)
+        if error:
+            return error
+
+        longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+        try:
+            SubidaService.guardar_chunk(subida, int(numero), request.stream, longitud)
+        except ValidacionError as e:
+            return Response({"error": e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        recibidos = SubidaService.chunks_recibidos(subida)
+        return Response({
+            'numero': int(numero),
+            'recibidos': len(recibidos),
+            'total_chunks': subida.total_chunks,
+            'completa': len(recibidos) == subida.total_chunks,
+        })
+
+    @action(detail=True, methods=['post'])
+    def finalizar(self, request, pk=None):
+        """
+        Ensambla las partes y crea el Documento o FotoAlbum con los datos enviados
+        (los mismos campos que la subida directa, sin el archivo).
+        """
+        subida = self.get_object()
+        error = self._verificar_vigente(subida)
+        if error:
+            return error
+
+        if subida.destino == 'DOCUMENTO':
+            serializer_class, campo_archivo = DocumentoSerializer, 'archivo'
+        else:
+            serializer_class, campo_archivo = FotoAlbumSerializer, 'imagen'
+
+        try:
+            with transaction.atomic():
+                subida = SubidaService.bloquear_pendiente(subida)
+                archivo = SubidaService.ensamblar(subida)
+                try:
+                    datos = request.data.copy()
+                    datos[campo_archivo] = archivo
+                    serializer = serializer_class(data=datos, context=self.get_serializer_context())
+                    serializer.is_valid(raise_exception=True)
+                    instancia = serializer.save(subido_por=request.user)
+                finally:
+                    archivo.close()
+                SubidaService.marcar_completada(subida, instancia)
+        except ValidacionError as e:
+            return Response({"error": e.message, "detalle": e.detalle}, status=status.HTTP_400_BAD_REQUEST)
+        except NegocioError as e:
+            return Response({"error": e.message}, status=status.HTTP_409_CONFLICT)
+
+        logger.info(f'Subida {subida.pk} finalizada: {subida.destino} #{instancia.pk}')
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
 # ============================================================================
 # VIEWSETS DE PROVEEDORES
 # ============================================================================
 
-class ProveedorViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class ProveedorViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar proveedores."""
     queryset = Proveedor.objects.filter(eliminado=False)
     serializer_class = ProveedorSerializer
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('gastos',)
 
     def get_queryset(self):
-        """Optimiza queries."""
-        queryset = super().get_queryset()
-        return queryset.prefetch_related('gastos').order_by('nombre')
+        """Los totales por proveedor los anota ProveedorSerializer en el queryset."""
+        return super().get_queryset().order_by('nombre')
 
 
 # ============================================================================
 # VIEWSETS DE PROYECTOS
 # ============================================================================
 
-class ProyectoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class ProyectoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar proyectos de construcción.
     Incluye endpoint personalizado para exportar reportes en PDF.
@@ -273,21 +408,72 @@ class ProyectoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
     queryset = Proyecto.objects.filter(eliminado=False)
     serializer_class = ProyectoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Los totales cambian con UPDATE desde Gasto._aplicar_deltas, sin señales de Proyecto
+    relaciones_validador = ('gastos',)
 
     def get_queryset(self):
-        """Optimiza queries con prefetch_related."""
-        queryset = super().get_queryset()
-        return queryset.prefetch_related(
-            'gastos__categoria',
-            'gastos__proveedor_rel',
-            'gastos__usuario',
-            'gastos__fotos'
-        )
+        """
+        Los totales del proyecto están desnormalizados (total_gastado, cantidad_gastos),
+        así que no hace falta precargar los gastos para listar proyectos.
+        """
+        return super().get_queryset()
+
+    @action(detail=False, methods=['get'])
+    def proyecciones(self, request):
+        """
+        Ritmo de gasto y fecha estimada de agotamiento del presupuesto de todos los proyectos.
+        
+        Query params:
+            ventana: Días hacia atrás usados para el cálculo (default 90, entre 14 y 365)
+        """
+        try:
+            ventana = int(request.query_params.get('ventana', VENTANA_DIAS_DEFAULT))
+        except ValueError:
+            return Response({"error": "El parámetro 'ventana' debe ser un número de días"}, status=status.HTTP_400_BAD_REQUEST)
+        if not VENTANA_DIAS_MINIMA <= ventana <= VENTANA_DIAS_MAXIMA:
+            return Response(
+                {"error": f"La ventana debe estar entre {VENTANA_DIAS_MINIMA} y {VENTANA_DIAS_MAXIMA} días"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(FinanzasService.obtener_proyecciones_portafolio(ventana))
+
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def conciliar(self, request, pk=None):
+        """
+        Concilia un extracto bancario CSV con los gastos del proyecto.
+        Retorna las líneas conciliadas, las ambiguas (varios gastos posibles) y las
+        que no tienen gasto, con el gasto retroactivo propuesto para registrarlas.
+        
+        Body (multipart):
+            - archivo: CSV del banco (columnas fecha, monto o débito, referencia, descripción)
+            - tolerancia_dias: Días de diferencia admitidos entre banco y registro (default 3)
+        """
+        proyecto = self.get_object()
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response({"error": "Debe enviar el extracto en el campo 'archivo'"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            tolerancia = int(request.data.get('tolerancia_dias', TOLERANCIA_DIAS_DEFAULT))
+        except ValueError:
+            return Response({"error": "'tolerancia_dias' debe ser un número de días"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= tolerancia <= TOLERANCIA_DIAS_MAXIMA:
+            return Response(
+                {"error": f"La tolerancia debe estar entre 0 y {TOLERANCIA_DIAS_MAXIMA} días"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            resultado = FinanzasService.conciliar_extracto(proyecto, archivo, tolerancia)
+        except ValidacionError as e:
+            return Response({"error": e.message, "detalle": e.detalle}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado)
 
     @action(detail=True, methods=['get'])
     def exportar_pdf(self, request, pk=None):
         """
         Genera un reporte PDF del proyecto con filtros opcionales.
+        Para reportes grandes usar POST reportes/ (generación en segundo plano).
         
         Query params:
             - fecha_inicio: Fecha inicio del filtro (YYYY-MM-DD)
@@ -297,146 +483,80 @@ class ProyectoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
             - mes_anterior: Si es 'true', filtra solo el mes anterior
         """
         proyecto = self.get_object()
-        gastos = Gasto.objects.filter(
-            proyecto=proyecto,
-            eliminado=False
-        ).select_related(
-            'categoria', 'proveedor_rel', 'usuario', 'proyecto'
-        ).prefetch_related('fotos').order_by('fecha')
-
-        # Aplicar filtros
-        fecha_inicio = request.query_params.get('fecha_inicio')
-        fecha_fin = request.query_params.get('fecha_fin')
-        categoria_id = request.query_params.get('categoria')
-        mes_actual = request.query_params.get('mes_actual', '').lower() == 'true'
-        mes_anterior = request.query_params.get('mes_anterior', '').lower() == 'true'
-
-        # Filtro por mes actual
-        if mes_actual:
-            hoy = datetime.now()
-            fecha_inicio = hoy.replace(day=1).strftime('%Y-%m-%d')
-            fecha_fin = hoy.strftime('%Y-%m-%d')
-
-        # Filtro por mes anterior
-        if mes_anterior:
-            hoy = datetime.now()
-            primer_dia_mes_actual = hoy.replace(day=1)
-            ultimo_dia_mes_anterior = primer_dia_mes_actual - timedelta(days=1)
-            primer_dia_mes_anterior = ultimo_dia_mes_anterior.replace(day=1)
-            fecha_inicio = primer_dia_mes_anterior.strftime('%Y-%m-%d')
-            fecha_fin = ultimo_dia_mes_anterior.strftime('%Y-%m-%d')
-
-        if fecha_inicio:
-            gastos = gastos.filter(fecha__gte=fecha_inicio)
-        if fecha_fin:
-            gastos = gastos.filter(fecha__lte=fecha_fin)
-        if categoria_id:
-            gastos = gastos.filter(categoria_id=categoria_id)
+        try:
+            filtros = normalizar_filtros(request.query_params)
+        except ValidacionError as e:
+            return Response({"error": e.message}, status=status.HTTP_400_BAD_REQUEST)
 
         # Crear el buffer en memoria
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Título y Encabezado
-        elements.append(Paragraph(f"Reporte de Inversión: {proyecto.nombre}", styles['Title']))
-        elements.append(Paragraph(f"Presupuesto Total: {proyecto.presupuesto_objetivo:,.2f} Bs", styles['Normal']))
-        elements.append(Paragraph(f"Total Gastado: {proyecto.total_gastado:,.2f} Bs", styles['Normal']))
-        elements.append(Paragraph(f"Saldo Disponible: {proyecto.saldo_restante:,.2f} Bs", styles['Normal']))
+        generar_pdf_gastos(proyecto, filtros, buffer)
+        buffer.seek(0)
         
-        # Mostrar filtros aplicados
-        if fecha_inicio or fecha_fin or categoria_id:
-            filtros = []
-            if fecha_inicio:
-                filtros.append(f"Desde: {fecha_inicio}")
-            if fecha_fin:
-                filtros.append(f"Hasta: {fecha_fin}")
-            if categoria_id:
-                try:
-                    cat = Categoria.objects.get(pk=categoria_id)
-                    filtros.append(f"Categoría: {cat.nombre}")
-                except Categoria.DoesNotExist:
-                    pass
-            elements.append(Paragraph(f"Filtros: {', '.join(filtros)}", styles['Italic']))
+        return FileResponse(buffer, as_attachment=True, filename=nombre_archivo_reporte(proyecto, filtros))
 
-        elements.append(Spacer(1, 20))
+    @action(detail=True, methods=['post'])
+    def reportes(self, request, pk=None):
+        """
+        Solicita el reporte PDF en segundo plano y retorna el trabajo creado.
+        Si el mismo reporte ya fue generado y los datos no cambiaron, se retorna completado.
+        
+        Body (mismos filtros que exportar_pdf):
+            - fecha_inicio, fecha_fin, categoria, mes_actual, mes_anterior
+        """
+        proyecto = self.get_object()
+        try:
+            filtros = normalizar_filtros(request.data)
+        except ValidacionError as e:
+            return Response({"error": e.message}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Resumen por Categoría
-        resumen_categorias = gastos.values('categoria__nombre').annotate(
-            total=Sum('monto')
-        ).order_by('-total')
+        job = ReporteService.solicitar_reporte(proyecto, filtros, usuario=request.user)
+        serializer = ReporteJobSerializer(job, context={'request': request})
+        codigo = status.HTTP_200_OK if job.estado == 'COMPLETADO' else status.HTTP_202_ACCEPTED
+        return Response(serializer.data, status=codigo)
 
-        if resumen_categorias:
-            elements.append(Paragraph("Resumen por Categoría", styles['Heading2']))
-            data_resumen = [['Categoría', 'Total (Bs)']]
-            for cat in resumen_categorias:
-                data_resumen.append([cat['categoria__nombre'], f"{cat['total']:,.2f}"])
-            
-            tabla_resumen = Table(data_resumen, colWidths=[300, 150])
-            tabla_resumen.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ]))
-            elements.append(tabla_resumen)
-            elements.append(Spacer(1, 20))
-
-        # Tabla de Gastos Detallados
-        elements.append(Paragraph("Detalle de Gastos", styles['Heading2']))
-        data = [['Fecha', 'Descripción', 'Categoría', 'Monto (Bs)']]
-        total_filtrado = 0
-        for g in gastos:
-            data.append([
-                g.fecha.strftime('%d/%m/%Y'),
-                g.descripcion[:35],
-                g.categoria.nombre,
-                f"{g.monto:,.2f}"
-            ])
-            total_filtrado += g.monto
-
-        # Fila de total
-        data.append(['', '', 'TOTAL:', f"{total_filtrado:,.2f}"])
-
-        # Estilo de la tabla
-        tabla = Table(data, colWidths=[70, 230, 100, 80])
-        tabla.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.green),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (3, 0), (3, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (2, -1), (-1, -1), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.whitesmoke, colors.white]),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-        ]))
-        
-        elements.append(tabla)
-        doc.build(elements)
 
-        buffer.seek(0)
+# ============================================================================
+# VIEWSETS DE REPORTES
+# ============================================================================
+
+class ReporteJobViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet de consulta de reportes PDF generados en segundo plano.
+    El detalle es una lectura por PK para que la PWA pueda consultar el estado seguido.
+    """
+    queryset = ReporteJob.objects.filter(eliminado=False)
+    serializer_class = ReporteJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        """Permite filtrar reportes por proyecto."""
+        queryset = super().get_queryset()
+        
+        proyecto_id = self.request.query_params.get('proyecto')
+        if proyecto_id:
+            queryset = queryset.filter(proyecto_id=proyecto_id)
         
-        # Nombre del archivo con filtros
-        nombre_archivo = f'Reporte_{proyecto.nombre}'
-        if mes_actual:
-            nombre_archivo += '_MesActual'
-        elif mes_anterior:
-            nombre_archivo += '_MesAnterior'
+        return queryset.order_by('-creado_en')
+
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        """Descarga el PDF generado directamente desde disco."""
+        job = self.get_object()
+        if job.estado != 'COMPLETADO' or not job.archivo:
+            return Response(
+                {"error": "El reporte aún no está listo", "estado": job.estado},
+                status=status.HTTP_409_CONFLICT
+            )
         
-        return FileResponse(buffer, as_attachment=True, filename=f'{nombre_archivo}.pdf')
+        return respuesta_archivo(job.archivo.name, nombre_descarga=job.nombre_archivo)
 
 
 # ============================================================================
 # VIEWSETS DE CATEGORÍAS
 # ============================================================================
 
-class CategoriaViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class CategoriaViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar categorías de gastos."""
     queryset = Categoria.objects.filter(eliminado=False)
     serializer_class = CategoriaSerializer
@@ -451,7 +571,7 @@ class CategoriaViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
 # VIEWSETS DE GASTOS
 # ============================================================================
 
-class GastoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class GastoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """
     ViewSet para registrar y gestionar gastos del proyecto.
     Incluye validaciones automáticas de presupuesto y filtros.
@@ -459,6 +579,12 @@ class GastoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelView
     queryset = Gasto.objects.filter(eliminado=False)
     serializer_class = GastoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('fotos',)
+    dependencias_validador = (
+        'proyecto', 'categoria', 'usuario', 'usuario__groups', 'proveedor_rel', 'proveedor_rel__gastos'
+    )
+    pagination_class = KeysetPagination
+    orden_keyset = ('-fecha', '-id')
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
@@ -501,29 +627,29 @@ class GastoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelView
         proyecto = serializer.validated_data['proyecto']
         monto_nuevo = serializer.validated_data['monto']
         
-        # Usar servicio para validar presupuesto
+        # Bloquear el proyecto, validar saldo e insertar el gasto en una sola transacción
         try:
-            FinanzasService.validar_presupuesto_disponible(proyecto, monto_nuevo)
-        except Exception as e:
+            with transaction.atomic():
+                FinanzasService.reservar_presupuesto(proyecto, monto_nuevo)
+                self.perform_create(serializer)
+        except PresupuestoExcedidoError as e:
             logger.warning(
                 f'Intento de gasto que excede presupuesto: Proyecto={proyecto.nombre}, '
                 f'Monto={monto_nuevo}'
             )
-            saldo_disponible = FinanzasService.calcular_saldo_proyecto(proyecto)
             return Response(
                 {
                     "error": ERROR_PRESUPUESTO_EXCEDIDO,
                     "detalle": {
-                        "presupuesto_total": str(proyecto.presupuesto_objetivo),
-                        "total_gastado": str(proyecto.presupuesto_objetivo - saldo_disponible),
-                        "saldo_disponible": str(saldo_disponible),
+                        "presupuesto_total": str(e.proyecto.presupuesto_objetivo),
+                        "total_gastado": str(e.proyecto.total_gastado),
+                        "saldo_disponible": str(e.saldo_disponible),
                         "monto_solicitado": str(monto_nuevo)
                     }
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        self.perform_create(serializer)
         logger.info(
             f'Gasto creado exitosamente: {monto_nuevo} Bs en proyecto {proyecto.nombre}'
         )
@@ -531,6 +657,7 @@ class GastoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelView
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     @action(detail=False, methods=['get'])
+    @cachear_agregado(Gasto)
     def resumen_mensual(self, request):
         """
         Retorna un resumen de gastos agrupado por mes.
@@ -556,4 +683,45 @@ class GastoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelView
             total=Sum('monto')
         ).order_by('-mes')
         
-        return Response(list(resumen))
\ No newline at end of file
+        return Response(list(resumen))
+
+# ============================================================================
+# MEDIA PROTEGIDA
+# ============================================================================
+
+@require_safe
+def media_protegida(request, ruta):
+    """
+    Entrega archivos de /media/ solo a usuarios autenticados con acceso al registro dueño.
+    Vista Django simple (sin DRF): autoriza y delega la transferencia a nginx.
+    """
+    ruta = normalizar_ruta(ruta)
+    usuario = usuario_de_peticion(request, ruta)
+    if usuario is None:
+        response = JsonResponse({"detail": "Las credenciales de autenticación no se proveyeron."}, status=401)
+        response['WWW-Authenticate'] = 'Token'
+        return response
+
+    if not MediaService.puede_ver(usuario, ruta):
+        raise Http404
+    return respuesta_archivo(ruta)
+
+
+class FirmarMediaView(APIView):
+    """
+    URL firmada de corta duración para un archivo de /media/ (?ruta=comprobantes/...).
+    Para <img src> y enlaces de descarga, en lugar de poner el token en la URL.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        ruta = request.query_params.get('ruta', '')
+        if ruta.startswith(settings.MEDIA_URL):
+            ruta = ruta[len(settings.MEDIA_URL):]
+        ruta = normalizar_ruta(ruta)
+        if not MediaService.puede_ver(request.user, ruta):
+            raise Http404
+        return Response({
+            'url': request.build_absolute_uri(url_firmada(request.user, ruta)),
+            'vence_en': settings.MEDIA_FIRMA_TTL,
+        })
@@ -5,3 +5,10 @@ class InventarioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventario'
     verbose_name = 'Inventario'
+
+    def ready(self):
+        from core.common.cache_agregados import observar_modelos
+        from .models import Material, MovimientoInventario
+
+        # Invalidan las respuestas cacheadas de resumen_mensual
+        observar_modelos(Material, MovimientoInventario)
@@ -2,10 +2,12 @@
 Serializers para el módulo de inventario.
 """
 from rest_framework import serializers
+
+from core.common.serializers import CamposDinamicosMixin, ValoresListSerializer, ValoresSerializerMixin
 from .models import Material, MovimientoInventario
 
 
-class MaterialSerializer(serializers.ModelSerializer):
+class MaterialSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para materiales con información calculada."""
     stock_bajo = serializers.ReadOnlyField()
     porcentaje_stock = serializers.ReadOnlyField()
@@ -28,10 +30,11 @@ class MaterialSerializer(serializers.ModelSerializer):
         return obj.movimientos.filter(eliminado=False).count()
 
 
-class MaterialListSerializer(serializers.ModelSerializer):
+class MaterialListSerializer(CamposDinamicosMixin, ValoresSerializerMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de materiales."""
     stock_bajo = serializers.ReadOnlyField()
     tipo_inventario_display = serializers.CharField(source='get_tipo_inventario_display', read_only=True)
+    campos_calculados = {'stock_bajo': ('stock_actual', 'stock_minimo_alerta')}
 
     class Meta:
         model = Material
@@ -39,10 +42,17 @@ class MaterialListSerializer(serializers.ModelSerializer):
             'id', 'nombre', 'codigo', 'tipo_inventario', 'tipo_inventario_display',
             'unidad_medida', 'stock_actual', 'stock_minimo_alerta', 'stock_bajo'
         ]
+        list_serializer_class = ValoresListSerializer
 
 
-class MovimientoInventarioSerializer(serializers.ModelSerializer):
+class MovimientoInventarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para movimientos de inventario."""
+    relaciones_campos = {
+        'material_nombre': ('material',),
+        'material_unidad': ('material',),
+        'usuario_nombre': ('usuario',),
+        'gasto_detalle': ('gasto',),
+    }
     material_nombre = serializers.ReadOnlyField(source='material.nombre')
     material_unidad = serializers.ReadOnlyField(source='material.unidad_medida')
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
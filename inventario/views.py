@@ -15,18 +15,21 @@ from .serializers import (
     MaterialSerializer, MaterialListSerializer,
     MovimientoInventarioSerializer
 )
-from core.common.mixins import OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.pagination import KeysetPagination
+from core.common.cache_agregados import cachear_agregado
 from core.common.utils import obtener_rango_mes, obtener_mes_anterior
 
 logger = logging.getLogger(__name__)
 
 
-class MaterialViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class MaterialViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar materiales de inventario.
     """
     queryset = Material.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('movimientos',)
 
     def get_serializer_class(self):
         """Usa serializer ligero para listado."""
@@ -89,6 +92,7 @@ class MaterialViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
 
 
 class MovimientoInventarioViewSet(
+    ConditionalGetMixin,
     OptimizedQuerySetMixin, 
     FilterByDateMixin, 
     viewsets.ModelViewSet
@@ -99,6 +103,9 @@ class MovimientoInventarioViewSet(
     queryset = MovimientoInventario.objects.filter(eliminado=False)
     serializer_class = MovimientoInventarioSerializer
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('material', 'gasto', 'usuario')
+    pagination_class = KeysetPagination
+    orden_keyset = ('-fecha', '-id')
 
     def get_queryset(self):
         """Optimiza queries y permite filtros."""
@@ -106,10 +113,8 @@ class MovimientoInventarioViewSet(
         
         # Optimizar con select_related
         queryset = queryset.select_related(
-            'material', 'usuario'
+            'material', 'usuario', 'gasto'
         )
-        # Gasto puede ser None, así que solo lo incluimos si existe
-        # No podemos usar select_related con relaciones opcionales que pueden ser None
         
         # Filtros adicionales
         material_id = self.request.query_params.get('material')
@@ -132,6 +137,7 @@ class MovimientoInventarioViewSet(
         serializer.save(usuario=self.request.user)
 
     @action(detail=False, methods=['get'])
+    @cachear_agregado(MovimientoInventario, Material)
     def resumen_mensual(self, request):
         """
         Retorna un resumen de movimientos agrupado por mes.
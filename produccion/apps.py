@@ -5,3 +5,10 @@ class ProduccionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'produccion'
     verbose_name = 'Producción'
+
+    def ready(self):
+        from core.common.cache_agregados import observar_modelos
+        from .models import Galpon, Lote, Recoleccion, CalidadHuevo
+
+        # Invalidan resumen_mensual, estadisticas y las representaciones cacheadas de lotes
+        observar_modelos(Galpon, Lote, Recoleccion, CalidadHuevo)
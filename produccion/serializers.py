@@ -2,10 +2,15 @@
 Serializers para el módulo de producción.
 """
 from rest_framework import serializers
+
+from core.common.serializers import (
+    CamposDinamicosMixin, RepresentacionCacheadaListSerializer, RepresentacionCacheadaMixin,
+    ValoresListSerializer, ValoresSerializerMixin
+)
 from .models import Galpon, Lote, Recoleccion, CalidadHuevo
 
 
-class GalponSerializer(serializers.ModelSerializer):
+class GalponSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para galpones."""
     cantidad_aves_actual = serializers.ReadOnlyField()
     cantidad_lotes_activos = serializers.SerializerMethodField()
@@ -24,7 +29,7 @@ class GalponSerializer(serializers.ModelSerializer):
         return obj.lotes.filter(activo=True, eliminado=False).count()
 
 
-class GalponListSerializer(serializers.ModelSerializer):
+class GalponListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de galpones."""
     cantidad_aves_actual = serializers.ReadOnlyField()
 
@@ -33,8 +38,15 @@ class GalponListSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombre', 'capacidad_maxima', 'activo', 'cantidad_aves_actual']
 
 
-class LoteSerializer(serializers.ModelSerializer):
-    """Serializer para lotes."""
+class LoteSerializer(RepresentacionCacheadaMixin, CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Serializer para lotes. Los totales de recolecciones cuestan hasta cinco consultas por lote:
+    la representación se cachea hasta que cambia el lote, su galpón o alguna recolección.
+    """
+    versiones_representacion = (Recoleccion, Galpon)
+    relaciones_campos = {
+        'galpon_nombre': ('galpon',),
+    }
     galpon_nombre = serializers.ReadOnlyField(source='galpon.nombre')
     estado_display = serializers.CharField(source='get_estado_display', read_only=True)
     edad_dias = serializers.ReadOnlyField()
@@ -51,17 +63,22 @@ class LoteSerializer(serializers.ModelSerializer):
             'cantidad_recolecciones', 'notas', 'creado_en', 'actualizado_en'
         ]
         read_only_fields = ['creado_en', 'actualizado_en']
+        list_serializer_class = RepresentacionCacheadaListSerializer
 
     def get_cantidad_recolecciones(self, obj):
         """Retorna la cantidad de recolecciones del lote."""
         return obj.recolecciones.filter(eliminado=False).count()
 
 
-class LoteListSerializer(serializers.ModelSerializer):
+class LoteListSerializer(CamposDinamicosMixin, ValoresSerializerMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de lotes."""
+    relaciones_campos = {
+        'galpon_nombre': ('galpon',),
+    }
     galpon_nombre = serializers.ReadOnlyField(source='galpon.nombre')
     estado_display = serializers.CharField(source='get_estado_display', read_only=True)
     edad_dias = serializers.ReadOnlyField()
+    campos_calculados = {'edad_dias': ('fecha_ingreso', 'fecha_salida')}
 
     class Meta:
         model = Lote
@@ -69,10 +86,17 @@ class LoteListSerializer(serializers.ModelSerializer):
             'id', 'nombre', 'galpon', 'galpon_nombre', 'fecha_ingreso',
             'cantidad_aves', 'estado', 'estado_display', 'activo', 'edad_dias'
         ]
+        list_serializer_class = ValoresListSerializer
 
 
-class RecoleccionSerializer(serializers.ModelSerializer):
+class RecoleccionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para recolecciones."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+        'lote_galpon': ('lote__galpon',),
+        'recolectado_por_nombre': ('recolectado_por',),
+        'tiene_calidad': ('calidad_huevos',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     lote_galpon = serializers.ReadOnlyField(source='lote.galpon.nombre')
     recolectado_por_nombre = serializers.SerializerMethodField()
@@ -98,17 +122,26 @@ class RecoleccionSerializer(serializers.ModelSerializer):
         return obj.calidad_huevos.exists()
 
 
-class RecoleccionListSerializer(serializers.ModelSerializer):
+class RecoleccionListSerializer(CamposDinamicosMixin, ValoresSerializerMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de recolecciones."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
 
     class Meta:
         model = Recoleccion
         fields = ['id', 'lote', 'lote_nombre', 'fecha', 'cantidad_huevos']
+        list_serializer_class = ValoresListSerializer
 
 
-class CalidadHuevoSerializer(serializers.ModelSerializer):
+class CalidadHuevoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para calidad de huevos."""
+    relaciones_campos = {
+        'recoleccion_fecha': ('recoleccion',),
+        'recoleccion_lote': ('recoleccion__lote',),
+        'evaluado_por_nombre': ('evaluado_por',),
+    }
     recoleccion_fecha = serializers.ReadOnlyField(source='recoleccion.fecha')
     recoleccion_lote = serializers.ReadOnlyField(source='recoleccion.lote.nombre')
     tipo_defecto_display = serializers.CharField(source='get_tipo_defecto_display', read_only=True)
@@ -1,4 +1,100 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from .models import Galpon, Lote, Recoleccion, CalidadHuevo
+from .serializers import LoteListSerializer
 
 # Tests para el módulo de producción
-# TODO: Implementar tests unitarios
+
+
+class ListadoValoresTests(TestCase):
+    """Los listados leídos con .values() coinciden con la serialización normal."""
+
+    def setUp(self):
+        galpon = Galpon.objects.create(nombre='Galpón 1', capacidad_maxima=500)
+        self.lote = Lote.objects.create(
+            nombre='Lote A', galpon=galpon, fecha_ingreso=date.today() - timedelta(days=30), cantidad_aves=200
+        )
+        Lote.objects.create(
+            nombre='Lote B', galpon=galpon, fecha_ingreso=date.today() - timedelta(days=90),
+            fecha_salida=date.today() - timedelta(days=10), cantidad_aves=150, estado='PRODUCCION'
+        )
+        for dia in range(5):
+            Recoleccion.objects.create(lote=self.lote, fecha=date.today() - timedelta(days=dia), cantidad_huevos=100 + dia)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('registrador', password='x'))
+
+    def test_misma_representacion(self):
+        queryset = Lote.objects.select_related('galpon').order_by('id')
+        normal = serializers.ListSerializer(queryset, child=LoteListSerializer()).data
+        self.assertEqual(LoteListSerializer(queryset, many=True).data, normal)
+
+    def test_listado_paginado_por_keyset(self):
+        respuesta = self.client.get('/api/produccion/recolecciones/', {'page_size': 3, 'fields': 'id,lote_nombre,fecha'})
+        self.assertEqual(len(respuesta.data['results']), 3)
+        self.assertEqual(set(respuesta.data['results'][0]), {'id', 'lote_nombre', 'fecha'})
+        self.assertEqual(respuesta.data['results'][0]['lote_nombre'], 'Lote A')
+
+        siguiente = self.client.get(respuesta.data['next'])
+        self.assertEqual(len(siguiente.data['results']), 2)
+
+
+class CacheAgregadosTests(TestCase):
+    """resumen_mensual se sirve de la caché hasta que cambian los datos."""
+
+    def setUp(self):
+        cache.clear()
+        galpon = Galpon.objects.create(nombre='Galpón 1', capacidad_maxima=500)
+        self.lote = Lote.objects.create(
+            nombre='Lote A', galpon=galpon, fecha_ingreso=date.today() - timedelta(days=30), cantidad_aves=200
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('registrador', password='x'))
+
+    def crear_recoleccion(self, dias, huevos):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recoleccion.objects.create(
+                lote=self.lote, fecha=date.today() - timedelta(days=dias), cantidad_huevos=huevos
+            )
+
+    def total(self):
+        respuesta = self.client.get('/api/produccion/recolecciones/resumen_mensual/', {'lote': self.lote.pk})
+        return sum(fila['total_huevos'] for fila in respuesta.data)
+
+    def test_invalida_al_escribir(self):
+        self.crear_recoleccion(0, 100)
+        self.assertEqual(self.total(), 100)
+
+        with self.assertNumQueries(1):  # solo las versiones
+            self.assertEqual(self.total(), 100)
+
+        recoleccion = self.crear_recoleccion(1, 50)
+        self.assertEqual(self.total(), 150)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recoleccion.soft_delete()
+        self.assertEqual(self.total(), 100)
+
+    def estadisticas(self):
+        return self.client.get(f'/api/produccion/lotes/{self.lote.pk}/estadisticas/').data
+
+    def test_estadisticas_invalida_al_escribir(self):
+        recoleccion = self.crear_recoleccion(0, 100)
+        self.assertEqual(self.estadisticas()['total_huevos'], 100)
+
+        with self.assertNumQueries(1):  # solo las versiones
+            self.assertEqual(self.estadisticas()['total_huevos'], 100)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CalidadHuevo.objects.create(recoleccion=recoleccion, cantidad_primera=80, cantidad_segunda=20)
+        self.assertEqual(self.estadisticas()['calidad']['total_evaluado'], 100)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lote.cantidad_aves = 100
+            self.lote.save()
+        self.assertEqual(self.estadisticas()['porcentaje_postura'], 100.0)
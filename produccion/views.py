@@ -11,21 +11,25 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 
 from .models import Galpon, Lote, Recoleccion, CalidadHuevo
+from .services import ProduccionService
 from .serializers import (
     GalponSerializer, GalponListSerializer,
     LoteSerializer, LoteListSerializer,
     RecoleccionSerializer, RecoleccionListSerializer,
     CalidadHuevoSerializer
 )
-from core.common.mixins import OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.pagination import KeysetPagination
+from core.common.cache_agregados import cachear_agregado
 
 logger = logging.getLogger(__name__)
 
 
-class GalponViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class GalponViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar galpones."""
     queryset = Galpon.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('lotes',)
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -35,7 +39,6 @@ class GalponViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
     def get_queryset(self):
         """Optimiza queries y permite filtros."""
         queryset = super().get_queryset()
-        queryset = queryset.prefetch_related('lotes')
         
         activo = self.request.query_params.get('activo')
         if activo is not None:
@@ -44,10 +47,12 @@ class GalponViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
         return queryset.order_by('nombre')
 
 
-class LoteViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class LoteViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar lotes."""
     queryset = Lote.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('recolecciones',)
+    dependencias_validador = ('galpon',)
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -57,14 +62,7 @@ class LoteViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewS
     def get_queryset(self):
         """Optimiza queries y permite filtros."""
         queryset = super().get_queryset()
-        queryset = queryset.select_related('galpon').prefetch_related(
-            'recolecciones',
-            'vacunaciones',
-            'tratamientos',
-            'mortalidades',
-            'raciones',
-            'consumos_diarios'
-        )
+        queryset = queryset.select_related('galpon')
         
         galpon_id = self.request.query_params.get('galpon')
         estado = self.request.query_params.get('estado')
@@ -90,6 +88,7 @@ class LoteViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewS
         return queryset.order_by('-fecha_ingreso')
 
     @action(detail=True, methods=['get'])
+    @cachear_agregado(Lote, Recoleccion, CalidadHuevo)
     def estadisticas(self, request, pk=None):
         """Retorna estadísticas del lote usando servicios."""
         lote = self.get_object()
@@ -105,10 +104,14 @@ class LoteViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewS
         })
 
 
-class RecoleccionViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class RecoleccionViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar recolecciones."""
     queryset = Recoleccion.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    relaciones_validador = ('calidad_huevos',)
+    dependencias_validador = ('lote', 'lote__galpon', 'recolectado_por')
+    pagination_class = KeysetPagination
+    orden_keyset = ('-fecha', '-id')
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -133,6 +136,7 @@ class RecoleccionViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.Mod
         serializer.save(recolectado_por=self.request.user)
 
     @action(detail=False, methods=['get'])
+    @cachear_agregado(Recoleccion, Lote)
     def resumen_mensual(self, request):
         """Retorna resumen de recolecciones por mes."""
         queryset = self.get_queryset()
@@ -151,11 +155,12 @@ class RecoleccionViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.Mod
         return Response(list(resumen))
 
 
-class CalidadHuevoViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class CalidadHuevoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar calidad de huevos."""
     queryset = CalidadHuevo.objects.filter(eliminado=False)
     serializer_class = CalidadHuevoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('recoleccion', 'recoleccion__lote', 'evaluado_por')
 
     def get_queryset(self):
         """Optimiza queries y permite filtros."""
@@ -5,3 +5,10 @@ class SaludConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'salud'
     verbose_name = 'Salud'
+
+    def ready(self):
+        from core.common.cache_agregados import observar_modelos
+        from .models import Vacunacion, Tratamiento, Mortalidad, HistorialVeterinario
+
+        # Invalidan las respuestas cacheadas de resumen_mensual y los ETag de los listados
+        observar_modelos(Vacunacion, Tratamiento, Mortalidad, HistorialVeterinario)
@@ -2,11 +2,18 @@
 Serializers para el módulo de salud.
 """
 from rest_framework import serializers
+
+from core.common.serializers import CamposDinamicosMixin, ValoresListSerializer, ValoresSerializerMixin
 from .models import Vacunacion, Tratamiento, Mortalidad, HistorialVeterinario
 
 
-class VacunacionSerializer(serializers.ModelSerializer):
+class VacunacionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para vacunaciones."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+        'lote_galpon': ('lote__galpon',),
+        'aplicado_por_nombre': ('aplicado_por',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     lote_galpon = serializers.ReadOnlyField(source='lote.galpon.nombre')
     aplicado_por_nombre = serializers.SerializerMethodField()
@@ -27,8 +34,11 @@ class VacunacionSerializer(serializers.ModelSerializer):
         return None
 
 
-class VacunacionListSerializer(serializers.ModelSerializer):
+class VacunacionListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de vacunaciones."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
 
     class Meta:
@@ -36,8 +46,12 @@ class VacunacionListSerializer(serializers.ModelSerializer):
         fields = ['id', 'lote', 'lote_nombre', 'fecha', 'tipo_vacuna', 'cantidad_aves']
 
 
-class TratamientoSerializer(serializers.ModelSerializer):
+class TratamientoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para tratamientos."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+        'aplicado_por_nombre': ('aplicado_por',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
     aplicado_por_nombre = serializers.SerializerMethodField()
@@ -58,8 +72,11 @@ class TratamientoSerializer(serializers.ModelSerializer):
         return None
 
 
-class TratamientoListSerializer(serializers.ModelSerializer):
+class TratamientoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de tratamientos."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
 
@@ -68,8 +85,13 @@ class TratamientoListSerializer(serializers.ModelSerializer):
         fields = ['id', 'lote', 'lote_nombre', 'fecha_inicio', 'tipo', 'tipo_display', 'medicamento']
 
 
-class MortalidadSerializer(serializers.ModelSerializer):
+class MortalidadSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para mortalidad."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+        'porcentaje_mortalidad': ('lote',),
+        'registrado_por_nombre': ('registrado_por',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     porcentaje_mortalidad = serializers.ReadOnlyField()
     registrado_por_nombre = serializers.SerializerMethodField()
@@ -90,17 +112,25 @@ class MortalidadSerializer(serializers.ModelSerializer):
         return None
 
 
-class MortalidadListSerializer(serializers.ModelSerializer):
+class MortalidadListSerializer(CamposDinamicosMixin, ValoresSerializerMixin, serializers.ModelSerializer):
     """Serializer ligero para listado de mortalidad."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
 
     class Meta:
         model = Mortalidad
         fields = ['id', 'lote', 'lote_nombre', 'fecha', 'cantidad_aves', 'causa']
+        list_serializer_class = ValoresListSerializer
 
 
-class HistorialVeterinarioSerializer(serializers.ModelSerializer):
+class HistorialVeterinarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializer para historial veterinario."""
+    relaciones_campos = {
+        'lote_nombre': ('lote',),
+        'veterinario_nombre': ('veterinario_responsable',),
+    }
     lote_nombre = serializers.ReadOnlyField(source='lote.nombre')
     total_vacunaciones = serializers.ReadOnlyField()
     total_tratamientos = serializers.ReadOnlyField()
@@ -9,6 +9,7 @@ from django.db.models import Q, Sum
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
 
+from produccion.models import Lote
 from .models import Vacunacion, Tratamiento, Mortalidad, HistorialVeterinario
 from .serializers import (
     VacunacionSerializer, VacunacionListSerializer,
@@ -16,15 +17,18 @@ from .serializers import (
     MortalidadSerializer, MortalidadListSerializer,
     HistorialVeterinarioSerializer
 )
-from core.common.mixins import OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.mixins import ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin
+from core.common.pagination import KeysetPagination
+from core.common.cache_agregados import cachear_agregado
 
 logger = logging.getLogger(__name__)
 
 
-class VacunacionViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class VacunacionViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar vacunaciones."""
     queryset = Vacunacion.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('lote', 'lote__galpon', 'aplicado_por')
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -47,10 +51,11 @@ class VacunacionViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.Mode
         serializer.save(aplicado_por=self.request.user)
 
 
-class TratamientoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class TratamientoViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar tratamientos."""
     queryset = Tratamiento.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('lote', 'aplicado_por')
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -87,10 +92,13 @@ class TratamientoViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.Mod
         serializer.save(aplicado_por=self.request.user)
 
 
-class MortalidadViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
+class MortalidadViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, FilterByDateMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar mortalidad."""
     queryset = Mortalidad.objects.filter(eliminado=False)
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('lote', 'registrado_por')
+    pagination_class = KeysetPagination
+    orden_keyset = ('-fecha', '-id')
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -113,6 +121,7 @@ class MortalidadViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.Mode
         serializer.save(registrado_por=self.request.user)
 
     @action(detail=False, methods=['get'])
+    @cachear_agregado(Mortalidad, Lote)
     def resumen_mensual(self, request):
         """Retorna resumen de mortalidad por mes."""
         queryset = self.get_queryset()
@@ -130,22 +139,17 @@ class MortalidadViewSet(OptimizedQuerySetMixin, FilterByDateMixin, viewsets.Mode
         return Response(list(resumen))
 
 
-class HistorialVeterinarioViewSet(OptimizedQuerySetMixin, viewsets.ModelViewSet):
+class HistorialVeterinarioViewSet(ConditionalGetMixin, OptimizedQuerySetMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar historiales veterinarios."""
     queryset = HistorialVeterinario.objects.filter(eliminado=False)
     serializer_class = HistorialVeterinarioSerializer
     permission_classes = [permissions.IsAuthenticated]
+    dependencias_validador = ('lote', 'veterinario_responsable')
 
     def get_queryset(self):
         """Optimiza queries."""
         queryset = super().get_queryset()
-        queryset = queryset.select_related(
-            'lote', 'lote__galpon', 'veterinario_responsable'
-        ).prefetch_related(
-            'lote__vacunaciones',
-            'lote__tratamientos',
-            'lote__mortalidades'
-        )
+        queryset = queryset.select_related('lote', 'veterinario_responsable')
         
         lote_id = self.request.query_params.get('lote')
         if lote_id: